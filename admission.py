@@ -0,0 +1,384 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process slots
+    fcntl = None
+
+from telemetry import telemetry
+
+# --- ADMISSION CONTROL FOR OUTBOUND SUTRA CALLS ---
+# Every session used to call api.two.ai whenever its user pressed enter, so a
+# burst of traffic turned into a wave of 429s and timeouts for everyone.
+# Turns now ask for admission first:
+#   - at most max_concurrent turns talk to Sutra at once
+#   - a token bucket keeps the request rate under the API quota
+#   - waiting turns are served round-robin per user, so one chatty session
+#     (or a batch job) cannot starve the others
+#   - with lock_path set, the slots and the bucket are shared by every
+#     process on the machine (flock'd slot files + a SQLite row), e.g. when
+#     several Streamlit workers run behind one API key
+# A turn holds one slot for its whole model phase. Extra requests inside a
+# turn (the hedged second path, the fallback after an agent failure) only
+# take a bucket token.
+#
+# The shared bucket is a SQLite transaction that may wait on another process,
+# so it is never touched while holding the controller's lock: a waiter fetches
+# one token at a time with the lock released, and dispatch hands out tokens
+# fetched that way.
+
+
+class AdmissionTimeout(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, burst=5):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def take(self):
+        # 0 if a token was taken, else seconds until the next one
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class SharedTokenBucket:
+    # Same bucket, state kept in SQLite so every process draws from it
+    def __init__(self, path, rate_per_minute, burst=5):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(burst, 1)
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS bucket (name TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+        self._lock = threading.Lock()
+
+    def take(self):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM bucket WHERE name = 'sutra'").fetchone()
+                tokens, updated = row if row else (float(self.capacity), now)
+                tokens = min(self.capacity, tokens + max(now - updated, 0.0) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                self._conn.execute("INSERT OR REPLACE INTO bucket (name, tokens, updated) VALUES ('sutra', ?, ?)",
+                                   (tokens, now))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+
+class FileSlots:
+    # n lock files; holding an exclusive flock on one is holding a slot.
+    # The OS drops the lock if the process dies, so slots never leak.
+    def __init__(self, path, n):
+        if fcntl is None:
+            raise RuntimeError("cross-process admission needs fcntl (not available on this platform)")
+        self._files = [open(f"{path}.slot{i}", "a+") for i in range(n)]
+        self._held = set()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            for i, f in enumerate(self._files):
+                if i in self._held:
+                    continue
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue
+                self._held.add(i)
+                return i
+        return None
+
+    def release(self, i):
+        with self._lock:
+            fcntl.flock(self._files[i].fileno(), fcntl.LOCK_UN)
+            self._held.discard(i)
+
+
+class _Waiter:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.granted = False
+        self.slot = None
+
+
+class Admission:
+    # Held for the model phase of one turn
+    def __init__(self, controller, waiter, waited):
+        self.controller = controller
+        self.waiter = waiter
+        self.waited = waited
+
+    def release(self):
+        if self.waiter is not None:
+            self.controller._release(self.waiter)
+            self.waiter = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent=8, rate_per_minute=0, burst=5, max_wait=60.0, lock_path=None,
+                 telemetry=None):
+        self.max_concurrent = max_concurrent
+        self.rate_per_minute = rate_per_minute
+        self.max_wait = max_wait
+        self.telemetry = telemetry
+        self.bucket = None
+        self.slots = None
+        self.shared_bucket = bool(lock_path)
+        if rate_per_minute > 0:
+            self.bucket = (SharedTokenBucket(lock_path + ".bucket", rate_per_minute, burst) if lock_path
+                           else TokenBucket(rate_per_minute, burst))
+        # Shared bucket only: tokens fetched but not yet handed out, whether a
+        # waiter is fetching one, and when the bucket said the next is due
+        self._spare_tokens = 0
+        self._fetching = False
+        self._token_due = 0.0
+        self._need_token = False
+        if lock_path:
+            self.slots = FileSlots(lock_path, max_concurrent)
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.timeouts = 0
+        self.extra_tokens = 0
+        self.max_depth = 0
+        self.wait_ms_total = 0.0
+        # user_id -> deque of waiters; served round-robin in this order
+        self._queues = OrderedDict()
+        self._depth = 0
+        # Reentrant, so _release can run while admit() still holds it
+        self._cond = threading.Condition(threading.RLock())
+
+    def admit(self, user_id, on_queued=None, lang=None, timeout=None, cancel=None):
+        # Blocks until the turn may call Sutra. on_queued(ahead, waited_s) is
+        # called on this thread about once a second while it waits, and once
+        # more with ahead=None when a turn that had to wait is let through.
+        # timeout shortens max_wait (the turn's remaining budget); a set
+        # cancel event gives up the place in the queue.
+        started = time.monotonic()
+        max_wait = self.max_wait or None
+        if timeout is not None:
+            max_wait = timeout if max_wait is None else min(max_wait, timeout)
+        deadline = started + max_wait if max_wait is not None else None
+        waiter = _Waiter(user_id)
+        notified_at = None
+        with self._cond:
+            self._queues.setdefault(user_id, deque()).append(waiter)
+            self._depth += 1
+            self.max_depth = max(self.max_depth, self._depth)
+            try:
+                while True:
+                    retry_in = self._dispatch()
+                    if waiter.granted:
+                        break
+                    if self._need_token and not self._fetching and time.monotonic() >= self._token_due:
+                        self._fetch_token()
+                        continue
+                    now = time.monotonic()
+                    if cancel is not None and cancel.is_set():
+                        raise AdmissionTimeout("turn ended while waiting for a free Sutra slot")
+                    if deadline is not None and now >= deadline:
+                        self.timeouts += 1
+                        raise AdmissionTimeout(f"waited {max_wait:g}s for a free Sutra slot")
+                    if on_queued is not None and (notified_at is None or now - notified_at >= 1.0):
+                        notified_at = now
+                        ahead = self._ahead(waiter)
+                        self._cond.release()
+                        try:
+                            on_queued(ahead, now - started)
+                        finally:
+                            self._cond.acquire()
+                        continue
+                    wait = 1.0 if retry_in is None else min(retry_in, 1.0)
+                    if cancel is not None:
+                        wait = min(wait, 0.25)
+                    if deadline is not None:
+                        wait = min(wait, max(deadline - now, 0.0))
+                    self._cond.wait(wait)
+            except BaseException:
+                # Timed out or the callback failed: give the place (or slot) back
+                if waiter.granted:
+                    self._release(waiter)
+                else:
+                    self._abandon(waiter)
+                raise
+
+            waited = time.monotonic() - started
+            self.admitted += 1
+            if notified_at is not None or waited >= 0.01:
+                self.queued += 1
+            self.wait_ms_total += waited * 1000
+        if self.telemetry is not None:
+            self.telemetry.record("admission.wait", lang, waited * 1000)
+        ticket = Admission(self, waiter, waited)
+        if on_queued is not None and notified_at is not None:
+            try:
+                on_queued(None, waited)
+            except BaseException:
+                ticket.release()
+                raise
+        return ticket
+
+    def take_token(self, cancel=None):
+        # One more request inside an admitted turn: waits for the bucket only
+        if self.bucket is None:
+            return
+        while True:
+            if self.shared_bucket:
+                wait = self.bucket.take()
+            else:
+                with self._cond:
+                    wait = self.bucket.take()
+            if not wait:
+                with self._cond:
+                    self.extra_tokens += 1
+                return
+            if cancel is not None and cancel.wait(min(wait, 1.0)):
+                return
+            if cancel is None:
+                time.sleep(min(wait, 1.0))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "in_flight": self.in_flight,
+                "queue_depth": self._depth,
+                "max_queue_depth": self.max_depth,
+                "waiting_users": len(self._queues),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "timeouts": self.timeouts,
+                "extra_tokens": self.extra_tokens,
+                "mean_wait_ms": self.wait_ms_total / self.admitted if self.admitted else 0.0,
+            }
+
+    def _dispatch(self):
+        # Grants slots round-robin by user; returns seconds until the bucket
+        # refills (or a slot file may free up), None if just out of slots
+        retry_in = None
+        self._need_token = False
+        while self._queues and self.in_flight < self.max_concurrent:
+            slot = None
+            if self.slots is not None:
+                slot = self.slots.try_acquire()
+                if slot is None:
+                    retry_in = 0.05
+                    break
+            if self.bucket is not None:
+                wait = self._take_dispatch_token()
+                if wait:
+                    if slot is not None:
+                        self.slots.release(slot)
+                    retry_in = wait
+                    break
+            user_id, waiters = next(iter(self._queues.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+            self._depth -= 1
+            waiter.granted = True
+            waiter.slot = slot
+            self.in_flight += 1
+            self._cond.notify_all()
+        return retry_in
+
+    def _take_dispatch_token(self):
+        # Called with the lock held: 0 if a token was taken, else seconds to wait
+        if not self.shared_bucket:
+            return self.bucket.take()
+        if self._spare_tokens:
+            self._spare_tokens -= 1
+            return 0.0
+        self._need_token = True
+        return max(self._token_due - time.monotonic(), 0.01)
+
+    def _fetch_token(self):
+        # Called with the lock held; drops it for the SQLite round trip
+        self._fetching = True
+        self._cond.release()
+        try:
+            wait = self.bucket.take()
+        finally:
+            self._cond.acquire()
+            self._fetching = False
+        if wait:
+            self._token_due = time.monotonic() + wait
+        else:
+            self._spare_tokens += 1
+        self._cond.notify_all()
+
+    def _ahead(self, waiter):
+        # Turns that will be served first under round-robin
+        own = self._queues.get(waiter.user_id, ())
+        index = list(own).index(waiter) if waiter in own else 0
+        ahead = index
+        for user_id, waiters in self._queues.items():
+            if user_id == waiter.user_id:
+                break
+            ahead += min(len(waiters), index + 1)
+        for user_id, waiters in reversed(self._queues.items()):
+            if user_id == waiter.user_id:
+                break
+            ahead += min(len(waiters), index)
+        return ahead
+
+    def _abandon(self, waiter):
+        waiters = self._queues.get(waiter.user_id)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self._depth -= 1
+            if not waiters:
+                del self._queues[waiter.user_id]
+        self._cond.notify_all()
+
+    def _release(self, waiter):
+        with self._cond:
+            self.in_flight -= 1
+            if waiter.slot is not None:
+                self.slots.release(waiter.slot)
+            self._dispatch()
+            self._cond.notify_all()
+
+
+def admission_from_env(telemetry=None):
+    return AdmissionController(
+        max_concurrent=int(os.getenv("SUTRA_MAX_CONCURRENT", "8")),
+        rate_per_minute=float(os.getenv("SUTRA_REQUESTS_PER_MINUTE", "0")),
+        burst=int(os.getenv("SUTRA_REQUEST_BURST", "5")),
+        max_wait=float(os.getenv("ADMISSION_MAX_WAIT", "60")),
+        lock_path=os.getenv("ADMISSION_LOCK_PATH") or None,
+        telemetry=telemetry,
+    )
+
+
+# Shared by every session in the process
+admission = admission_from_env(telemetry)
@@ -1,4 +1,8 @@
 import streamlit as st
+import time
+
+SCRIPT_STARTED = time.perf_counter()
+
 # --- STREAMLIT UI CONFIG ---
 st.set_page_config(
     page_title="SUTRA AI Friend Chatbot", 
@@ -8,349 +12,63 @@ st.set_page_config(
 )
 
 # --- CUSTOM CSS DESIGN ---
-st.markdown("""
-<style>
-    /* Import Google Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    /* Main app background - pure black */
-    .stApp {
-        background: #000000 !important;
-        color: #ffffff;
-        font-family: 'Inter', sans-serif;
-    }
-    
-    /* SUTRA logo styling - compact */
-    .sutra-logo {
-        display: flex;
-        align-items: center;
-        gap: 8px;
-        padding: 0.5rem 0;
-        font-size: 1.2rem;
-        font-weight: 700;
-        color: #4a9eff;
-        margin-bottom: 0.8rem;
-    }
-    
-    .sutra-icon {
-        width: 24px;
-        height: 24px;
-        background: #4a9eff;
-        border-radius: 4px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        color: white;
-        font-size: 12px;
-        font-weight: bold;
-    }
-    
-    /* Main title styling - pure black background */
-    .main-title-container {
-        text-align: center;
-        padding: 3rem 0 2rem 0;
-        background: #000000 !important;
-        margin-bottom: 2rem;
-    }
-    
-    .main-title {
-        font-size: 3rem;
-        font-weight: 700;
-        color: #4a9eff;
-        margin-bottom: 0.5rem;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        gap: 1rem;
-        background: #000000 !important;
-    }
-    
-    .main-subtitle {
-        font-size: 1.2rem;
-        color: #9ca3af;
-        font-weight: 400;
-        margin-bottom: 1rem;
-        background: #000000 !important;
-    }
-    
-    .main-description {
-        font-size: 1rem;
-        color: #6b7280;
-        max-width: 600px;
-        margin: 0 auto;
-        line-height: 1.6;
-        background: #000000 !important;
-    }
-    
-    /* Robot icon styling - removed white background */
-    .robot-icon {
-        width: 80px;
-        height: 80px;
-        background: #000000 !important;
-        border-radius: 20px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        margin: 0 auto 2rem auto;
-        font-size: 2rem;
-        border: 2px solid #4a9eff;
-    }
-    
-    /* API Configuration section - compact */
-    .api-section-title {
-        color: #fbbf24;
-        font-size: 1rem;
-        font-weight: 600;
-        margin: 1rem 0 0.5rem 0;
-        display: flex;
-        align-items: center;
-        gap: 0.4rem;
-    }
-    
-    /* Input styling - compact */
-    .stTextInput > div > div > input {
-        background: #1a1a1a !important;
-        color: white !important;
-        border: 1px solid #4a4a5a !important;
-        border-radius: 6px !important;
-        padding: 0.5rem !important;
-        font-family: 'Inter', sans-serif !important;
-        font-size: 0.9rem !important;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: #4a9eff !important;
-        box-shadow: 0 0 0 1px #4a9eff !important;
-    }
-    
-    /* API link styling - compact */
-    .api-link {
-        color: #4a9eff;
-        text-decoration: none;
-        font-size: 0.8rem;
-        display: flex;
-        align-items: center;
-        gap: 0.3rem;
-        margin-top: 0.3rem;
-        transition: color 0.2s ease;
-    }
-    
-    .api-link:hover {
-        color: #60a5fa;
-        text-decoration: underline;
-    }
-    
-    /* Warning/Alert styling - compact - REMOVED API WARNING */
-    .api-required-alert {
-        background: rgba(185, 28, 28, 0.2) !important;
-        border: 1px solid #b91c1c;
-        border-radius: 8px;
-        padding: 1.5rem;
-        margin: 2rem 0;
-        text-align: center;
-    }
-    
-    .api-required-title {
-        color: #ef4444;
-        font-size: 1.2rem;
-        font-weight: 600;
-        margin-bottom: 0.5rem;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        gap: 0.5rem;
-    }
-    
-    .api-required-text {
-        color: #fca5a5;
-        font-size: 0.95rem;
-    }
-    
-    /* Language selection - compact */
-    .language-section {
-        margin: 1rem 0;
-    }
-    
-    .language-title {
-        color: #06b6d4;
-        font-size: 1rem;
-        font-weight: 600;
-        margin-bottom: 0.5rem;
-        display: flex;
-        align-items: center;
-        gap: 0.4rem;
-    }
-    
-    /* Selectbox styling - compact */
-    .stSelectbox > div > div {
-        background: #1a1a1a !important;
-        border: 1px solid #4a4a5a !important;
-        border-radius: 6px !important;
-        color: white !important;
-        min-height: 2.5rem !important;
-    }
-    
-    .stSelectbox > div > div > select {
-        color: white !important;
-        background: #1a1a1a !important;
-        font-size: 0.9rem !important;
-    }
-    
-    /* Chat message styling - LEFT ALIGNED AND BLACK USER MESSAGES */
-    .chat-container {
-        max-width: 800px;
-        margin: 0 auto;
-        padding: 2rem 1rem;
-        background: #000000 !important;
-    }
-    
-    .chat-message {
-        padding: 1rem;
-        border-radius: 12px;
-        margin: 1rem 0;
-        max-width: 85%;
-        /* REMOVED: margin-left: auto and margin-right properties for left alignment */
-        margin-left: 0 !important;
-        margin-right: auto !important;
-        text-align: left !important;
-    }
-    
-    /* CHANGED: User message now has black background instead of blue */
-    .user-message {
-        background: #1a1a1a !important;
-        color: #ffffff !important;
-        border: 1px solid #4a4a5a;
-        /* REMOVED: margin-left: auto and text-align: right */
-    }
-    
-    .assistant-message {
-        background: #2a2a2a !important;
-        color: #ffffff;
-        border: 1px solid #4a4a5a;
-        /* REMOVED: margin-right: auto and margin-left: 0 */
-    }
-    
-    /* Button styling - UPDATED FOR CLEAR AND REFRESH BUTTONS */
-    .stButton > button {
-        background: #000000 !important;
-        color: #ffffff !important;
-        border: 1px solid #4a4a5a !important;
-        border-radius: 8px !important;
-        padding: 0.75rem 1.5rem !important;
-        font-weight: 500 !important;
-        font-family: 'Inter', sans-serif !important;
-        transition: all 0.2s ease !important;
-    }
-    
-    .stButton > button:hover {
-        background: #1a1a1a !important;
-        border-color: #6a6a7a !important;
-        transform: translateY(-1px);
-    }
-    
-    /* Special styling for action buttons (Clear/Refresh) */
-    .action-button button {
-        background: #000000 !important;
-        color: #ffffff !important;
-        border: 1px solid #4a4a5a !important;
-        border-radius: 8px !important;
-        padding: 0.75rem 1.5rem !important;
-        font-weight: 500 !important;
-        font-family: 'Inter', sans-serif !important;
-        transition: all 0.2s ease !important;
-    }
-    
-    .action-button button:hover {
-        background: #1a1a1a !important;
-        border-color: #6a6a7a !important;
-        transform: translateY(-1px);
-    }
-    
-    /* Chat input styling - black theme */
-    .stChatInput > div {
-        background: #1a1a1a !important;
-        border: 1px solid #4a4a5a !important;
-        border-radius: 12px !important;
-    }
-    
-    .stChatInput input {
-        background: transparent !important;
-        color: white !important;
-        border: none !important;
-    }
-    
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* No chat state - black background */
-    .no-chat-state {
-        text-align: center;
-        padding: 3rem 2rem;
-        color: #6b7280;
-        background: #000000 !important;
-    }
-    
-    .no-chat-icon {
-        font-size: 4rem;
-        margin-bottom: 1rem;
-        color: #4a5568;
-    }
-    
-    /* Force black background on main content areas only */
-    .main, .block-container {
-        background: #000000 !important;
-    }
-    
-    /* Column containers black */
-    .css-ocqkz7, .css-1kyxreq {
-        background: #000000 !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# The stylesheet lives in assets/style.css and is served from app/static
+# (python static_assets.py rebuilds it), so browsers fetch and cache it once
+# instead of receiving the whole block again on every full rerun.
+from static_assets import asset_url, stylesheet_html
+
+st.markdown(stylesheet_html(), unsafe_allow_html=True)
 
-import requests
 import os
-import json
-from datetime import datetime, timedelta
-import traceback
-import base64
-
-# Optional imports with error handling
-try:
-    from mem0 import MemoryClient
-    MEM0_AVAILABLE = True
-except ImportError:
-    MEM0_AVAILABLE = False
-
-try:
-    from agno.agent import Agent
-    from agno.models.openai.like import OpenAILike
-    from openai import OpenAI
-    from agno.tools.duckduckgo import DuckDuckGoTools
-    AGNO_AVAILABLE = True
-except ImportError:
-    AGNO_AVAILABLE = False
-
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-
-try:
-    from googletrans import Translator
-    TRANSLATOR_AVAILABLE = True
-except ImportError:
-    TRANSLATOR_AVAILABLE = False
+import uuid
+import importlib.util
+
+from resources import resource_cache, key_fingerprint
+from chat_engine import (
+    SUTRA_MODEL_ID, ChatEngine, TokenStream, build_agent_pool, build_memory_client, build_translator
+)
+from chat_render import (
+    HISTORY_PAGE_SIZE, assistant_bubble_html, fragment_cache, new_message, user_bubble_html, visible_messages
+)
+from admission import admission
+from conversation import Conversation
+from hedging import hedge_stats
+from http_client import sutra_http
+from local_memory import build_local_memory
+from memory_cache import MemoryContextCache
+from memory_writer import memory_writer
+from prompt_builder import estimate_tokens
+from response_cache import response_cache
+from telemetry import telemetry
+from users import resolve_user_id, turn_quota
+from web_search import web_search
+
+# Optional dependencies are only probed here (a spec lookup, no import) so a
+# cold start does not pay for mem0 / agno / openai / googletrans before an
+# API key is even entered. The real imports happen inside the build_*
+# functions the first time each client is created.
+def module_available(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+MEM0_AVAILABLE = module_available("mem0")
+# DuckDuckGoTools needs ddgs (newer agno) or duckduckgo_search (older agno)
+AGNO_AVAILABLE = (
+    module_available("agno")
+    and module_available("openai")
+    and (module_available("ddgs") or module_available("duckduckgo_search"))
+)
+OPENAI_AVAILABLE = module_available("openai")
+TRANSLATOR_AVAILABLE = module_available("googletrans")
 
 # --- SIDEBAR CONFIGURATION ---
 with st.sidebar:
     # SUTRA Logo and Title - Compact
     st.markdown(f"""
 <div style="text-align: center;">
-    <img src="https://framerusercontent.com/images/3Ca34Pogzn9I3a7uTsNSlfs9Bdk.png"
+    <img src="{asset_url('sidebar_logo')}" width="210" height="80" alt="Chat Sutra"
          style="width: 210px; height: 80px; border-radius: 8px; margin-bottom: 5px;" />
 </div>
 
@@ -388,7 +106,7 @@ with st.sidebar:
         "MEM0 API Key (Optional)", 
         value="",
         type="password",
-        help="Enter your Mem0 API key for memory features",
+        help="Enter your Mem0 API key for memory features (without one, memories are kept in a local SQLite file)",
         placeholder="m0-xxxxxxxxxxxxxx"
     )
     st.markdown(
@@ -417,208 +135,321 @@ with st.sidebar:
         index=0
     )
 
+    stream_responses = st.toggle(
+        "⚡ Stream responses",
+        value=True,
+        help="Show Sutra's reply word by word as it is generated"
+    )
+
 # Use API keys from sidebar
 SUTRA_API_KEY = sutra_api_key
 MEM0_API_KEY = mem0_api_key
-USER_ID = "simple_session_2"
+
+# Seconds before a user's cached memory context is refetched from Mem0
+MEMORY_CONTEXT_TTL = int(os.getenv("MEMORY_CONTEXT_TTL", "300"))
+# While the page is open, check this often (seconds) that the memory context
+# is still fresh and reload it in the background if not (0 = only on activity)
+MEMORY_PREFETCH_EVERY = float(os.getenv("MEMORY_PREFETCH_EVERY", "30"))
+# Memories sent with each prompt, picked by relevance (0 = send all of them)
+MEMORY_TOP_K = int(os.getenv("MEMORY_TOP_K", "8"))
+# Estimated tokens allowed for persona + message + memory context per request
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+
+# Seconds the Agno agent may run before the direct API is raced against it
+# (0 = only fall back after the agent fails)
+HEDGE_AFTER_SECONDS = float(os.getenv("HEDGE_AFTER_SECONDS", "6"))
+
+# Seconds a turn may take end to end (0 = no limit); memory context and web
+# search are skipped when too little of it is left for the reply
+TURN_BUDGET_SECONDS = float(os.getenv("TURN_BUDGET_SECONDS", "45"))
+
+# Agno agents kept per API key, so that many agent turns can run at once
+# (defaults to the number of turns admitted to Sutra at once)
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "0")) or admission.max_concurrent
+
+# SQLite file used for memories when no Mem0 key is entered ("" = no memory)
+LOCAL_MEMORY_PATH = os.getenv("LOCAL_MEMORY_PATH", "memory.db")
+
+# Turns of this chat sent verbatim with each message (older ones are summarized)
+CONVERSATION_RECENT_TURNS = int(os.getenv("CONVERSATION_RECENT_TURNS", "4"))
+# Estimated tokens allowed for the conversation summary + recent turns
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "800"))
+
+# Optional JSON file so the translation cache survives restarts
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH") or None
 
 # Set environment variables
 os.environ["MEM0_API_KEY"] = MEM0_API_KEY
 os.environ["SUTRA_API_KEY"] = SUTRA_API_KEY
 
+# --- Initialize session state ---
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "resource_keys" not in st.session_state:
+    st.session_state.resource_keys = {}
+
+# Mem0 namespace for this user: signed-in account (when st.login is set up),
+# else this browser session; SUTRA_USER_ID pins one id for every session
+def signed_in_email():
+    try:
+        if st.user.get("is_logged_in"):
+            return st.user.get("email")
+    except Exception:
+        pass
+    return None
+
+USER_ID = resolve_user_id(
+    email=signed_in_email(),
+    session_id=st.session_state.session_id,
+    fixed=os.getenv("SUTRA_USER_ID")
+)
+
+# Process-wide, so every session and rerun shares the parsed memories
+memory_context_cache = resource_cache.get(
+    ("memory_context", None, None, None),
+    lambda: MemoryContextCache(ttl=MEMORY_CONTEXT_TTL)
+)
+
+# Fetch a shared client from the process-wide cache. When this session switches
+# to a different key (new API key, model or language) it releases its claim on
+# the old client so it gets evicted once no other session uses it.
+def get_cached_resource(kind, key, factory):
+    previous = st.session_state.resource_keys.get(kind)
+    if previous is not None and previous != key:
+        resource_cache.release(previous, st.session_state.session_id)
+    st.session_state.resource_keys[kind] = key
+    return resource_cache.get(key, factory, owner=st.session_state.session_id)
+
 # Initialize components only if libraries are available
 memory = None
 translator = None
 mentor_agent = None
+mentor_agent_key = None
 
 if MEM0_AVAILABLE and MEM0_API_KEY:
     try:
-        memory = MemoryClient(api_key=MEM0_API_KEY)
+        memory = get_cached_resource(
+            "memory",
+            ("memory", key_fingerprint(MEM0_API_KEY), None, None),
+            lambda: build_memory_client(MEM0_API_KEY)
+        )
     except Exception as e:
         st.error(f"Failed to initialize Mem0 client: {str(e)}")
+elif LOCAL_MEMORY_PATH:
+    # No Mem0 key: keep memories in a local SQLite file instead
+    try:
+        memory = get_cached_resource(
+            "memory",
+            ("memory", "local", LOCAL_MEMORY_PATH, None),
+            lambda: build_local_memory(LOCAL_MEMORY_PATH)
+        )
+    except Exception as e:
+        st.error(f"Failed to open local memory store: {str(e)}")
 
-if TRANSLATOR_AVAILABLE:
+# Translation is only used when writing memories
+if TRANSLATOR_AVAILABLE and memory:
     try:
-        translator = Translator()
+        translator = get_cached_resource(
+            "translator",
+            ("translator", None, None, None),
+            lambda: build_translator(TRANSLATION_CACHE_PATH)
+        )
     except Exception as e:
         st.error(f"Failed to initialize translator: {str(e)}")
 
 # --- AGNO AGENT SETUP ---
 if AGNO_AVAILABLE and SUTRA_API_KEY:
     try:
-        sutra_model = OpenAILike(
-            id="sutra-v2",
-            base_url="https://api.two.ai/v2",
-            api_key=SUTRA_API_KEY
-        )
-
-        mentor_agent = Agent(
-            name="AIMentor",
-            instructions=[
-                "You are Sutra, an AI friend and mentor who lives in Pune, India.",
-                "You enjoy helping people and chatting with them in a human-like, empathetic tone.",
-                "Respond kindly, supportively, and personally in the user's chosen language.",
-                "Avoid generic AI disclaimers like 'I'm just an AI'. Instead, say you're Sutra, their AI friend.",
-                "Respect emotional context. Give thoughtful, kind responses.",
-                "If needed, use web search to gather data"
-            ],
-            tools=[DuckDuckGoTools()],
-            model=sutra_model,
-            add_datetime_to_instructions=True
+        mentor_agent_key = ("agent", key_fingerprint(SUTRA_API_KEY), SUTRA_MODEL_ID, language_map[lang_choice])
+        mentor_agent = get_cached_resource(
+            "agent", mentor_agent_key, lambda: build_agent_pool(SUTRA_API_KEY, SUTRA_MODEL_ID, AGENT_POOL_SIZE)
         )
     except Exception as e:
         st.error(f"Failed to initialize Agno agent: {str(e)}")
         mentor_agent = None
 
-# --- Initialize session state ---
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+# What the model sees of this chat: a rolling summary + the latest turns
+if "conversation" not in st.session_state:
+    st.session_state.conversation = Conversation(recent_turns=CONVERSATION_RECENT_TURNS)
+if "history_window" not in st.session_state:
+    st.session_state.history_window = HISTORY_PAGE_SIZE
 if "lang_code" not in st.session_state:
     st.session_state.lang_code = "english"
 
 # Update language code
 st.session_state.lang_code = language_map[lang_choice]
 
-# --- Mem0: get all past memory ---
-def get_all_memory_context():
-    if not memory:
-        return ""
-    
-    try:
-        memories = memory.search("*", user_id=USER_ID)
-        all_memories = []
-        for m in memories:
-            if isinstance(m, dict):
-                mem_time_str = m.get("timestamp") or m.get("created_at")
-                if mem_time_str:
-                    try:
-                        # Handle different timestamp formats
-                        if mem_time_str.endswith('Z'):
-                            mem_time = datetime.fromisoformat(mem_time_str.replace("Z", "+00:00"))
-                        else:
-                            mem_time = datetime.fromisoformat(mem_time_str)
-                        
-                        # Check if memory is within last 30 days
-                        now = datetime.now()
-                        if mem_time.tzinfo:
-                            now = now.replace(tzinfo=mem_time.tzinfo)
-                        
-                        if now - mem_time < timedelta(days=30):
-                            memory_text = m.get("memory", "")
-                            if memory_text:
-                                all_memories.append(memory_text)
-                    except Exception as parse_error:
-                        continue
-        return "\n".join(all_memories) if all_memories else ""
-    except Exception as e:
-        st.error(f"Error retrieving memories: {str(e)}")
-        return ""
-
-# --- Mem0: save to memory in English ---
-def save_to_memory(user_input, response):
-    if not memory:
-        return
-    
-    try:
-        user_english = user_input
-        response_english = response
-        
-        # Translate to English if translator is available and not already English
-        if translator and st.session_state.lang_code != "english":
-            try:
-                user_english = translator.translate(user_input, dest="en").text
-                response_english = translator.translate(response, dest="en").text
-            except Exception as trans_error:
-                # Use original text if translation fails
-                pass
-        
-        memory.add(
-            messages=[
-                {"role": "user", "content": user_english}, 
-                {"role": "assistant", "content": response_english}
-            ], 
-            user_id=USER_ID
+# --- SIDEBAR DIAGNOSTICS ---
+# Resource cache hits should climb on every rerun while misses stay flat
+with st.sidebar:
+    with st.expander("⚙️ Diagnostics", expanded=False):
+        cache_stats = resource_cache.stats()
+        st.caption(
+            f"Entries: {cache_stats['entries']} · Hits: {cache_stats['hits']} · "
+            f"Misses: {cache_stats['misses']} · Evictions: {cache_stats['evictions']}"
         )
-    except Exception as e:
-        st.error(f"Error saving to memory: {str(e)}")
-
-# --- Fallback chat function using direct API call ---
-def chat_with_fallback_api(user_message):
-    try:
-        headers = {
-            "Authorization": f"Bearer {SUTRA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        context = get_all_memory_context()
-        lang = st.session_state.lang_code
-        system_prompt = f"""You are Sutra, an AI friend and mentor who lives in Pune, India.
-You enjoy helping people and chatting with them in a human-like, empathetic tone.
-Respond kindly, supportively, and personally in {lang}.
-Avoid generic AI disclaimers like 'I'm just an AI'. Instead, say you're Sutra, their AI friend.
-Respect emotional context. Give thoughtful, kind responses.
-
-Context from previous conversations: {context}"""
-
-        data = {
-            "model": "sutra-v2",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            "max_tokens": 500,
-            "temperature": 0.7
-        }
-        
-        response = requests.post(
-            "https://api.two.ai/v2/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=30
+        memory_stats = memory_context_cache.stats()
+        quota_stats = turn_quota.stats()
+        st.caption(
+            f"User: {USER_ID[:20]} · cached users: {memory_stats['users']} "
+            f"(evicted {memory_stats['evictions']}) · rate-limited turns: {quota_stats['rejected']}"
         )
-        
-        if response.status_code == 200:
-            result = response.json()
-            reply = result["choices"][0]["message"]["content"]
-            save_to_memory(user_message, reply)
-            return reply
-        else:
-            return f"⚠️ API Error: {response.status_code} - {response.text}"
-            
-    except requests.exceptions.Timeout:
-        return "⚠️ Request timed out. Please try again."
-    except requests.exceptions.RequestException as e:
-        return f"⚠️ Network error: {str(e)}"
-    except Exception as e:
-        return f"⚠️ Unexpected error: {str(e)}"
-
-# --- CALL AGNO SUTRA AGENT (with fallback) ---
-def chat_with_sutra_agent(user_message):
-    # Try Agno agent first
-    if mentor_agent:
-        try:
-            context = get_all_memory_context()
-            lang = st.session_state.lang_code
-            prompt = f"Language: {lang}\nContext: {context}\n\nUser: {user_message}"
-            
-            reply = mentor_agent.run(prompt)
-            
-            # Handle different response types
-            if hasattr(reply, 'content'):
-                result = reply.content
-            elif hasattr(reply, 'text'):
-                result = reply.text
-            else:
-                result = str(reply)
-            
-            save_to_memory(user_message, result)
-            return result
-            
-        except Exception as e:
-            st.warning(f"Agno agent failed: {str(e)}. Using fallback API.")
-    
-    # Fallback to direct API call
-    return chat_with_fallback_api(user_message)
+        if memory_stats["hits"] or memory_stats["refreshes"] or memory_stats["prefetches"]:
+            st.caption(
+                f"Memory context — from cache: {memory_stats['hits']} · fetched during a turn: "
+                f"{memory_stats['refreshes']} · prefetched: {memory_stats['prefetches']}"
+                + (f" (failed {memory_stats['prefetch_errors']})" if memory_stats["prefetch_errors"] else "")
+            )
+        if response_cache is not None:
+            reply_cache_stats = response_cache.stats()
+            st.caption(
+                f"Reply cache — hit rate: {reply_cache_stats['hit_rate']:.0%} "
+                f"({reply_cache_stats['similar_hits']} near-duplicate) · bypassed: {reply_cache_stats['bypassed']} · "
+                f"{reply_cache_stats['entries']} replies, {reply_cache_stats['bytes'] / 1024:.0f} KB · "
+                f"saved: {reply_cache_stats['saved_ms'] / 1000:.1f} s"
+            )
+        writer_stats = memory_writer.stats()
+        st.caption(
+            f"Memory writes — pending: {writer_stats['pending']} · written: {writer_stats['written']} · "
+            f"failed: {writer_stats['failed']} · retries: {writer_stats['retries']}"
+        )
+        http_stats = sutra_http.stats()
+        st.caption(
+            f"Sutra API — requests: {http_stats['requests']} · retries: {http_stats['retries']} · "
+            f"circuit: {http_stats['breaker']} (trips: {http_stats['breaker_trips']}, rejected: {http_stats['rejected']})"
+        )
+        admission_stats = admission.stats()
+        if admission_stats["admitted"]:
+            st.caption(
+                f"Sutra queue — in flight: {admission_stats['in_flight']}/{admission.max_concurrent} · "
+                f"waiting: {admission_stats['queue_depth']} (max {admission_stats['max_queue_depth']}) · "
+                f"queued turns: {admission_stats['queued']}/{admission_stats['admitted']} · "
+                f"mean wait: {admission_stats['mean_wait_ms']:.0f} ms · timed out: {admission_stats['timeouts']}"
+            )
+        if mentor_agent is not None:
+            pool_stats = mentor_agent.stats()
+            st.caption(
+                f"Agno agents — built: {pool_stats['built']}/{pool_stats['size']} · idle: {pool_stats['idle']} · "
+                f"runs: {pool_stats['runs']} · waited for an agent: {pool_stats['waited']}"
+            )
+        search_stats = web_search.stats()
+        if search_stats["calls"]:
+            st.caption(
+                f"Web search — calls: {search_stats['calls']} · from cache: {search_stats['hits']} · "
+                f"shared in-flight: {search_stats['coalesced']} · fetched: {search_stats['fetched']} · "
+                f"timeouts: {search_stats['timeouts']} · skipped: {search_stats['skipped']} · "
+                f"errors: {search_stats['errors']}"
+            )
+        hedge_snapshot = hedge_stats.snapshot()
+        if hedge_snapshot["turns"]:
+            st.caption(
+                f"Hedged turns: {hedge_snapshot['hedged']}/{hedge_snapshot['turns']} · wins: "
+                + ", ".join(f"{name} {count}" for name, count in hedge_snapshot["wins"].items())
+                + (f" · last turn: {st.session_state.last_turn_path}" if "last_turn_path" in st.session_state else "")
+            )
+        if st.session_state.get("last_turn_skipped"):
+            st.caption(
+                f"Last turn skipped to stay within {TURN_BUDGET_SECONDS:g} s: "
+                + ", ".join(st.session_state.last_turn_skipped)
+            )
+        if "last_script_ms" in st.session_state:
+            st.caption(
+                f"Full script run: {st.session_state.last_script_ms:.0f} ms · chat area rerun: "
+                f"{st.session_state.get('last_fragment_ms', 0):.0f} ms"
+            )
+        st.caption(
+            f"Rendered bubbles cached — hits: {fragment_cache.hits} · misses: {fragment_cache.misses}"
+        )
+        translator_stats = translator.stats() if translator else None
+        if translator_stats:
+            last_translation = translator_stats["last_call"]
+            st.caption(
+                f"Translation cache — hit rate: {translator_stats['hit_rate']:.0%} · "
+                f"entries: {translator_stats['entries']} · requests: {translator_stats['requests']}"
+                + (f" · last turn: {last_translation['ms']:.0f} ms" if last_translation else "")
+            )
+        prompt_usage = st.session_state.get("last_prompt_usage")
+        if prompt_usage:
+            st.caption(
+                f"Last prompt — {prompt_usage['used']}/{prompt_usage['budget']} tokens "
+                f"(persona {prompt_usage['persona']}, conversation {prompt_usage['history']}, "
+                f"message {prompt_usage['message']}, "
+                f"memory {prompt_usage['memory']}) · memories kept: {prompt_usage['memories_kept']}, "
+                f"dropped: {prompt_usage['memories_dropped']}"
+                + (" · message truncated" if prompt_usage["message_truncated"] else "")
+            )
+        conversation = st.session_state.conversation
+        if len(conversation):
+            st.caption(
+                f"Conversation — {len(conversation)} turns · summarized: {conversation.summarized} "
+                f"({conversation.folds} updates, ~{estimate_tokens(conversation.summary)} tokens)"
+            )
+        if writer_stats["last_error"]:
+            st.caption(f"Last memory write error: {writer_stats['last_error']}")
+
+    # Per-stage latency histograms from telemetry.py (TURN_TELEMETRY=0 turns them off)
+    if telemetry.enabled:
+        with st.expander("⏱️ Turn timings", expanded=False):
+            stage_rows = telemetry.summary()
+            if not stage_rows:
+                st.caption("No turns timed yet")
+            for stage, lang, count, p50, p95, mean, errors in stage_rows:
+                st.caption(
+                    f"{stage} · {lang} — n {count} · p50 {p50:.0f} ms · p95 {p95:.0f} ms · mean {mean:.0f} ms"
+                    + (f" · errors {errors}" if errors else "")
+                )
+            st.download_button(
+                "📥 Prometheus metrics",
+                telemetry.prometheus_text(),
+                file_name="sutra_metrics.prom",
+                mime="text/plain"
+            )
+            st.download_button(
+                "📥 Spans (JSON lines)",
+                telemetry.jsonl(),
+                file_name="sutra_spans.jsonl",
+                mime="application/x-ndjson"
+            )
+
+# --- CHAT ENGINE ---
+# All turn logic lives in chat_engine.py; the UI only supplies this session's
+# clients and settings, then shows the notices and diagnostics it returns.
+engine = ChatEngine(
+    SUTRA_API_KEY,
+    model_id=SUTRA_MODEL_ID,
+    agent=mentor_agent,
+    memory=memory,
+    translator=translator,
+    memory_cache=memory_context_cache,
+    memory_top_k=MEMORY_TOP_K,
+    token_budget=PROMPT_TOKEN_BUDGET,
+    hedge_after=HEDGE_AFTER_SECONDS,
+    quota=turn_quota,
+    response_cache=response_cache,
+    history_tokens=CONVERSATION_TOKEN_BUDGET,
+    admission=admission,
+    turn_budget=TURN_BUDGET_SECONDS or None
+)
+
+# Start loading this user's memories as soon as the session starts or a key
+# is entered, so the first message finds them already local (a no-op while
+# the cached copy is fresh)
+engine.prefetch(USER_ID)
+
+def chat_with_sutra_agent(user_message, stream=None, on_queued=None, on_tick=None):
+    result = engine.chat(
+        USER_ID, user_message, st.session_state.lang_code, stream=stream,
+        conversation=st.session_state.conversation, on_queued=on_queued, on_tick=on_tick
+    )
+    for level, message in result.notices:
+        getattr(st, level)(message)
+    if result.prompt_usage:
+        st.session_state.last_prompt_usage = result.prompt_usage
+    st.session_state.last_turn_path = result.path
+    st.session_state.last_turn_skipped = result.skipped
+    return result.reply
 
 # --- MAIN CONTENT AREA ---
 
@@ -626,7 +457,7 @@ def chat_with_sutra_agent(user_message):
 st.markdown(f"""
 <div class="main-title-container" style="background: #000000 !important;">
     <div style="background: #000000 !important; padding: 0; text-align: center;">
-    <img src="https://framerusercontent.com/images/9vH8BcjXKRcC5OrSfkohhSyDgX0.png"
+    <img src="{asset_url('header_logo')}" width="200" height="200" alt="Sutra"
          style="width: 200px; height: 200px; background: #000000 !important; border: none; border-radius: 0px; margin: 0 auto; display: block; box-shadow: none;" />
 </div>
 </div>
@@ -645,51 +476,40 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Check if API key is provided
-if not SUTRA_API_KEY:
-    st.markdown("""
-    <div class="api-required-alert">
-        <div class="api-required-title">⚠️ API Key Required</div>
-        <div class="api-required-text">
-            Please enter your Sutra API key in the sidebar to continue chatting with your AI mentor.
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-else:
+# --- CHAT AREA ---
+# A fragment: sending a message or paging history only re-executes this
+# function, not the page config, stylesheet, sidebar and client setup above.
+def load_earlier():
+    st.session_state.history_window += HISTORY_PAGE_SIZE
+
+
+@st.fragment
+def chat_area():
+    fragment_started = time.perf_counter()
+    model_seconds = 0.0
+
+    # A turn interrupted by the Stop button (or any other full rerun) never
+    # got to add its reply
+    if st.session_state.pop("turn_in_flight", False):
+        partial = st.session_state.pop("turn_partial", "")
+        st.session_state.chat_history.append(
+            new_message("assistant", partial + " … ⏹️" if partial else "⏹️ Stopped.")
+        )
+
     # Chat interface
     st.markdown('<div class="chat-container">', unsafe_allow_html=True)
 
-# Display chat history
+    # Display chat history
     if st.session_state.chat_history:
-        for i, msg in enumerate(st.session_state.chat_history):
-            if msg["role"] == "user":
-                st.markdown(
-                    f"""
-                    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem;">
-                        <div style="width: 36px; height: 36px; background-color: #f87171; border-radius: 12px; display: flex; align-items: center; justify-content: center; margin-right: 10px;">
-                            <svg xmlns="http://www.w3.org/2000/svg" height="20" viewBox="0 0 24 24" width="20" fill="black">
-                                <path d="M12 12c2.21 0 4-1.79 4-4s-1.79-4-4-4-4 1.79-4 4 1.79 4 4 4zm0 2c-2.67 0-8 1.34-8 4v2h16v-2c0-2.66-5.33-4-8-4z"/>
-                            </svg>
-                        </div>
-                        <div style="background-color: #1f2937; color: white; padding: 12px 16px; border-radius: 12px; max-width: 80%;">
-                            {msg["content"]}
-                        </div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
-            else:
-                st.markdown(
-                f'''
-                <div style="display: flex; align-items: flex-start; margin-bottom: 1rem;">
-                    <img src="https://framerusercontent.com/images/9vH8BcjXKRcC5OrSfkohhSyDgX0.png" width="36" height="36" style="margin-right: 10px; border-radius: 50%;" />
-                    <div style="background-color: #111827; color: white; padding: 12px 16px; border-radius: 12px; max-width: 80%;">
-                        {msg["content"]}
-                    </div>
-                </div>
-                ''',
-                unsafe_allow_html=True
-            )
+        # Only the newest messages are sent to the browser; older ones are
+        # paged in on demand. Each bubble's HTML is cached across reruns.
+        start, window = visible_messages(st.session_state.chat_history, st.session_state.history_window)
+        if start:
+            # A callback, so the wider window is already in place when the
+            # chat area reruns for the click
+            st.button(f"⬆️ Load earlier messages ({start} hidden)", key="load_earlier", on_click=load_earlier)
+        for i, msg in enumerate(window, start):
+            st.markdown(fragment_cache.render(msg, fallback_id=i), unsafe_allow_html=True)
 
     else:
         # No chat state
@@ -710,16 +530,108 @@ else:
     # Handle user input
     if user_input:
         # Add user message to history
-        st.session_state.chat_history.append({"role": "user", "content": user_input})
-        
-        # Show thinking spinner
-        with st.spinner("🤔 Sutra is typing..."):
-            reply = chat_with_sutra_agent(user_input)
+        st.session_state.chat_history.append(new_message("user", user_input))
+        st.session_state.turn_in_flight = True
+        st.session_state.turn_partial = ""
+
+        # Everything painted into the reply bubble goes through here, so the
+        # keep-alive below can repaint the latest state
+        shown = ["🤔 Sutra is typing..."]
+
+        def paint(text):
+            shown[0] = text
+            reply_placeholder.markdown(assistant_bubble_html(text), unsafe_allow_html=True)
+
+        # While the turn waits for a free Sutra slot, say so instead of "typing"
+        def show_queued(ahead, waited):
+            if ahead is None:
+                paint("🤔 Sutra is typing...")
+            else:
+                paint(f"⏳ Sutra is busy: {ahead} message{'s' if ahead != 1 else ''} ahead of yours ({waited:.0f} s)")
+
+        # Called a few times a second while the turn waits. Any st call lets
+        # Streamlit interrupt the script, which is how the Stop button gets in
+        # while no tokens are arriving; the engine then cancels the turn.
+        def keep_alive():
+            if shown[0]:
+                reply_placeholder.markdown(assistant_bubble_html(shown[0]), unsafe_allow_html=True)
+            else:
+                reply_placeholder.empty()
+
+        # Show the user's message right away; the new bubbles are painted in
+        # place below the history instead of rerunning the chat area, which
+        # also works when this run is part of a full script run
+        st.markdown(user_bubble_html(user_input), unsafe_allow_html=True)
+        model_started = time.perf_counter()
+        if stream_responses:
+            # Paint the reply as tokens arrive (at most ~20 repaints/s to keep
+            # the websocket quiet)
+            reply_placeholder = st.empty()
+            paint("🤔 Sutra is typing...")
+            last_paint = [0.0]
+
+            def paint_reply(text):
+                now = time.monotonic()
+                if now - last_paint[0] >= 0.05:
+                    st.session_state.turn_partial = text
+                    paint(text + " ▌")
+                    last_paint[0] = now
+
+            reply = chat_with_sutra_agent(
+                user_input, stream=TokenStream(paint_reply), on_queued=show_queued, on_tick=keep_alive
+            )
+            paint(reply)
+        else:
+            # Show thinking spinner; the queue status replaces it while waiting
+            reply_placeholder = st.empty()
+            shown[0] = ""
+
+            def show_queued_status(ahead, waited):
+                if ahead is None:
+                    shown[0] = ""
+                    reply_placeholder.empty()
+                else:
+                    show_queued(ahead, waited)
+
+            with st.spinner("🤔 Sutra is typing..."):
+                reply = chat_with_sutra_agent(user_input, on_queued=show_queued_status, on_tick=keep_alive)
+            paint(reply)
+        model_seconds = time.perf_counter() - model_started
         
         # Add assistant response to history
-        st.session_state.chat_history.append({"role": "assistant", "content": reply})
-        
-        # Rerun to update the display
-        st.rerun()
+        st.session_state.chat_history.append(new_message("assistant", reply))
+        st.session_state.turn_in_flight = False
+
+    # Script time excluding the model call: the cost a turn adds on our side
+    st.session_state.last_fragment_ms = (time.perf_counter() - fragment_started - model_seconds) * 1000
     
     # Action buttons removed as requested
+
+# Check if API key is provided
+if not SUTRA_API_KEY:
+    st.markdown("""
+    <div class="api-required-alert">
+        <div class="api-required-title">⚠️ API Key Required</div>
+        <div class="api-required-text">
+            Please enter your Sutra API key in the sidebar to continue chatting with your AI mentor.
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+else:
+    chat_area()
+    # Outside the chat fragment on purpose: a click here reruns the whole
+    # script, which interrupts a turn in progress, while a click inside the
+    # fragment would only be handled once the turn is over
+    st.button("⏹️ Stop reply", key="stop_reply", help="Stop the reply Sutra is writing")
+
+    # Renders nothing: reruns on a timer while the page is open and refreshes
+    # the memory context in the background before its TTL runs out, so a
+    # message typed after a long pause does not wait for Mem0 either
+    if memory and MEMORY_PREFETCH_EVERY > 0:
+        @st.fragment(run_every=MEMORY_PREFETCH_EVERY)
+        def keep_memory_warm():
+            engine.prefetch(USER_ID)
+
+        keep_memory_warm()
+
+st.session_state.last_script_ms = (time.perf_counter() - SCRIPT_STARTED) * 1000
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import admission
+from chat_engine import SUTRA_MODEL_ID, ChatEngine, TokenStream, build_memory_client, build_mentor_agent, build_translator
+from conversation import Conversation, conversation_summarizer
+from local_memory import build_local_memory
+from memory_cache import MemoryContextCache
+from memory_writer import memory_writer
+
+# --- BATCH REPLAY THROUGH THE CHAT ENGINE ---
+# Replays a JSONL file of conversations through ChatEngine without Streamlit,
+# for offline regression runs and bulk evaluation. One conversation per line:
+#
+#   {"id": "c1", "lang": "hindi", "turns": ["namaste", "aaj mausam kaisa hai?"]}
+#
+# "messages": [{"role": "user", "content": ...}, ...] is accepted instead of
+# "turns" (non-user messages are skipped). Conversations run in parallel on a
+# worker pool; the turns of one conversation always run in order. Every turn
+# is written as one JSON line with the reply, path taken and timings.
+#
+#   python batch_replay.py conversations.jsonl -o replies.jsonl --workers 8
+
+
+def load_conversations(path):
+    conversations = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            turns = record.get("turns")
+            if turns is None:
+                turns = [m["content"] for m in record.get("messages", []) if m.get("role") == "user"]
+            conversations.append({
+                "id": str(record.get("id", line_no)),
+                "user_id": record.get("user_id"),
+                "lang": record.get("lang"),
+                "turns": turns,
+            })
+    return conversations
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay JSONL conversations through the headless chat engine")
+    parser.add_argument("input", help="JSONL file, one conversation per line")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for per-turn results (default: stdout)")
+    parser.add_argument("--workers", type=int, default=4, help="conversations replayed in parallel")
+    parser.add_argument("--api-key", default=os.getenv("SUTRA_API_KEY", ""))
+    parser.add_argument("--model", default=SUTRA_MODEL_ID)
+    parser.add_argument("--lang", default="english", help="language for conversations that do not set one")
+    parser.add_argument("--agent", action="store_true", help="use the Agno agent (one per worker) before the direct API")
+    parser.add_argument("--hedge-after", type=float, default=float(os.getenv("HEDGE_AFTER_SECONDS", "6")))
+    parser.add_argument("--local-memory", default=None, metavar="PATH",
+                        help="keep memories in this SQLite file instead of Mem0")
+    parser.add_argument("--mem0-key", default=None, help="enable Mem0 memories (written under batch-<id> user ids)")
+    parser.add_argument("--top-k", type=int, default=int(os.getenv("MEMORY_TOP_K", "8")))
+    parser.add_argument("--token-budget", type=int, default=int(os.getenv("PROMPT_TOKEN_BUDGET", "3000")))
+    parser.add_argument("--recent-turns", type=int, default=int(os.getenv("CONVERSATION_RECENT_TURNS", "4")),
+                        help="turns sent verbatim; older ones are summarized")
+    parser.add_argument("--stream", action="store_true", help="stream replies so first-token latency is recorded")
+    parser.add_argument("--turn-budget", type=float, default=float(os.getenv("TURN_BUDGET_SECONDS", "45")),
+                        help="seconds per turn before it is given up (0 = no limit)")
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("a Sutra API key is required (--api-key or SUTRA_API_KEY)")
+
+    conversations = load_conversations(args.input)
+
+    memory = translator = None
+    if args.mem0_key:
+        memory = build_memory_client(args.mem0_key)
+    elif args.local_memory:
+        memory = build_local_memory(args.local_memory)
+    if memory is not None:
+        try:
+            translator = build_translator(os.getenv("TRANSLATION_CACHE_PATH") or None)
+        except ImportError:
+            print("googletrans not installed; memories are stored untranslated", file=sys.stderr)
+    memory_cache = MemoryContextCache()
+
+    # Agno runs on one agent are serialised, so each worker gets its own
+    local = threading.local()
+
+    def worker_engine():
+        if not hasattr(local, "engine"):
+            local.engine = ChatEngine(
+                args.api_key,
+                model_id=args.model,
+                agent=build_mentor_agent(args.api_key, args.model) if args.agent else None,
+                memory=memory,
+                translator=translator,
+                memory_cache=memory_cache,
+                memory_top_k=args.top_k,
+                token_budget=args.token_budget,
+                hedge_after=args.hedge_after,
+                turn_budget=args.turn_budget or None,
+                # same limits as the app (ADMISSION_LOCK_PATH shares them with it)
+                admission=admission
+            )
+        return local.engine
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    out_lock = threading.Lock()
+    totals = []
+    failures = [0]
+
+    def replay(conversation):
+        engine = worker_engine()
+        user_id = conversation["user_id"] or f"batch-{conversation['id']}"
+        lang = conversation["lang"] or args.lang
+        # earlier turns reach the model as a rolling summary + the latest ones
+        context = Conversation(recent_turns=args.recent_turns)
+        for turn, message in enumerate(conversation["turns"]):
+            result = engine.chat(user_id, message, lang, stream=TokenStream() if args.stream else None,
+                                 conversation=context)
+            record = {"conversation": conversation["id"], "turn": turn, "user_id": user_id,
+                      "lang": lang, "message": message}
+            record.update(result.to_dict())
+            with out_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                totals.append(result.timings["total_ms"])
+                if not result.ok:
+                    failures[0] += 1
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            for future in [pool.submit(replay, c) for c in conversations]:
+                future.result()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        conversation_summarizer.flush(timeout=60)
+        if memory is not None:
+            memory_writer.flush(timeout=60)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{len(conversations)} conversations, {len(totals)} turns, {failures[0]} failed in {elapsed:.1f}s "
+        f"({len(totals) / elapsed if elapsed else 0:.1f} turns/s) · turn ms p50 "
+        f"{statistics.median(totals) if totals else 0:.0f} · p95 {percentile(totals, 95):.0f} · "
+        f"p99 {percentile(totals, 99):.0f}",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_sutra_server import StubConfig, start_stub_server
+
+# --- ADMISSION CONTROL UNDER A TRAFFIC BURST ---
+# A burst of users hits a Sutra stub that only serves --quota requests at a
+# time and answers 429 beyond that, while one chatty user (a second tab or a
+# batch job) fires --chatty-turns turns at once. Modes:
+#   none   every turn calls Sutra straight away (the old behaviour); 429s
+#          are retried by the HTTP client with Retry-After backoff
+#   fifo   admission control, but one queue for everybody
+#   fair   admission control with the per-user round-robin queue
+# Reported per group: failed turns, p50/p95 turn latency, plus 429s seen by
+# the stub and the admission queue's depth and mean wait.
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+class SingleLane:
+    # Admission with every user in one FIFO lane, for comparison
+    def __init__(self, controller):
+        self.controller = controller
+
+    def admit(self, user_id, on_queued=None, lang=None, timeout=None, cancel=None):
+        return self.controller.admit("everyone", on_queued, lang, timeout=timeout, cancel=cancel)
+
+    def take_token(self, cancel=None):
+        return self.controller.take_token(cancel)
+
+    def stats(self):
+        return self.controller.stats()
+
+
+def run(mode, args, stub):
+    from admission import AdmissionController
+    from chat_engine import ChatEngine
+    from http_client import SutraHttpClient
+
+    controller = None
+    if mode != "none":
+        controller = AdmissionController(max_concurrent=args.quota, max_wait=120)
+    admission = SingleLane(controller) if mode == "fifo" else controller
+    engine = ChatEngine("bench-key", http=SutraHttpClient(pool_size=64), hedge_after=0, admission=admission)
+
+    throttled_before = stub.config.throttled
+    results = {"user": [], "chatty": []}
+    failed = {"user": 0, "chatty": 0}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(args.users + args.chatty_turns)
+
+    def turn(group, user_id, delay):
+        start_barrier.wait()
+        time.sleep(delay)
+        result = engine.chat(user_id, "hello, how are you?", "english")
+        with lock:
+            results[group].append(result.timings["total_ms"])
+            failed[group] += 0 if result.ok else 1
+
+    # The chatty user goes first, the burst of regular users right behind it
+    threads = [threading.Thread(target=turn, args=("chatty", "chatty", 0.0)) for _ in range(args.chatty_turns)]
+    threads += [threading.Thread(target=turn, args=("user", f"user-{n}", 0.05)) for n in range(args.users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    row = {"mode": mode, "throttled": stub.config.throttled - throttled_before}
+    for group in ("user", "chatty"):
+        row[f"{group}_failed"] = failed[group]
+        row[f"{group}_p50"] = statistics.median(results[group])
+        row[f"{group}_p95"] = percentile(results[group], 95)
+    stats = controller.stats() if controller else {"max_queue_depth": 0, "mean_wait_ms": 0.0}
+    row["max_depth"] = stats["max_queue_depth"]
+    row["mean_wait_ms"] = stats["mean_wait_ms"]
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traffic burst against a rate-limited Sutra: no admission vs. FIFO vs. fair")
+    parser.add_argument("--modes", default="none,fifo,fair")
+    parser.add_argument("--users", type=int, default=40, help="regular users, one turn each")
+    parser.add_argument("--chatty-turns", type=int, default=30, help="turns the chatty user fires at once")
+    parser.add_argument("--quota", type=int, default=8, help="requests the stub serves at a time")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    stub = start_stub_server(StubConfig(latency=args.llm_latency, max_concurrent=args.quota))
+    os.environ["SUTRA_BASE_URL"] = stub.url.rsplit("/chat/completions", 1)[0]
+
+    print(f"{'mode':>5} | {'429s':>5} | {'users failed':>12} | {'users p50':>9} | {'users p95':>9} | "
+          f"{'chatty failed':>13} | {'chatty p95':>10} | {'max queue':>9} | {'mean wait':>9}")
+    print("-" * 108)
+    for mode in args.modes.split(","):
+        row = run(mode, args, stub)
+        print(f"{mode:>5} | {row['throttled']:>5} | {row['user_failed']:>12} | {row['user_p50']:>9.0f} | "
+              f"{row['user_p95']:>9.0f} | {row['chatty_failed']:>13} | {row['chatty_p95']:>10.0f} | "
+              f"{row['max_depth']:>9} | {row['mean_wait_ms']:>9.0f}")
+    print("(milliseconds)")
+
+
+if __name__ == "__main__":
+    main()
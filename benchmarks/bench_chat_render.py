@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_render import HISTORY_PAGE_SIZE, FragmentCache, new_message, visible_messages
+
+# --- CHAT HISTORY RENDER BENCHMARK ---
+# Compares the original per-message inline-styled markup (every message, every
+# rerun) with cached class-based fragments limited to the visible window.
+# "payload" is the HTML handed to st.markdown on one rerun, which is what
+# travels over the websocket; "render" is the time to produce it.
+
+
+def legacy_user_html(content):
+    return f"""
+                    <div style="display: flex; align-items: flex-start; margin-bottom: 1rem;">
+                        <div style="width: 36px; height: 36px; background-color: #f87171; border-radius: 12px; display: flex; align-items: center; justify-content: center; margin-right: 10px;">
+                            <svg xmlns="http://www.w3.org/2000/svg" height="20" viewBox="0 0 24 24" width="20" fill="black">
+                                <path d="M12 12c2.21 0 4-1.79 4-4s-1.79-4-4-4-4 1.79-4 4 1.79 4 4 4zm0 2c-2.67 0-8 1.34-8 4v2h16v-2c0-2.66-5.33-4-8-4z"/>
+                            </svg>
+                        </div>
+                        <div style="background-color: #1f2937; color: white; padding: 12px 16px; border-radius: 12px; max-width: 80%;">
+                            {content}
+                        </div>
+                    </div>
+                    """
+
+
+def legacy_assistant_html(content):
+    return f'''
+                <div style="display: flex; align-items: flex-start; margin-bottom: 1rem;">
+                    <img src="https://framerusercontent.com/images/9vH8BcjXKRcC5OrSfkohhSyDgX0.png" width="36" height="36" style="margin-right: 10px; border-radius: 50%;" />
+                    <div style="background-color: #111827; color: white; padding: 12px 16px; border-radius: 12px; max-width: 80%;">
+                        {content}
+                    </div>
+                </div>
+                '''
+
+
+def make_history(count):
+    history = []
+    for i in range(count):
+        if i % 2 == 0:
+            history.append(new_message("user", f"Message {i}: how should I prepare for my exams this week?"))
+        else:
+            history.append(new_message("assistant", f"Reply {i}: Make a simple plan, take short breaks and sleep well. " * 3))
+    return history
+
+
+def legacy_rerun(history):
+    return [
+        legacy_user_html(m["content"]) if m["role"] == "user" else legacy_assistant_html(m["content"])
+        for m in history
+    ]
+
+
+def windowed_rerun(history, cache):
+    start, window = visible_messages(history, HISTORY_PAGE_SIZE)
+    return [cache.render(m, fallback_id=i) for i, m in enumerate(window, start)]
+
+
+def measure(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fragments = fn()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return sum(len(f.encode("utf-8")) for f in fragments), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure chat history payload and render time per rerun")
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'messages':>8} | {'legacy bytes':>12} | {'legacy ms':>9} | {'new bytes':>9} | {'new ms':>7}")
+    print("-" * 58)
+    for size in [int(s) for s in args.sizes.split(",")]:
+        history = make_history(size)
+        cache = FragmentCache()
+        legacy_bytes, legacy_ms = measure(lambda: legacy_rerun(history), args.repeat)
+        new_bytes, new_ms = measure(lambda: windowed_rerun(history, cache), args.repeat)
+        print(f"{size:>8} | {legacy_bytes:>12} | {legacy_ms:>9.3f} | {new_bytes:>9} | {new_ms:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeMemory, FakeSearch, FakeTranslator
+from stub_sutra_server import StubConfig, start_stub_server
+
+# --- PER-TURN COST OF A CHAT TURN, FULLY OFFLINE ---
+# Drives ChatEngine.chat (the code path behind every message in app.py) with
+# a real Agno agent and the pooled HTTP client, against local stand-ins:
+# stub_sutra_server.py for the Sutra endpoint (latency, token rate, one web
+# search tool call per agent turn) and fakes.py for Mem0, googletrans and
+# DuckDuckGo. Reports p50/p95/p99 turn latency, time to first token, memory
+# context size and allocations per scenario, as JSON for regression tracking:
+#
+#   python benchmarks/bench_chat_turn.py --output bench_chat_turn.json
+#
+# Requires agno and openai (the same versions the app uses).
+
+ENGLISH_MESSAGES = [
+    "What should I cook tonight?",
+    "Any tips for my cricket practice?",
+    "I have exams next week, how do I plan?",
+    "Suggest a good book about startups",
+    "How is the weather in Pune today?",
+]
+HINDI_MESSAGES = [
+    "आज रात खाने में क्या बनाऊं?",
+    "मेरे क्रिकेट अभ्यास के लिए कोई सुझाव?",
+    "अगले हफ्ते मेरी परीक्षा है, कैसे तैयारी करूं?",
+    "स्टार्टअप के बारे में कोई अच्छी किताब बताओ",
+    "आज पुणे में मौसम कैसा है?",
+]
+
+# name -> scenario settings
+SCENARIOS = {
+    "cold_start": {"memories": 50, "lang": "english", "cold": True},
+    "warm": {"memories": 50, "lang": "english"},
+    "memories_1k": {"memories": 1000, "lang": "english"},
+    "non_english": {"memories": 50, "lang": "hindi"},
+    "fallback": {"memories": 50, "lang": "english", "agent_fails": True},
+}
+
+
+def summarize(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pct(p):
+        return round(ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)], 1)
+
+    return {"p50": round(statistics.median(ordered), 1), "p95": pct(95), "p99": pct(99),
+            "mean": round(statistics.fmean(ordered), 1), "n": len(ordered)}
+
+
+class Harness:
+    def __init__(self, args, chat_stub, broken_stub):
+        # Imported here: SUTRA_BASE_URL has to point at the stub first
+        from chat_engine import ChatEngine, TokenStream, build_mentor_agent
+        from memory_cache import MemoryContextCache
+        from memory_writer import memory_writer
+        from translation import CachedTranslator
+
+        self.args = args
+        self.chat_stub = chat_stub
+        self.broken_stub = broken_stub
+        self.ChatEngine = ChatEngine
+        self.TokenStream = TokenStream
+        self.build_mentor_agent = build_mentor_agent
+        self.MemoryContextCache = MemoryContextCache
+        self.CachedTranslator = CachedTranslator
+        self.writer = memory_writer
+
+    def base_url(self, stub):
+        return stub.url.rsplit("/chat/completions", 1)[0]
+
+    def new_engine(self, settings, memory, translator, search, memory_cache=None):
+        stub = self.broken_stub if settings.get("agent_fails") else self.chat_stub
+        agent = self.build_mentor_agent(
+            "bench-key", tools=[search.duckduckgo_search], base_url=self.base_url(stub)
+        )
+        return self.ChatEngine(
+            "bench-key",
+            agent=agent,
+            memory=memory,
+            translator=translator,
+            memory_cache=memory_cache or self.MemoryContextCache(),
+            memory_top_k=self.args.top_k,
+            token_budget=self.args.token_budget,
+            hedge_after=self.args.hedge_after
+        )
+
+    def run(self, name, settings):
+        args = self.args
+        memory = FakeMemory(latency=args.memory_latency, write_latency=args.memory_write_latency)
+        raw_translator = FakeTranslator(latency=args.translate_latency)
+        translator = self.CachedTranslator(raw_translator)
+        search = FakeSearch(latency=args.search_latency)
+        user_id = f"bench-{name}"
+        memory.seed(user_id, settings["memories"])
+        messages = HINDI_MESSAGES if settings["lang"] == "hindi" else ENGLISH_MESSAGES
+        requests_before = self.chat_stub.config.requests
+
+        engine = None if settings.get("cold") else self.new_engine(settings, memory, translator, search)
+        if engine is not None:
+            # one untimed turn so the warm scenarios start with a filled cache
+            engine.chat(user_id, messages[0], settings["lang"])
+
+        turn_ms, first_token_ms, memory_tokens, memories_kept, paths, errors = [], [], [], [], {}, 0
+        for i in range(args.turns):
+            started = time.perf_counter()
+            turn_engine = engine
+            if turn_engine is None:
+                # cold start: a new session builds its agent and fetches memories from scratch
+                turn_engine = self.new_engine(settings, memory, translator, search)
+            message = f"{messages[i % len(messages)]} ({i})"
+            result = turn_engine.chat(user_id, message, settings["lang"], stream=self.TokenStream())
+            turn_ms.append((time.perf_counter() - started) * 1000)
+            if "first_token_ms" in result.timings:
+                first_token_ms.append(result.timings["first_token_ms"] + (turn_ms[-1] - result.timings["total_ms"]))
+            if result.prompt_usage:
+                memory_tokens.append(result.prompt_usage["memory"])
+                memories_kept.append(result.prompt_usage["memories_kept"])
+            paths[result.path] = paths.get(result.path, 0) + 1
+            errors += 0 if result.ok else 1
+
+        writes_flushed = self.writer.flush(timeout=60)
+        alloc = self.allocations(settings, memory, translator, search, user_id, messages, engine)
+
+        return {
+            "settings": settings,
+            "turns": args.turns,
+            "errors": errors,
+            "paths": paths,
+            "turn_ms": summarize(turn_ms),
+            "first_token_ms": summarize(first_token_ms),
+            "memory_context_tokens": summarize(memory_tokens),
+            "memories_in_prompt": summarize(memories_kept),
+            "allocations": alloc,
+            "backend_calls": {
+                "llm_requests": self.chat_stub.config.requests - requests_before,
+                "memory_search": memory.searches,
+                "memory_add": memory.adds,
+                "translate": raw_translator.calls,
+                "web_search": search.calls,
+            },
+            "memory_writes_flushed": writes_flushed,
+        }
+
+    def allocations(self, settings, memory, translator, search, user_id, messages, engine):
+        # Separate pass: tracemalloc slows everything down, so latency is not
+        # measured here. Covers every thread (hedging workers, memory writer).
+        peaks, retained = [], []
+        tracemalloc.start()
+        try:
+            for i in range(self.args.alloc_turns):
+                turn_engine = engine or self.new_engine(settings, memory, translator, search)
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                turn_engine.chat(user_id, f"{messages[i % len(messages)]} (alloc {i})", settings["lang"],
+                                 stream=self.TokenStream())
+                self.writer.flush(timeout=60)
+                current, peak = tracemalloc.get_traced_memory()
+                peaks.append((peak - before) / 1024)
+                retained.append((current - before) / 1024)
+        finally:
+            tracemalloc.stop()
+        if not peaks:
+            return None
+        return {"peak_kb": summarize(peaks), "retained_kb": summarize(retained)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline per-turn benchmark of the chat engine against local stand-ins")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--alloc-turns", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds before the stub starts answering")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between streamed tokens")
+    parser.add_argument("--memory-latency", type=float, default=0.15)
+    parser.add_argument("--memory-write-latency", type=float, default=0.2)
+    parser.add_argument("--translate-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--hedge-after", type=float, default=6.0)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--token-budget", type=int, default=3000)
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    chat_stub = start_stub_server(StubConfig(
+        latency=args.llm_latency, token_delay=args.token_delay, tool_calls=True
+    ))
+    broken_stub = start_stub_server(StubConfig(failure_rate=1.0, failure_status=503))
+    os.environ["SUTRA_BASE_URL"] = chat_stub.url.rsplit("/chat/completions", 1)[0]
+    harness = Harness(args, chat_stub, broken_stub)
+    # The fallback scenario fails every agent call on purpose. Agno resets
+    # its log level on each run, so the logger is disabled instead.
+    logging.getLogger("agno").disabled = True
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+        },
+        "scenarios": {},
+    }
+    print(f"{'scenario':>12} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7} | {'TTFT p50':>8} | "
+          f"{'mem tok':>7} | {'peak KB':>7} | paths", file=sys.stderr)
+    for name in args.scenarios.split(","):
+        result = harness.run(name, SCENARIOS[name])
+        report["scenarios"][name] = result
+        ttft = result["first_token_ms"] or {}
+        mem = result["memory_context_tokens"] or {}
+        alloc = (result["allocations"] or {}).get("peak_kb") or {}
+        print(f"{name:>12} | {result['turn_ms']['p50']:>7.0f} | {result['turn_ms']['p95']:>7.0f} | "
+              f"{result['turn_ms']['p99']:>7.0f} | {ttft.get('p50', 0):>8.0f} | {mem.get('mean', 0):>7.0f} | "
+              f"{alloc.get('p50', 0):>7.0f} | {result['paths']}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
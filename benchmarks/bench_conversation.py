@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import TOPICS
+from stub_sutra_server import StubConfig, start_stub_server
+
+# --- CONVERSATION CONTEXT: TOKENS SENT PER TURN OVER A LONG CHAT ---
+# One synthetic 200-turn conversation through ChatEngine (direct API path,
+# local stub), counting the estimated tokens of every request body:
+#   none     the old behaviour, only [system, user]: flat but no context
+#   full     every earlier turn appended verbatim: grows with the chat
+#   rolling  conversation.Conversation: rolling summary + latest turns
+# Summary updates run in the background and are counted separately.
+
+REPLY = (
+    "That sounds like a lot to handle, and it's great that you're thinking it through. "
+    "Let's take it one step at a time: start with what feels most urgent, and tell me how it goes."
+)
+
+
+class CountingHTTP:
+    # requests-style .post() that tallies estimated prompt tokens per call
+    def __init__(self, http):
+        from prompt_builder import estimate_tokens
+        self.http = http
+        self.estimate_tokens = estimate_tokens
+        self.chat_tokens = []
+        self.summary_tokens = []
+        self._lock = threading.Lock()
+
+    def post(self, url, json=None, **kwargs):
+        tokens = sum(self.estimate_tokens(m["content"]) + 4 for m in json["messages"])
+        with self._lock:
+            if threading.current_thread().name == "conversation-summarizer":
+                self.summary_tokens.append(tokens)
+            else:
+                self.chat_tokens.append(tokens)
+        return self.http.post(url, json=json, **kwargs)
+
+
+def messages(turns, seed):
+    rng = random.Random(seed)
+    for i in range(turns):
+        topic = rng.choice(TOPICS)
+        yield rng.choice([
+            f"I've been thinking about {topic} a lot lately, what do you suggest?",
+            f"Remember the {topic} thing? It got better after what you said.",
+            f"Can you help me plan something around {topic} this weekend?",
+            f"Why do you think {topic} matters so much to me?",
+        ])
+
+
+def run(mode, args):
+    from chat_engine import ChatEngine
+    from conversation import Conversation, conversation_summarizer
+    from http_client import sutra_http
+
+    http = CountingHTTP(sutra_http)
+    if mode == "full":
+        engine = ChatEngine("bench-key", http=http, hedge_after=0, history_tokens=10 ** 9,
+                            token_budget=10 ** 9)
+        conversation = Conversation(recent_turns=10 ** 9)
+    else:
+        engine = ChatEngine("bench-key", http=http, hedge_after=0, history_tokens=args.history_tokens,
+                            token_budget=args.token_budget)
+        conversation = Conversation(recent_turns=args.recent_turns, fold_every=args.fold_every)
+    if mode == "none":
+        conversation = None
+
+    turn_ms = []
+    for message in messages(args.turns, args.seed):
+        result = engine.chat("bench-user", message, "english", conversation=conversation)
+        turn_ms.append(result.timings["total_ms"])
+    conversation_summarizer.flush(timeout=60)
+
+    tokens = http.chat_tokens
+    return {
+        "mode": mode,
+        "tokens_at": {n: tokens[n - 1] for n in args.report_at if n <= len(tokens)},
+        "tokens_mean": round(statistics.fmean(tokens), 1),
+        "tokens_max": max(tokens),
+        "tokens_total": sum(tokens),
+        "summary_calls": len(http.summary_tokens),
+        "summary_tokens_total": sum(http.summary_tokens),
+        "turn_ms_p50": round(statistics.median(turn_ms), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens sent per turn: no history vs. full history vs. rolling summary")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--recent-turns", type=int, default=4)
+    parser.add_argument("--fold-every", type=int, default=4)
+    parser.add_argument("--history-tokens", type=int, default=800)
+    parser.add_argument("--token-budget", type=int, default=3000)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    args.report_at = [1, 5, 10, 50, 100, 200]
+
+    stub = start_stub_server(StubConfig(latency=args.llm_latency, reply=REPLY))
+    os.environ["SUTRA_BASE_URL"] = stub.url.rsplit("/chat/completions", 1)[0]
+
+    rows = [run(mode, args) for mode in ("none", "full", "rolling")]
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+        return
+
+    marks = [n for n in args.report_at if n <= args.turns]
+    print(f"{'mode':>8} | " + " | ".join(f"{'turn ' + str(n):>8}" for n in marks)
+          + f" | {'mean':>7} | {'max':>6} | {'total':>8} | {'summary calls':>13} | {'summary tok':>11}")
+    print("-" * (64 + 11 * len(marks)))
+    for row in rows:
+        print(f"{row['mode']:>8} | " + " | ".join(f"{row['tokens_at'].get(n, 0):>8}" for n in marks)
+              + f" | {row['tokens_mean']:>7.0f} | {row['tokens_max']:>6} | {row['tokens_total']:>8} | "
+                f"{row['summary_calls']:>13} | {row['summary_tokens_total']:>11}")
+    print("(estimated prompt tokens per chat request)")
+
+
+if __name__ == "__main__":
+    main()
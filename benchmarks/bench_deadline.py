@@ -0,0 +1,177 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeMemory
+from stub_sutra_server import StubConfig, start_stub_server
+
+# --- PER-TURN DEADLINES: TAIL LATENCY AND CANCELLATION ---
+# 1. A burst of turns (one new user each, so every turn fetches memories)
+#    where some memory lookups and some Sutra calls stall:
+#      none    no turn budget and no memory timeout, the old behaviour: a
+#              stalled stage holds the turn for as long as it takes
+#      budget  ChatEngine(turn_budget=--budget): memory lookups slower than
+#              --memory-timeout are skipped, stalled model calls end the turn
+#              at the deadline
+#    Reported: p50 / p95 / max turn time, turns answered, answered without
+#    memory context, turns given up at the deadline.
+# 2. Streaming turns cancelled mid-reply (the chat's Stop button): how long
+#    chat() takes to return after cancel(), and how many stub responses are
+#    still being streamed half a second later (connections not released).
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+class StallingMemory(FakeMemory):
+    def __init__(self, stall_rate, stall, seed):
+        super().__init__(latency=0.05)
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.random = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def search(self, query, user_id=None, **kwargs):
+        with self._rng_lock:
+            stalled = self.random.random() < self.stall_rate
+        if stalled:
+            time.sleep(self.stall)
+        return super().search(query, user_id=user_id, **kwargs)
+
+
+class StallingHTTP:
+    # requests-style .post() where some calls hang before reaching Sutra
+    def __init__(self, http, stall_rate, stall, seed):
+        self.http = http
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def post(self, url, **kwargs):
+        with self._lock:
+            stalled = self.random.random() < self.stall_rate
+        if stalled:
+            time.sleep(self.stall)
+        return self.http.post(url, **kwargs)
+
+
+def run_stalls(mode, args):
+    from chat_engine import ChatEngine
+    from http_client import SutraHttpClient
+    from memory_writer import MemoryWriter
+
+    memory = StallingMemory(args.memory_stall_rate, args.memory_stall, args.seed)
+    http = StallingHTTP(SutraHttpClient(pool_size=64), args.model_stall_rate, args.model_stall, args.seed + 1)
+    engine = ChatEngine(
+        "bench-key", http=http, memory=memory, writer=MemoryWriter(), hedge_after=0,
+        turn_budget=args.budget if mode == "budget" else None,
+        memory_timeout=args.memory_timeout if mode == "budget" else None
+    )
+
+    turn_ms, results = [], []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(args.turns)
+
+    def turn(n):
+        start_barrier.wait()
+        result = engine.chat(f"user-{n}", "how should I plan my week?", "english")
+        with lock:
+            turn_ms.append(result.timings["total_ms"])
+            results.append(result)
+
+    threads = [threading.Thread(target=turn, args=(n,)) for n in range(args.turns)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return {
+        "mode": mode,
+        "p50": statistics.median(turn_ms),
+        "p95": percentile(turn_ms, 95),
+        "max": max(turn_ms),
+        "answered": sum(1 for r in results if r.ok),
+        "no_memory": sum(1 for r in results if r.ok and "memory" in r.skipped),
+        "timed_out": sum(1 for r in results if r.path == "timeout"),
+    }
+
+
+def run_cancel(args, stub):
+    from chat_engine import ChatEngine, TokenStream
+    from deadline import Deadline
+    from http_client import SutraHttpClient
+
+    engine = ChatEngine("bench-key", http=SutraHttpClient(pool_size=64), hedge_after=0, turn_budget=60)
+    stop_ms, partial = [], []
+    lock = threading.Lock()
+
+    def turn():
+        deadline = Deadline(60)
+        stream = TokenStream()
+        threading.Timer(args.cancel_after, deadline.cancel).start()
+        result = engine.chat("cancel-user", "tell me a long story", "english", stream=stream, deadline=deadline)
+        with lock:
+            stop_ms.append((deadline.elapsed() - args.cancel_after) * 1000)
+            partial.append(result.path == "cancelled")
+
+    threads = [threading.Thread(target=turn) for _ in range(args.cancel_turns)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    time.sleep(0.5)
+    return {
+        "stop_p50": statistics.median(stop_ms),
+        "stop_max": max(stop_ms),
+        "cancelled": sum(partial),
+        "still_streaming": stub.config.in_progress,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn latency with stalled stages, with and without a turn budget")
+    parser.add_argument("--modes", default="none,budget")
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--budget", type=float, default=12.0, help="turn budget in seconds for the budget mode")
+    parser.add_argument("--memory-timeout", type=float, default=5.0)
+    parser.add_argument("--memory-stall-rate", type=float, default=0.2)
+    parser.add_argument("--memory-stall", type=float, default=10.0)
+    parser.add_argument("--model-stall-rate", type=float, default=0.1)
+    parser.add_argument("--model-stall", type=float, default=30.0)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--cancel-turns", type=int, default=10)
+    parser.add_argument("--cancel-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # 0.1 s between tokens, so a full streamed reply takes several seconds
+    stub = start_stub_server(StubConfig(latency=args.llm_latency, token_delay=0.1))
+    os.environ["SUTRA_BASE_URL"] = stub.url.rsplit("/chat/completions", 1)[0]
+
+    print(f"{'mode':>6} | {'p50':>6} | {'p95':>6} | {'max':>6} | {'answered':>8} | {'no memory':>9} | {'timed out':>9}")
+    print("-" * 66)
+    for mode in args.modes.split(","):
+        row = run_stalls(mode, args)
+        print(f"{mode:>6} | {row['p50']:>6.0f} | {row['p95']:>6.0f} | {row['max']:>6.0f} | {row['answered']:>8} | "
+              f"{row['no_memory']:>9} | {row['timed_out']:>9}")
+    print(f"(milliseconds; {args.turns} concurrent turns, {args.memory_stall_rate:.0%} memory lookups stall "
+          f"{args.memory_stall:g} s, {args.model_stall_rate:.0%} Sutra calls stall {args.model_stall:g} s)")
+
+    row = run_cancel(args, stub)
+    print()
+    print(f"cancel -> chat() returns: p50 {row['stop_p50']:.0f} ms · max {row['stop_max']:.0f} ms · "
+          f"cancelled {row['cancelled']}/{args.cancel_turns} · stub responses still streaming: {row['still_streaming']}")
+
+
+if __name__ == "__main__":
+    main()
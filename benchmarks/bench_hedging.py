@@ -0,0 +1,110 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- HEDGING: WHEN THE SECOND REQUEST GOES OUT ---
+# run_hedged() with synthetic agent / fallback paths, one scenario each:
+#   streaming    the agent streams a token every --token-every seconds from
+#                the start, so it is answering before hedge_after: no hedge
+#   silent       the agent says nothing for --slow seconds: hedged, the
+#                fallback wins
+#   fails        the agent fails right away: fallback without waiting
+#   stream-fail  the agent streams, then fails mid-reply: fallback takes over
+# Reported per scenario: winner, whether the fallback request was sent, the
+# hedged flag and the turn time. Exits non-zero when a scenario sends (or
+# skips) the fallback request against expectations, e.g. a hedge fired while
+# the agent was already streaming, which costs a Sutra request and an
+# admission token for nothing.
+
+
+def streaming_agent(args, fail_after=None):
+    def run(emit, cancel):
+        started = time.monotonic()
+        parts = []
+        while time.monotonic() - started < args.slow:
+            if cancel.is_set():
+                break
+            if fail_after is not None and time.monotonic() - started >= fail_after:
+                raise RuntimeError("agent failed mid-reply")
+            parts.append("tok ")
+            emit("tok ")
+            time.sleep(args.token_every)
+        return "".join(parts)
+    return run
+
+
+def silent_agent(args):
+    def run(emit, cancel):
+        cancel.wait(args.slow)
+        return "agent reply"
+    return run
+
+
+def failing_agent(args):
+    def run(emit, cancel):
+        time.sleep(0.05)
+        raise RuntimeError("agent failed")
+    return run
+
+
+def run_scenario(name, agent, args):
+    from hedging import run_hedged
+
+    fallback_sent = threading.Event()
+
+    def fallback(emit, cancel):
+        fallback_sent.set()
+        time.sleep(args.fallback_latency)
+        if emit is not None:
+            emit("fallback reply")
+        return "fallback reply"
+
+    started = time.monotonic()
+    result = run_hedged(("agent", agent), ("fallback", fallback), args.hedge_after,
+                        on_token=lambda text: None, on_reset=lambda: None)
+    return {
+        "scenario": name,
+        "winner": result.winner,
+        "fallback_sent": fallback_sent.is_set(),
+        "hedged": result.hedged,
+        "ms": (time.monotonic() - started) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="When run_hedged sends the fallback request, per agent behaviour")
+    parser.add_argument("--hedge-after", type=float, default=0.5)
+    parser.add_argument("--token-every", type=float, default=0.1)
+    parser.add_argument("--slow", type=float, default=1.5, help="seconds the agent takes to finish")
+    parser.add_argument("--fallback-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # scenario -> (agent path, expected winner, fallback request expected)
+    scenarios = {
+        "streaming": (streaming_agent(args), "agent", False),
+        "silent": (silent_agent(args), "fallback", True),
+        "fails": (failing_agent(args), "fallback", True),
+        "stream-fail": (streaming_agent(args, fail_after=args.hedge_after * 1.5), "fallback", True),
+    }
+
+    print(f"{'scenario':>11} | {'winner':>8} | {'fallback sent':>13} | {'hedged':>6} | {'ms':>6}")
+    print("-" * 56)
+    unexpected = []
+    for name, (agent, winner, fallback_expected) in scenarios.items():
+        row = run_scenario(name, agent, args)
+        print(f"{name:>11} | {row['winner']:>8} | {str(row['fallback_sent']):>13} | {str(row['hedged']):>6} | "
+              f"{row['ms']:>6.0f}")
+        if row["winner"] != winner or row["fallback_sent"] != fallback_expected:
+            unexpected.append(name)
+
+    if unexpected:
+        print(f"Unexpected hedging behaviour in: {', '.join(unexpected)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
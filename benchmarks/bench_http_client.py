@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_client import CircuitBreaker, SutraHttpClient
+from stub_sutra_server import StubConfig, start_stub_server
+
+# --- POOLED CLIENT VS PER-REQUEST requests.post ---
+# Runs against the local stub: connections opened per N turns, mean latency,
+# and how retries / the circuit breaker behave under injected failures.
+
+PAYLOAD = {"model": "sutra-v2", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 500}
+
+
+def run_plain(url, turns):
+    start = time.perf_counter()
+    for _ in range(turns):
+        requests.post(url, json=PAYLOAD, timeout=30)
+    return (time.perf_counter() - start) / turns * 1000
+
+
+def run_pooled(client, url, turns):
+    start = time.perf_counter()
+    statuses = []
+    for _ in range(turns):
+        try:
+            statuses.append(client.post(url, json=PAYLOAD, timeout=30).status_code)
+        except requests.exceptions.RequestException as e:
+            statuses.append(type(e).__name__)
+    return (time.perf_counter() - start) / turns * 1000, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pooled Sutra HTTP client against a local stub")
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    server = start_stub_server(StubConfig())
+    run_plain(server.url, args.turns)
+    plain_connections = server.config.connections
+    plain_ms = run_plain(server.url, args.turns)
+    server.config.connections = 0
+    pooled_ms, _ = run_pooled(SutraHttpClient(), server.url, args.turns)
+    print(f"requests.post : {plain_ms:.2f} ms/turn, {plain_connections} connections for {args.turns} turns")
+    print(f"pooled client : {pooled_ms:.2f} ms/turn, {server.config.connections} connections for {args.turns} turns")
+
+    # 30% of calls fail with 503: retries should hide almost all of them
+    flaky = start_stub_server(StubConfig(failure_rate=0.3, seed=1))
+    client = SutraHttpClient(backoff_base=0.01, backoff_max=0.05)
+    _, statuses = run_pooled(client, flaky.url, 50)
+    ok = statuses.count(200)
+    print(f"30% failures  : {ok}/50 turns succeeded, {client.stats()['retries']} retries")
+
+    # Endpoint hard down: the breaker should open and fail fast
+    down = start_stub_server(StubConfig(failure_rate=1.0))
+    client = SutraHttpClient(backoff_base=0.01, backoff_max=0.05,
+                             breaker=CircuitBreaker(failure_threshold=5, reset_timeout=60))
+    _, statuses = run_pooled(client, down.url, 20)
+    stats = client.stats()
+    print(f"endpoint down : {down.config.requests} requests reached the server for 20 turns, "
+          f"breaker {stats['breaker']} after {stats['breaker_trips']} trip(s), {stats['rejected']} rejected")
+
+
+if __name__ == "__main__":
+    main()
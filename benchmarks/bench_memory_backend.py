@@ -0,0 +1,134 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import TOPICS, FakeMemory
+
+# --- MEMORY BACKENDS: LOCAL SQLITE VS MEM0 AT 10K+ MEMORIES PER USER ---
+# Read and write latency of the calls ChatEngine makes, per backend:
+#   add           one turn saved (what the memory writer does)
+#   search("*")   the user's memories for the 30-day window (cache refresh)
+#   search(query) ranked matches for a message
+#   context       a cold MemoryContextCache refresh + top-k for a message
+#   window        fetch everything, parse timestamps and filter in Python
+#                 (the old path) vs the indexed range query
+#
+# Mem0 is a remote service, so without --mem0-key it is stood in for by
+# fakes.FakeMemory with --mem0-latency per call; with a key the real client
+# is measured against an existing --mem0-user namespace (nothing is seeded).
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def timed(fn, repeat):
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"p50": statistics.median(samples), "p95": percentile(samples, 95)}
+
+
+def seed_local(memory, user_id, count, days, rng):
+    # Bulk insert with spread-out timestamps (add() stamps "now")
+    now = time.time()
+    rows = [
+        (uuid.uuid4().hex, user_id,
+         f"User said: I {rng.choice(['like', 'talked about', 'worry about', 'practise'])} "
+         f"{rng.choice(TOPICS)} and {rng.choice(TOPICS)} (note {i})",
+         now - rng.random() * days * 86400)
+        for i in range(count)
+    ]
+    with memory._connect() as conn:
+        conn.executemany("INSERT INTO memories (id, user_id, memory, created_at) VALUES (?, ?, ?, ?)", rows)
+
+
+def measure(name, memory, user_id, args):
+    from memory_cache import MemoryContextCache, memory_results, parse_memory_time
+
+    rng = random.Random(args.seed)
+    queries = [f"what about {rng.choice(TOPICS)} and {rng.choice(TOPICS)}" for _ in range(args.repeat)]
+    row = {"backend": name}
+    row["search_all"] = timed(lambda i: memory.search("*", user_id=user_id), args.repeat)
+    row["search_query"] = timed(lambda i: memory.search(queries[i], user_id=user_id, limit=args.top_k), args.repeat)
+    row["window_returned"] = len(memory_results(memory.search("*", user_id=user_id)))
+
+    def cold_context(i):
+        MemoryContextCache().get_relevant_context(memory, user_id, queries[i], args.top_k)
+    row["context"] = timed(cold_context, max(args.repeat // 10, 3))
+
+    def python_window(i):
+        # every memory, parsed and filtered on our side
+        cutoff = time.time() - 30 * 86400
+        items = memory_results(memory.get_all(user_id=user_id))
+        [m for m in items if parse_memory_time(m["created_at"]).timestamp() > cutoff]
+    row["window_python"] = timed(python_window, max(args.repeat // 10, 3))
+
+    if not args.no_writes:
+        row["add"] = timed(
+            lambda i: memory.add(messages=[{"role": "user", "content": f"bench turn {i} about {rng.choice(TOPICS)}"},
+                                           {"role": "assistant", "content": "ok"}], user_id=f"{user_id}-writes"),
+            args.repeat,
+        )
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SQLite memory vs. Mem0: read/write latency at 10k+ memories")
+    parser.add_argument("--memories", type=int, default=10000, help="memories in the measured user's namespace")
+    parser.add_argument("--users", type=int, default=20, help="other users sharing the database, same size each")
+    parser.add_argument("--days", type=int, default=60, help="memories are spread over this many days")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--mem0-latency", type=float, default=0.3, help="per-call latency of the simulated Mem0")
+    parser.add_argument("--mem0-key", default=None, help="measure the real Mem0 client instead of the simulation")
+    parser.add_argument("--mem0-user", default="bench-memory", help="existing Mem0 namespace to read")
+    parser.add_argument("--no-writes", action="store_true", help="skip add() (e.g. against a real Mem0 account)")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    from local_memory import LocalMemory
+
+    rng = random.Random(args.seed)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        local = LocalMemory(os.path.join(tmp, "memory.db"))
+        started = time.perf_counter()
+        for n in range(args.users + 1):
+            seed_local(local, f"user-{n}", args.memories, args.days, rng)
+        print(f"seeded {(args.users + 1) * args.memories} local memories in {time.perf_counter() - started:.1f} s",
+              file=sys.stderr)
+        rows.append(measure("sqlite", local, "user-0", args))
+
+    if args.mem0_key:
+        from chat_engine import build_memory_client
+        rows.append(measure("mem0", build_memory_client(args.mem0_key), args.mem0_user, args))
+    else:
+        fake = FakeMemory(latency=args.mem0_latency, write_latency=args.mem0_latency)
+        fake.seed("user-0", args.memories, days=args.days)
+        rows.append(measure(f"mem0 (sim {args.mem0_latency * 1000:.0f} ms)", fake, "user-0", args))
+
+    print(f"{'backend':>18} | {'add p50':>8} | {'all p50':>8} | {'query p50':>9} | {'query p95':>9} | "
+          f"{'context':>8} | {'py window':>9} | {'in window':>9}")
+    print("-" * 100)
+    for row in rows:
+        add = f"{row['add']['p50']:>8.2f}" if "add" in row else f"{'-':>8}"
+        print(f"{row['backend']:>18} | {add} | {row['search_all']['p50']:>8.2f} | "
+              f"{row['search_query']['p50']:>9.2f} | {row['search_query']['p95']:>9.2f} | "
+              f"{row['context']['p50']:>8.1f} | {row['window_python']['p50']:>9.1f} | {row['window_returned']:>9}")
+    print("(milliseconds; 'py window' = get_all + parse + filter in Python)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import TOPICS, FakeMemory
+from stub_sutra_server import StubConfig, start_stub_server
+
+# --- MEMORY CONTEXT PREFETCH: TIME A TURN SPENDS WAITING FOR MEMORIES ---
+# Sessions open, the user "types" for --think seconds, sends a message, and
+# repeats. Mem0 answers after --memory-latency and the context cache TTL is
+# short (--ttl), so without help the first turn and every turn after the TTL
+# ran out fetch memories on the critical path. Modes:
+#   off  the old behaviour: memories are fetched when a message is sent
+#   on   engine.prefetch() at session start, refresh-ahead, a reload after
+#        each memory write, and the app's keep-warm timer (--keep-warm)
+# Reported: memory stage time per turn (first turn and the rest), and how
+# many fetches happened inside a turn vs. in the background.
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def run(mode, args):
+    from chat_engine import ChatEngine
+    from memory_cache import MemoryContextCache
+    from memory_writer import MemoryWriter
+
+    memory = FakeMemory(latency=args.memory_latency, write_latency=args.memory_write_latency)
+    for n in range(args.users):
+        memory.seed(f"user-{n}", args.memories)
+    cache = MemoryContextCache(ttl=args.ttl)
+    if mode == "off":
+        cache.prefetch = lambda *a, **k: None
+    writer = MemoryWriter()
+    engine = ChatEngine("bench-key", memory=memory, memory_cache=cache, writer=writer, hedge_after=0)
+
+    first_ms, rest_ms = [], []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(args.users)
+
+    def session(n):
+        user_id = f"user-{n}"
+        start_barrier.wait()
+        stop = threading.Event()
+        if mode == "on":
+            engine.prefetch(user_id)
+            if args.keep_warm:
+                def keep_warm():
+                    while not stop.wait(args.keep_warm):
+                        engine.prefetch(user_id)
+                threading.Thread(target=keep_warm, daemon=True).start()
+        for turn in range(args.turns):
+            time.sleep(args.think)
+            result = engine.chat(user_id, f"any plans around {TOPICS[(n + turn) % len(TOPICS)]}?", "english")
+            with lock:
+                (first_ms if turn == 0 else rest_ms).append(result.timings["memory_ms"])
+        stop.set()
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(args.users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.flush(timeout=30)
+
+    stats = cache.stats()
+    return {
+        "mode": mode,
+        "first_p50": statistics.median(first_ms),
+        "first_max": max(first_ms),
+        "rest_p50": statistics.median(rest_ms),
+        "rest_p95": percentile(rest_ms, 95),
+        "in_turn": stats["refreshes"],
+        "background": stats["prefetches"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory context fetched on send vs. prefetched in the background")
+    parser.add_argument("--modes", default="off,on")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--think", type=float, default=1.5, help="seconds the user types before each message")
+    parser.add_argument("--ttl", type=float, default=4.0, help="memory context cache TTL")
+    parser.add_argument("--keep-warm", type=float, default=1.0, help="keep-warm timer in seconds (0 = off)")
+    parser.add_argument("--memories", type=int, default=200)
+    parser.add_argument("--memory-latency", type=float, default=0.4)
+    parser.add_argument("--memory-write-latency", type=float, default=0.2)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    stub = start_stub_server(StubConfig(latency=args.llm_latency))
+    os.environ["SUTRA_BASE_URL"] = stub.url.rsplit("/chat/completions", 1)[0]
+
+    print(f"{'mode':>4} | {'first p50':>9} | {'first max':>9} | {'later p50':>9} | {'later p95':>9} | "
+          f"{'fetched in turn':>15} | {'prefetched':>10}")
+    print("-" * 86)
+    for mode in args.modes.split(","):
+        row = run(mode, args)
+        print(f"{mode:>4} | {row['first_p50']:>9.1f} | {row['first_max']:>9.1f} | {row['rest_p50']:>9.1f} | "
+              f"{row['rest_p95']:>9.1f} | {row['in_turn']:>15} | {row['background']:>10}")
+    print(f"(memory stage, milliseconds; {args.users} sessions x {args.turns} turns, Mem0 latency "
+          f"{args.memory_latency:g} s, TTL {args.ttl:g} s, {args.think:g} s typing between messages)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_cache import MemoryContextCache
+
+# --- TOP-K RETRIEVAL VS DUMP-EVERYTHING BENCHMARK ---
+# Builds a synthetic Mem0-shaped store per size, then compares the full dump
+# with top-k retrieval: prompt tokens, context build time (cache warm) and an
+# end-to-end estimate = build time + model prefill time for the prompt.
+# Prefill cost is a modelling assumption (--prefill-ms-per-1k), not a live call.
+
+TOPICS = [
+    "cricket", "exam preparation", "job interview", "cooking biryani", "trekking near Pune",
+    "learning guitar", "startup idea", "family wedding", "sleep schedule", "python programming",
+    "monsoon travel", "yoga routine", "movie recommendations", "saving money", "learning Marathi",
+]
+TEMPLATES = [
+    "User is worried about {t} next week",
+    "User enjoys talking about {t}",
+    "User asked for advice on {t}",
+    "User mentioned a friend who likes {t}",
+    "User wants to improve at {t}",
+]
+
+
+class FakeMemory:
+    def __init__(self, count, seed=7):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        self.items = [
+            {
+                "id": f"m{i}",
+                "memory": rng.choice(TEMPLATES).format(t=rng.choice(TOPICS)) + f" (note {i})",
+                "created_at": (now - timedelta(minutes=count - i)).isoformat(),
+            }
+            for i in range(count)
+        ]
+
+    def search(self, query, user_id):
+        return self.items
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text
+    return len(text) // 4
+
+
+def measure(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare top-k memory retrieval with the full memory dump")
+    parser.add_argument("--sizes", default="10,100,1000,5000")
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=60.0)
+    args = parser.parse_args()
+
+    query = "I have a job interview tomorrow and I am nervous"
+    print(f"{'memories':>9} | {'mode':>8} | {'tokens':>7} | {'build ms':>9} | {'e2e ms (est)':>12}")
+    print("-" * 58)
+    for size in [int(s) for s in args.sizes.split(",")]:
+        memory = FakeMemory(size)
+        cache = MemoryContextCache(ttl=3600)
+        cache.get_context(memory, "bench")
+
+        entry = cache._entry(memory, "bench")
+
+        def dump_all():
+            # Drop the joined string so "all" pays its real per-turn cost
+            entry.context = None
+            return cache.get_context(memory, "bench")
+
+        for mode, fn in (
+            ("all", dump_all),
+            (f"top-{args.k}", lambda: cache.get_relevant_context(memory, "bench", query, args.k)),
+        ):
+            context, build_ms = measure(fn, args.repeat)
+            tokens = estimate_tokens(context)
+            e2e = build_ms + tokens / 1000 * args.prefill_ms_per_1k
+            print(f"{size:>9} | {mode:>8} | {tokens:>7} | {build_ms:>9.3f} | {e2e:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
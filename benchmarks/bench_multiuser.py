@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeMemory
+from stub_sutra_server import StubConfig, start_stub_server
+
+# --- CONCURRENT USERS: PER-USER IDS VS ONE SHARED ID ---
+# N simulated users chat at the same time through one ChatEngine, the way
+# every Streamlit session shares one process. "shared" is the old behaviour
+# (everyone under USER_ID = "simple_session_2"); "per-user" gives each user
+# their own Mem0 namespace. With per-user ids, turn latency, memories in the
+# user's namespace and memories fetched per refresh should stay flat as N
+# grows; with a shared id they grow with total traffic.
+#
+# Runs offline against stub_sutra_server.py and fakes.FakeMemory.
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def run(mode, users, args):
+    from chat_engine import ChatEngine
+    from memory_cache import MemoryContextCache
+    from memory_writer import memory_writer
+
+    memory = FakeMemory(latency=args.memory_latency, write_latency=args.memory_write_latency)
+    cache = MemoryContextCache(ttl=args.ttl)
+    engine = ChatEngine("bench-key", memory=memory, memory_cache=cache, memory_top_k=args.top_k)
+
+    user_ids = [f"user-{i}" if mode == "per-user" else "simple_session_2" for i in range(users)]
+    for user_id in set(user_ids):
+        # the shared namespace holds everyone's history
+        memory.seed(user_id, args.memories * (users if mode == "shared" else 1))
+
+    turn_ms, memory_tokens = [], []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(users)
+
+    def user(user_id, n):
+        start_barrier.wait()
+        for turn in range(args.turns):
+            result = engine.chat(user_id, f"user {n} asks about cricket and exams, turn {turn}", "english")
+            with lock:
+                turn_ms.append(result.timings["total_ms"])
+                if result.prompt_usage:
+                    memory_tokens.append(result.prompt_usage["memory"])
+
+    threads = [threading.Thread(target=user, args=(uid, n)) for n, uid in enumerate(user_ids)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    memory_writer.flush(timeout=120)
+
+    fetched_per_search = memory.returned / max(memory.searches, 1)
+    # memories in the first user's namespace at the end of the run
+    visible = len(memory.search("*", user_id=user_ids[0])["results"])
+    return {
+        "mode": mode,
+        "users": users,
+        "turns": len(turn_ms),
+        "turn_ms_p50": round(statistics.median(turn_ms), 1),
+        "turn_ms_p95": round(percentile(turn_ms, 95), 1),
+        "memory_tokens_mean": round(statistics.fmean(memory_tokens), 1) if memory_tokens else 0,
+        "memories_in_namespace": visible,
+        "memories_fetched_per_search": round(fetched_per_search, 1),
+        "turns_per_second": round(len(turn_ms) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test: context size and latency per user as concurrent users grow")
+    parser.add_argument("--users", default="1,10,50,100")
+    parser.add_argument("--modes", default="per-user,shared")
+    parser.add_argument("--turns", type=int, default=5, help="turns per user")
+    parser.add_argument("--memories", type=int, default=30, help="memories per user at the start")
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--ttl", type=float, default=2.0, help="memory context cache TTL, short so refreshes show up")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--memory-latency", type=float, default=0.05)
+    parser.add_argument("--memory-write-latency", type=float, default=0.02)
+    parser.add_argument("--json", action="store_true", help="print JSON lines instead of a table")
+    args = parser.parse_args()
+
+    stub = start_stub_server(StubConfig(latency=args.llm_latency))
+    os.environ["SUTRA_BASE_URL"] = stub.url.rsplit("/chat/completions", 1)[0]
+
+    if not args.json:
+        print(f"{'mode':>8} | {'users':>5} | {'p50 ms':>7} | {'p95 ms':>7} | {'mem tokens':>10} | "
+              f"{'namespace':>9} | {'fetched/search':>14} | {'turns/s':>7}")
+        print("-" * 90)
+    for mode in args.modes.split(","):
+        for users in [int(u) for u in args.users.split(",")]:
+            row = run(mode, users, args)
+            if args.json:
+                print(json.dumps(row))
+                continue
+            print(f"{mode:>8} | {users:>5} | {row['turn_ms_p50']:>7.0f} | {row['turn_ms_p95']:>7.0f} | "
+                  f"{row['memory_tokens_mean']:>10.0f} | {row['memories_in_namespace']:>9} | "
+                  f"{row['memories_fetched_per_search']:>14.0f} | {row['turns_per_second']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
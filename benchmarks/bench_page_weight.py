@@ -0,0 +1,91 @@
+import argparse
+import gzip
+import os
+import sys
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from static_assets import IMAGES, ROOT_DIR, STATIC_DIR, STYLESHEETS, load_manifest, stylesheet_html
+
+# --- BYTES PER PAGE LOAD, BEFORE VS AFTER THE STATIC ASSET PIPELINE ---
+# Before: the stylesheet went out inline with every full script run, and the
+# logo, header and avatar images came from framerusercontent.com at their
+# original sizes. After: a <link> tag per run, the gzipped stylesheet once,
+# and resized WebP images once; a repeat visit only revalidates (ETag, 304).
+#
+# The remote originals are fetched when reachable; otherwise the full-size
+# source files shipped in the repo stand in for them (marked with *).
+
+REMOTE_IMAGES = {
+    "sidebar_logo": "https://framerusercontent.com/images/3Ca34Pogzn9I3a7uTsNSlfs9Bdk.png",
+    "header_logo": "https://framerusercontent.com/images/9vH8BcjXKRcC5OrSfkohhSyDgX0.png",
+    "assistant_avatar": "https://framerusercontent.com/images/9vH8BcjXKRcC5OrSfkohhSyDgX0.png",
+}
+# Streamlit gzips app/static responses at this level
+GZIP_LEVEL = 5
+
+
+def remote_size(url, timeout):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return len(response.read())
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report bytes transferred per page load before vs after local static assets")
+    parser.add_argument("--runs", type=int, default=5, help="full script runs during the visit (first load + reruns)")
+    parser.add_argument("--offline", action="store_true", help="do not try to fetch the remote originals")
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+    css_source = os.path.join(ROOT_DIR, STYLESHEETS["style"])
+    with open(css_source, "rb") as f:
+        css = f.read()
+    css_gz = len(gzip.compress(css, GZIP_LEVEL))
+    # the old inline block: <style> wrapper plus the 4-space indent it had in app.py
+    inline_css = len(css) + len(b"<style>\n</style>\n") + 4 * css.count(b"\n")
+    link_tag = len(stylesheet_html().encode())
+
+    fetched = {}
+    counted = set()
+    print(f"{'asset':>18} | {'before':>10} | {'after':>10}")
+    print("-" * 46)
+    before_images = after_images = 0
+    for name, (source, size, _) in IMAGES.items():
+        url = REMOTE_IMAGES[name]
+        if not args.offline and url not in fetched:
+            fetched[url] = remote_size(url, args.timeout)
+        before = fetched.get(url)
+        marker = " "
+        if before is None:
+            before = os.path.getsize(os.path.join(ROOT_DIR, source))
+            marker = "*"
+        if url in counted:
+            # same remote URL as an earlier asset: the browser fetched it once
+            before = 0
+        counted.add(url)
+        after = os.path.getsize(os.path.join(STATIC_DIR, manifest[name]))
+        before_images += before
+        after_images += after
+        print(f"{name:>18} | {before / 1024:>9.1f}{marker} | {after / 1024:>7.1f} KB")
+
+    before_css = inline_css * args.runs
+    after_css = css_gz + link_tag * args.runs
+    print(f"{'stylesheet':>18} | {before_css / 1024:>10.1f} | {after_css / 1024:>7.1f} KB"
+          f"   ({args.runs} runs: {inline_css} B inline each vs {link_tag} B tag + {css_gz} B gzip once)")
+    print("-" * 46)
+    before_total = before_images + before_css
+    after_total = after_images + after_css
+    print(f"{'first visit':>18} | {before_total / 1024:>10.1f} | {after_total / 1024:>7.1f} KB")
+    print(f"{'repeat visit':>18} | {before_css / 1024:>10.1f} | {link_tag * args.runs / 1024:>7.1f} KB"
+          "   (images/CSS cached; before still re-sends inline CSS)")
+    if any(v is None for v in fetched.values()) or args.offline:
+        print("* remote original unreachable; size of the full-size source file in the repo shown instead")
+
+
+if __name__ == "__main__":
+    main()
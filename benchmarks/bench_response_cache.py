@@ -0,0 +1,97 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import TOPICS, FakeMemory
+from stub_sutra_server import StubConfig, start_stub_server
+
+# --- RESPONSE CACHE: HIT RATE AND LATENCY SAVED ON A SMALL-TALK-HEAVY MIX ---
+# Replays a synthetic traffic mix through ChatEngine (direct API path, local
+# stub) with the cache off, exact-match only, and with near-duplicate
+# matching. Half of the users have memories, so per-user cache partitions
+# are exercised too.
+
+# (message, language) pairs; variants differ in case, punctuation and wording
+SMALL_TALK = [
+    ("hi", "english"), ("Hi!", "english"), ("hello", "english"), ("Hello!!", "english"),
+    ("hey there", "english"), ("how are you", "english"), ("How are you?", "english"),
+    ("how are you doing", "english"), ("what can you do", "english"), ("What can you do?", "english"),
+    ("who are you", "english"), ("Who are you?", "english"), ("good morning", "english"),
+    ("namaste", "hindi"), ("Namaste!", "hindi"), ("नमस्ते", "hindi"), ("नमस्ते!", "hindi"),
+    ("आप कैसे हो?", "hindi"), ("आप कैसे हो", "hindi"), ("kaise ho", "hindi"), ("kaise ho?", "hindi"),
+    ("tum kya kar sakte ho", "hindi"), ("namaskar", "marathi"), ("कसा आहेस?", "marathi"),
+]
+PERSONAL = ["I feel stressed about my exams", "remember what I told you about my job?", "mujhe neend nahi aati"]
+TIME_SENSITIVE = ["what's the weather today", "latest cricket score", "aaj ki khabar kya hai"]
+
+
+def traffic(turns, users, seed):
+    rng = random.Random(seed)
+    for i in range(turns):
+        user_id = f"user-{rng.randrange(users)}"
+        roll = rng.random()
+        if roll < 0.5:
+            message, lang = rng.choice(SMALL_TALK)
+        elif roll < 0.8:
+            message, lang = f"explain {rng.choice(TOPICS)} and {rng.choice(TOPICS)} simply ({i})", "english"
+        elif roll < 0.9:
+            message, lang = rng.choice(PERSONAL), "english"
+        else:
+            message, lang = rng.choice(TIME_SENSITIVE), "english"
+        yield user_id, message, lang
+
+
+def run(mode, args):
+    from chat_engine import ChatEngine
+    from memory_cache import MemoryContextCache
+    from response_cache import ResponseCache
+
+    cache = None
+    if mode == "exact":
+        cache = ResponseCache()
+    elif mode == "similar":
+        cache = ResponseCache(similarity=args.similarity)
+
+    memory = FakeMemory()
+    for n in range(0, args.users, 2):
+        memory.seed(f"user-{n}", 20)
+    engine = ChatEngine("bench-key", memory=memory, memory_cache=MemoryContextCache(), response_cache=cache)
+
+    turn_ms = []
+    for user_id, message, lang in traffic(args.turns, args.users, args.seed):
+        result = engine.chat(user_id, message, lang)
+        turn_ms.append(result.timings["total_ms"])
+    return turn_ms, cache.stats() if cache else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hit rate and latency saved by the response cache")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--similarity", type=float, default=0.9)
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    stub = start_stub_server(StubConfig(latency=args.llm_latency))
+    os.environ["SUTRA_BASE_URL"] = stub.url.rsplit("/chat/completions", 1)[0]
+
+    print(f"{'mode':>8} | {'hit rate':>8} | {'near-dup':>8} | {'bypassed':>8} | {'p50 ms':>7} | {'mean ms':>7} | "
+          f"{'saved s':>7} | {'API calls':>9}")
+    print("-" * 86)
+    for mode in ("off", "exact", "similar"):
+        requests_before = stub.config.requests
+        turn_ms, stats = run(mode, args)
+        stats = stats or {"hit_rate": 0.0, "similar_hits": 0, "bypassed": 0, "saved_ms": 0.0}
+        print(f"{mode:>8} | {stats['hit_rate']:>8.0%} | {stats['similar_hits']:>8} | {stats['bypassed']:>8} | "
+              f"{statistics.median(turn_ms):>7.1f} | {statistics.fmean(turn_ms):>7.1f} | "
+              f"{stats['saved_ms'] / 1000:>7.1f} | {stub.config.requests - requests_before:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from script_detect import detect_script
+
+# --- SCRIPT DETECTION BENCHMARK ---
+# Labelled mixed-script corpus: (message, expected script, needs translation)
+CORPUS = [
+    ("Hi Sutra, how are you today?", "latin", False),
+    ("Can you suggest a good book on habits?", "latin", False),
+    ("I failed my exam and feel terrible 😞", "latin", False),
+    ("नमस्ते सूत्र, आप कैसे हो?", "devanagari", True),
+    ("मला आज खूप कंटाळा आला आहे", "devanagari", True),
+    ("मेरा interview कल है, बहुत डर लग रहा है", "devanagari", True),
+    ("કેમ છો? આજે શું નવું છે?", "gujarati", True),
+    ("வணக்கம், நீங்கள் எப்படி இருக்கிறீர்கள்?", "tamil", True),
+    ("నమస్కారం, మీరు ఎలా ఉన్నారు?", "telugu", True),
+    ("ನಮಸ್ಕಾರ, ನೀವು ಹೇಗಿದ್ದೀರಿ?", "kannada", True),
+    ("ਸਤ ਸ੍ਰੀ ਅਕਾਲ, ਤੁਸੀਂ ਕਿਵੇਂ ਹੋ?", "gurmukhi", True),
+    ("yaar mera mood bahut kharab hai aaj", "latin", True),
+    ("kya tum mujhe help kar sakte ho?", "latin", True),
+    ("ok 👍", "latin", False),
+    ("12345 !!!", "other", False),
+    ("Tell me about Pune's monsoon treks in detail please, " * 8, "latin", False),
+    ("आज मौसम बहुत अच्छा है और मैं घूमने जाना चाहता हूँ। " * 8, "devanagari", True),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline script/language detection")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    correct = 0
+    for text, script, needs in CORPUS:
+        detection = detect_script(text)
+        ok = detection.script == script and detection.needs_translation == needs
+        correct += ok
+        if not ok:
+            print(f"MISMATCH: {text[:40]!r} -> {detection}")
+    print(f"accuracy: {correct}/{len(CORPUS)}")
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for text, _, _ in CORPUS:
+            detect_script(text)
+    elapsed = time.perf_counter() - start
+    per_message_us = elapsed / (args.iterations * len(CORPUS)) * 1e6
+    print(f"{args.iterations * len(CORPUS)} detections in {elapsed:.2f}s -> {per_message_us:.2f} µs/message")
+
+
+if __name__ == "__main__":
+    main()
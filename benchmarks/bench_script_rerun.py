@@ -0,0 +1,45 @@
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_render import new_message
+
+# --- FULL-SCRIPT RERUN VS CHAT FRAGMENT BENCHMARK ---
+# Before the chat area became a fragment, every turn re-executed the whole of
+# app.py. This drives the app with Streamlit's AppTest and reports, per run,
+# the full script time (the old per-turn cost) next to the time spent inside
+# the chat fragment (what a turn re-executes now). Requires streamlit.
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure script execution time per turn, full run vs chat fragment")
+    parser.add_argument("--messages", default="10,100,1000")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    print(f"{'messages':>8} | {'full script ms':>14} | {'chat fragment ms':>16}")
+    print("-" * 46)
+    for count in [int(c) for c in args.messages.split(",")]:
+        at = AppTest.from_file(APP_PATH, default_timeout=60)
+        at.run()
+        at.sidebar.text_input[0].input("bench-key")
+        at.session_state.chat_history = [
+            new_message("user" if i % 2 == 0 else "assistant", f"message {i} " * 10) for i in range(count)
+        ]
+        full, fragment = [], []
+        for _ in range(args.runs):
+            at.run()
+            full.append(at.session_state.last_script_ms)
+            fragment.append(at.session_state.last_fragment_ms)
+        print(f"{count:>8} | {statistics.median(full):>14.1f} | {statistics.median(fragment):>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
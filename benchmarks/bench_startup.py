@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# --- COLD-START / IMPORT-TIME BUDGET ---
+# Each measurement runs in a fresh interpreter so nothing is already imported.
+#   eager:  importing the optional client libraries the way app.py used to
+#   app:    one cold AppTest run of app.py with no API key entered
+# The app run also lists which heavy modules got imported (ideally none).
+# Results can be appended to a JSON-lines history file, and the script exits
+# non-zero when the app cold start exceeds --budget-ms.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["mem0", "agno", "openai", "googletrans"]
+
+EAGER_SNIPPET = """
+import time
+start = time.perf_counter()
+for name in ("mem0", "agno.agent", "agno.models.openai.like", "agno.tools.duckduckgo", "openai", "googletrans"):
+    try:
+        __import__(name)
+    except Exception:
+        pass
+print((time.perf_counter() - start) * 1000)
+"""
+
+APP_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(%r, default_timeout=120)
+at.run()
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [m for m in %r if m in sys.modules]
+print(json.dumps({"ms": elapsed, "heavy_modules": heavy, "exception": bool(at.exception)}))
+"""
+
+
+def run_python(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import cost of app.py against a budget")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=3000)
+    parser.add_argument("--history", help="append results to this JSON-lines file")
+    args = parser.parse_args()
+
+    eager = sorted(float(run_python(EAGER_SNIPPET)) for _ in range(args.runs))
+    app_runs = [json.loads(run_python(APP_SNIPPET % (os.path.join(ROOT, "app.py"), HEAVY_MODULES)))
+                for _ in range(args.runs)]
+    app_ms = sorted(r["ms"] for r in app_runs)
+
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "eager_optional_imports_ms": eager[len(eager) // 2],
+        "app_cold_start_ms": app_ms[len(app_ms) // 2],
+        "heavy_modules_loaded": app_runs[-1]["heavy_modules"],
+        "budget_ms": args.budget_ms,
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+
+    if result["app_cold_start_ms"] > args.budget_ms:
+        print(f"Cold start {result['app_cold_start_ms']:.0f} ms exceeds budget of {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry import Telemetry
+
+# --- SPAN OVERHEAD, TELEMETRY ON VS OFF ---
+# A turn opens about eight spans; this reports the cost of one span around
+# an empty block, so it can be compared with a turn's hundreds of ms.
+
+
+def per_span_ns(telemetry, n):
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        with telemetry.span("stage", "english"):
+            pass
+    return (time.perf_counter_ns() - start) / n
+
+
+def baseline_ns(n):
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        pass
+    return (time.perf_counter_ns() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the per-span cost of telemetry.py")
+    parser.add_argument("--spans", type=int, default=200000)
+    args = parser.parse_args()
+
+    base = baseline_ns(args.spans)
+    disabled = per_span_ns(Telemetry(enabled=False), args.spans)
+    enabled = per_span_ns(Telemetry(enabled=True), args.spans)
+    print(f"empty loop:          {base:8.0f} ns/iteration")
+    print(f"telemetry disabled:  {disabled - base:8.0f} ns/span")
+    print(f"telemetry enabled:   {enabled - base:8.0f} ns/span")
+    print(f"8 spans per turn, enabled: {(enabled - base) * 8 / 1000:.1f} µs/turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeSearch
+from stub_sutra_server import StubConfig, start_stub_server
+
+# --- WEB SEARCH: DIRECT VS CACHED + COALESCED ---
+# N users chat at the same time through the Agno agent; the stub answers
+# every turn with one web-search tool call for the user's message, and most
+# users ask about the same few trending topics. "direct" hands the agent the
+# search function itself (the old DuckDuckGoTools setup), "cached" puts
+# web_search.CachedWebSearch in front of it. "slow" adds a search backend
+# slower than the per-search timeout, to show the turn is bounded.
+#
+# Runs offline against stub_sutra_server.py and fakes.FakeSearch.
+
+TRENDING = [
+    "who won the cricket match yesterday", "new phone launches this week", "monsoon forecast for Pune",
+    "exam results date announced", "top movies this weekend",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def run(mode, args, base_url):
+    from chat_engine import ChatEngine, build_mentor_agent
+    from web_search import CachedWebSearch
+
+    latency = args.slow_latency if mode == "slow" else args.search_latency
+    backend = FakeSearch(latency=latency)
+    cached = None
+    if mode == "direct":
+        tools = [backend.duckduckgo_search]
+    else:
+        cached = CachedWebSearch(backend=backend, ttl=args.ttl, timeout=args.timeout)
+        tools = cached.tools()
+
+    rng = random.Random(args.seed)
+    plans = [
+        [rng.choice(TRENDING) if rng.random() < args.trending else f"user {n} question {t}" for t in range(args.turns)]
+        for n in range(args.users)
+    ]
+    turn_ms, errors = [], 0
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(args.users)
+
+    def user(n):
+        nonlocal errors
+        agent = build_mentor_agent("bench-key", tools=tools, base_url=base_url)
+        engine = ChatEngine("bench-key", agent=agent, hedge_after=0)
+        start_barrier.wait()
+        for message in plans[n]:
+            result = engine.chat(f"user-{n}", message, "english")
+            with lock:
+                turn_ms.append(result.timings["total_ms"])
+                errors += 0 if result.ok else 1
+
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(args.users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = cached.stats() if cached else {"calls": backend.calls, "hits": 0, "coalesced": 0, "timeouts": 0}
+    return {
+        "turn_ms_p50": statistics.median(turn_ms),
+        "turn_ms_p95": percentile(turn_ms, 95),
+        "calls": stats["calls"],
+        "backend": backend.calls,
+        "hits": stats["hits"],
+        "coalesced": stats["coalesced"],
+        "timeouts": stats["timeouts"],
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Web search tool: direct vs. cached and coalesced")
+    parser.add_argument("--modes", default="direct,cached,slow")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=5, help="turns per user")
+    parser.add_argument("--trending", type=float, default=0.8, help="share of turns about a trending topic")
+    parser.add_argument("--search-latency", type=float, default=0.8)
+    parser.add_argument("--slow-latency", type=float, default=3.0, help="search latency in the 'slow' mode")
+    parser.add_argument("--timeout", type=float, default=1.5, help="per-search timeout")
+    parser.add_argument("--ttl", type=float, default=900)
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    stub = start_stub_server(StubConfig(latency=args.llm_latency, tool_calls=True))
+    base_url = stub.url.rsplit("/chat/completions", 1)[0]
+
+    print(f"{'mode':>7} | {'p50 ms':>7} | {'p95 ms':>7} | {'searches':>8} | {'issued':>6} | {'cached':>6} | "
+          f"{'shared':>6} | {'timeouts':>8} | {'errors':>6}")
+    print("-" * 84)
+    for mode in args.modes.split(","):
+        row = run(mode, args, base_url)
+        print(f"{mode:>7} | {row['turn_ms_p50']:>7.0f} | {row['turn_ms_p95']:>7.0f} | {row['calls']:>8} | "
+              f"{row['backend']:>6} | {row['hits']:>6} | {row['coalesced']:>6} | {row['timeouts']:>8} | "
+              f"{row['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# --- LOCAL STAND-INS FOR MEM0, GOOGLETRANS AND DUCKDUCKGO ---
+# Same call shapes the app uses (memory.search / add, translator.translate,
+# an Agno tool function), with configurable latency and call counters, so
+# benchmarks can run the real code paths without network access or keys.
+# The Sutra chat endpoint stand-in is stub_sutra_server.py.
+
+TOPICS = [
+    "cricket", "biryani", "startup", "exams", "Pune", "guitar", "yoga", "travel", "coding", "monsoon",
+    "movies", "chai", "football", "photography", "books", "Diwali", "trekking", "music", "design", "family",
+]
+
+
+class FakeMemory:
+    # Mem0 MemoryClient-compatible: search("*", user_id=) and add(messages=, user_id=)
+    def __init__(self, latency=0.0, write_latency=0.0):
+        self.latency = latency
+        self.write_latency = write_latency
+        self.searches = 0
+        self.returned = 0
+        self.adds = 0
+        self._memories = {}
+        self._lock = threading.Lock()
+
+    def seed(self, user_id, count, days=20):
+        # `count` distinct memories spread over the last `days` days
+        now = datetime.now(timezone.utc)
+        items = []
+        for i in range(count):
+            topic = TOPICS[i % len(TOPICS)]
+            items.append({
+                "id": uuid.uuid4().hex,
+                "memory": f"User talked about {topic} and {TOPICS[(i * 7 + 3) % len(TOPICS)]} (note {i})",
+                "created_at": (now - timedelta(minutes=i * days * 1440 // max(count, 1))).isoformat(),
+            })
+        with self._lock:
+            self._memories.setdefault(user_id, []).extend(items)
+
+    def search(self, query, user_id=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.searches += 1
+            results = [dict(item) for item in self._memories.get(user_id, [])]
+            self.returned += len(results)
+            return {"results": results}
+
+    def get_all(self, user_id=None, **kwargs):
+        return self.search("*", user_id=user_id)
+
+    def add(self, messages, user_id=None, **kwargs):
+        if self.write_latency:
+            time.sleep(self.write_latency)
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self.adds += 1
+            store = self._memories.setdefault(user_id, [])
+            for m in messages:
+                if m.get("role") == "user":
+                    store.append({"id": uuid.uuid4().hex, "memory": f"User said: {m['content']}", "created_at": now})
+        return {"results": []}
+
+
+class _Translated:
+    def __init__(self, text, src, dest):
+        self.text = text
+        self.src = src
+        self.dest = dest
+
+
+class FakeTranslator:
+    # googletrans-compatible: translate(text or [texts], dest=, src=) -> .text
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text, dest="en", src="auto"):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+        if isinstance(text, list):
+            return [_Translated(f"[{dest}] {t}", src, dest) for t in text]
+        return _Translated(f"[{dest}] {text}", src, dest)
+
+
+class FakeSearch:
+    # Passed to the Agno agent in place of DuckDuckGoTools; Agno turns the
+    # bound method into a function tool from its signature and docstring
+    def __init__(self, latency=0.0, results=5):
+        self.latency = latency
+        self.results = results
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def duckduckgo_search(self, query: str, max_results: int = 5) -> str:
+        """Search the web for a query and return the top results as JSON."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+        return json.dumps([
+            {"title": f"Result {i} for {query}", "href": f"https://example.com/{i}", "body": f"About {query}."}
+            for i in range(min(max_results, self.results))
+        ])
+
+    def duckduckgo_news(self, query: str, max_results: int = 5) -> str:
+        """Get the latest news for a query as JSON."""
+        return self.duckduckgo_search(query, max_results)
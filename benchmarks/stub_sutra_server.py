@@ -0,0 +1,238 @@
+import argparse
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- LOCAL STUB FOR THE SUTRA CHAT ENDPOINT ---
+# OpenAI-compatible POST /v2/chat/completions (plain and streaming) with
+# injectable latency, token rate, failures and a concurrency quota (429s
+# beyond max_concurrent requests in progress), so the HTTP client, streaming
+# and fallback paths can be exercised without an API key. With tool_calls on,
+# a request that offers tools first gets a call to the first one back, so an
+# agent's tool loop (e.g. web search) runs too.
+
+REPLY = "Namaste! I'm Sutra, your AI friend from Pune. How can I help you today?"
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, token_delay=0.0, failure_rate=0.0, failure_status=503,
+                 retry_after=None, reply=REPLY, seed=None, tool_calls=False, max_concurrent=None):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.retry_after = retry_after
+        self.reply = reply
+        self.tool_calls = tool_calls
+        # Quota: requests beyond this many in progress get a 429
+        self.max_concurrent = max_concurrent
+        self.in_progress = 0
+        self.throttled = 0
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self.tool_calls_sent = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this Nagle's
+        # algorithm adds ~40 ms to every keep-alive request
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.config.lock:
+            self.server.config.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        config = self.server.config
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            payload = {}
+
+        with config.lock:
+            config.requests += 1
+            throttle = config.max_concurrent is not None and config.in_progress >= config.max_concurrent
+            if throttle:
+                config.throttled += 1
+            else:
+                config.in_progress += 1
+            fail = not throttle and config.random.random() < config.failure_rate
+            if fail:
+                config.failures += 1
+
+        if throttle:
+            error = json.dumps({"error": "rate limit exceeded"}).encode()
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(error)))
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(error)
+            return
+        try:
+            self._respond(config, payload, fail)
+        finally:
+            with config.lock:
+                config.in_progress -= 1
+
+    def _respond(self, config, payload, fail):
+        if config.latency:
+            time.sleep(config.latency)
+
+        if fail:
+            error = json.dumps({"error": "injected failure"}).encode()
+            self.send_response(config.failure_status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(error)))
+            if config.retry_after is not None:
+                self.send_header("Retry-After", str(config.retry_after))
+            self.end_headers()
+            self.wfile.write(error)
+            return
+
+        tool_call = self._tool_call(config, payload)
+        if tool_call is not None:
+            self._send_tool_call(payload, tool_call)
+        elif payload.get("stream"):
+            self._stream(config)
+        else:
+            result = json.dumps({
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": config.reply}}]
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(result)))
+            self.end_headers()
+            self.wfile.write(result)
+
+    def _tool_call(self, config, payload):
+        # Call the first offered tool once per conversation (no tool result yet)
+        tools = payload.get("tools") or []
+        messages = payload.get("messages") or []
+        if not config.tool_calls or not tools or any(m.get("role") == "tool" for m in messages):
+            return None
+        query = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "") or ""
+        with config.lock:
+            config.tool_calls_sent += 1
+        return {
+            "id": f"call_{config.tool_calls_sent}",
+            "type": "function",
+            "function": {
+                "name": tools[0]["function"]["name"],
+                "arguments": json.dumps({"query": str(query)[-200:]}),
+            },
+        }
+
+    def _send_tool_call(self, payload, tool_call):
+        if not payload.get("stream"):
+            result = json.dumps({"choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": None, "tool_calls": [tool_call]},
+                "finish_reason": "tool_calls",
+            }]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(result)))
+            self.end_headers()
+            self.wfile.write(result)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        delta = {"role": "assistant", "tool_calls": [dict(tool_call, index=0)]}
+        event = json.dumps({"choices": [{"index": 0, "delta": delta}]})
+        self._chunk(f"data: {event}\n\n".encode())
+        event = json.dumps({"choices": [{"index": 0, "delta": {}, "finish_reason": "tool_calls"}]})
+        self._chunk(f"data: {event}\n\n".encode())
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def _stream(self, config):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = config.reply.split(" ")
+        for i, word in enumerate(words):
+            if config.token_delay:
+                time.sleep(config.token_delay)
+            text = word if i == 0 else " " + word
+            event = json.dumps({"choices": [{"index": 0, "delta": {"content": text}}]})
+            self._chunk(f"data: {event}\n\n".encode())
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections (1 s SYN retry) when
+    # many simulated users connect at once
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # Clients hang up mid-stream when a turn is cancelled or runs out of
+        # time; that is expected, not worth a traceback
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def start_stub_server(config=None, port=0):
+    server = StubServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.config = config or StubConfig()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_port}/v2/chat/completions"
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stub of the Sutra chat endpoint")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--tool-calls", action="store_true", help="answer the first request that offers tools with a tool call")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="answer 429 beyond this many requests in progress")
+    args = parser.parse_args()
+
+    server = start_stub_server(StubConfig(
+        latency=args.latency,
+        token_delay=args.token_delay,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        retry_after=args.retry_after,
+        tool_calls=args.tool_calls,
+        max_concurrent=args.max_concurrent,
+    ), port=args.port)
+    print(f"Stub Sutra endpoint listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+import hashlib
+import time
+
+import requests
+
+from admission import AdmissionTimeout
+from conversation import conversation_summarizer, extractive_summary
+from deadline import (
+    AnySet, Deadline, DeadlineExceeded, StageTimeout, TurnCancelled, bind_deadline, run_in_background, run_stage
+)
+from hedging import AllPathsFailed, run_hedged
+from http_client import sutra_http
+from memory_cache import MemoryContextCache
+from memory_writer import memory_writer
+from prompt_builder import (
+    SUTRA_INSTRUCTIONS, agent_prompt, fallback_system_prompt, fit_history, fit_prompt, history_messages, history_text,
+    summary_system_note
+)
+from sutra_api import SUTRA_BASE_URL, AgentPool, SutraAPIError, agent_request, fallback_request
+from telemetry import telemetry
+from translation import CachedTranslator
+
+# --- HEADLESS CHAT ENGINE ---
+# One chat turn end to end: memory context, budgeted prompt, Agno agent and/or
+# direct API (hedged), and the background memory write. Nothing here touches
+# Streamlit; problems are returned as notices on the TurnResult and the
+# caller decides how to show them (st.error in app.py, a JSON field in
+# batch_replay.py).
+#
+# Backends are duck-typed, so any of them can be swapped out:
+#   agent       - Agno-style: agent.run(prompt, stream=...), or a
+#                 sutra_api.AgentPool of them (build_agent_pool)
+#   memory      - Mem0 MemoryClient-style: add / get_all / search
+#   translator  - googletrans-style, usually wrapped in CachedTranslator
+#   http        - requests-style .post() used for the direct API; turns also
+#                 pass cancel= and deadline= (see http_client.SutraHttpClient)
+#
+# The caller keeps one conversation.Conversation per chat and passes it to
+# chat(); its summary and latest turns go into every prompt.
+#
+# Every turn runs against a deadline.Deadline (turn_budget seconds unless the
+# caller passes its own): the memory lookup, the queue wait, each request
+# and the agent's web searches only get what is left of it, optional stages
+# are skipped when time is short, and deadline.cancel() stops the turn.
+
+SUTRA_MODEL_ID = "sutra-v2"
+
+
+def build_memory_client(api_key):
+    from mem0 import MemoryClient
+    return MemoryClient(api_key=api_key)
+
+
+def build_translator(cache_path=None):
+    # googletrans is imported on the first translation (a memory write that
+    # needs one), not when the client is built on a cold start
+    def factory():
+        from googletrans import Translator
+        return Translator()
+    return CachedTranslator(path=cache_path, factory=factory)
+
+
+def build_mentor_agent(api_key, model_id=SUTRA_MODEL_ID, tools=None, base_url=SUTRA_BASE_URL):
+    return build_agent_pool(api_key, model_id, size=1, tools=tools, base_url=base_url).factory()
+
+
+# The model client and the tool list are built once and shared by every agent
+# in the pool; Agno wraps the tool functions per agent, and the OpenAI client
+# is safe to use from several threads.
+def build_agent_pool(api_key, model_id=SUTRA_MODEL_ID, size=8, tools=None, base_url=SUTRA_BASE_URL):
+    from agno.agent import Agent
+    from agno.models.openai.like import OpenAILike
+
+    if tools is None:
+        # DuckDuckGo behind the process-wide result cache (web_search.py)
+        from web_search import web_search
+        tools = web_search.tools()
+
+    sutra_model = OpenAILike(
+        id=model_id,
+        base_url=base_url,
+        api_key=api_key
+    )
+
+    def build():
+        return Agent(
+            name="AIMentor",
+            instructions=SUTRA_INSTRUCTIONS,
+            tools=list(tools),
+            model=sutra_model,
+            add_datetime_to_instructions=True,
+            # times each tool call (web search) as its own stage
+            tool_hooks=[telemetry.tool_hook]
+        )
+
+    return AgentPool(build, size)
+
+
+# --- Token stream sink for incremental rendering ---
+class TokenStream:
+    def __init__(self, on_update=None):
+        self.parts = []
+        self.on_update = on_update
+        self.first_token_at = None
+
+    def push(self, text):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.parts.append(text)
+        if self.on_update:
+            self.on_update(self.text)
+
+    def reset(self):
+        # Discard partial output, e.g. when the agent fails mid-stream and the
+        # fallback API starts a fresh reply
+        self.parts = []
+        if self.on_update:
+            self.on_update("")
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+def fallback_error_message(e):
+    if isinstance(e, SutraAPIError):
+        return f"⚠️ API Error: {e.status_code} - {e.text}"
+    if isinstance(e, requests.exceptions.Timeout):
+        return "⚠️ Request timed out. Please try again."
+    if isinstance(e, requests.exceptions.RequestException):
+        return f"⚠️ Network error: {str(e)}"
+    return f"⚠️ Unexpected error: {str(e)}"
+
+
+class TurnResult:
+    def __init__(self):
+        self.reply = ""
+        # "agent", "fallback", "agent (hedged)", "cache", "rate_limited", "busy", "timeout",
+        # "cancelled" or "failed"
+        self.path = None
+        self.error = None
+        # (level, message) pairs, level being "error" or "warning"
+        self.notices = []
+        self.prompt_usage = None
+        self.timings = {}
+        # Optional stages dropped to stay inside the turn budget, e.g. "memory"
+        self.skipped = []
+        # Tools the agent called, e.g. "duckduckgo_search"
+        self.tools_used = []
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def to_dict(self):
+        return {
+            "reply": self.reply,
+            "path": self.path,
+            "error": self.error,
+            "notices": [{"level": level, "message": message} for level, message in self.notices],
+            "prompt_usage": self.prompt_usage,
+            "skipped": self.skipped,
+            "tools_used": self.tools_used,
+            "timings": {name: round(ms, 1) for name, ms in self.timings.items()},
+        }
+
+
+class ChatEngine:
+    def __init__(self, api_key, model_id=SUTRA_MODEL_ID, agent=None, memory=None,
+                 translator=None, memory_cache=None, writer=memory_writer, http=sutra_http,
+                 memory_top_k=8, token_budget=3000, hedge_after=6.0, telemetry=telemetry, quota=None,
+                 response_cache=None, history_tokens=800, summarizer=conversation_summarizer, admission=None,
+                 turn_budget=None, memory_timeout=5.0, model_reserve=8.0):
+        self.api_key = api_key
+        self.model_id = model_id
+        # An AgentPool, or a single agent whose runs then take turns (Agno
+        # keeps per-run state on the instance)
+        self.agent = agent if agent is None or isinstance(agent, AgentPool) else AgentPool(lambda: agent, size=1)
+        self.memory = memory
+        self.translator = translator
+        self.memory_cache = memory_cache if memory_cache is not None else MemoryContextCache()
+        self.writer = writer
+        self.http = http
+        self.memory_top_k = memory_top_k
+        self.token_budget = token_budget
+        self.hedge_after = hedge_after
+        self.telemetry = telemetry
+        # Optional users.TurnQuota: per-user turns per minute
+        self.quota = quota
+        # Optional response_cache.ResponseCache for repeated small talk
+        self.response_cache = response_cache
+        # Estimated tokens for the conversation summary + recent turns
+        self.history_tokens = history_tokens
+        self.summarizer = summarizer
+        # Optional admission.AdmissionController shared by every engine
+        self.admission = admission
+        # Seconds per turn (None: no limit); the memory lookup waits at most
+        # memory_timeout and stages before the model leave it model_reserve
+        self.turn_budget = turn_budget
+        self.memory_timeout = memory_timeout
+        self.model_reserve = model_reserve
+
+    # --- Mem0: past memory for the prompt ---
+    # Served from the per-user cache; with a query, only the
+    # memory_top_k memories most relevant to it are returned. A lookup that
+    # does not fit the turn budget is skipped (it still finishes in the
+    # background and warms the cache for the next turn).
+    def memory_context(self, user_id, query, result, deadline=None, on_tick=None):
+        if not self.memory:
+            return ""
+        timeout = self.memory_timeout
+        if deadline is not None:
+            timeout = deadline.timeout(self.memory_timeout, reserve=self.model_reserve)
+        if timeout is not None:
+            timeout = max(timeout, 0.05)
+        try:
+            with self.telemetry.span("memory.search"):
+                return run_stage(lambda: self._memory_context(user_id, query), timeout, deadline, on_tick)
+        except StageTimeout:
+            if deadline is not None:
+                deadline.skip("memory")
+            return ""
+        except TurnCancelled:
+            raise
+        except Exception as e:
+            result.notices.append(("error", f"Error retrieving memories: {str(e)}"))
+            return ""
+
+    # Warms the user's memory context in the background, e.g. when a session
+    # starts, so the first turn does not wait for the fetch
+    def prefetch(self, user_id):
+        if self.memory:
+            return self.memory_cache.prefetch(self.memory, user_id)
+        return None
+
+    def _memory_context(self, user_id, query):
+        if query and self.memory_top_k > 0:
+            return self.memory_cache.get_relevant_context(self.memory, user_id, query, self.memory_top_k)
+        return self.memory_cache.get_context(self.memory, user_id)
+
+    # --- Mem0: save the turn in English, off the caller's thread ---
+    def save(self, user_id, user_message, reply, lang, result):
+        if not self.memory:
+            return
+        try:
+            # Once the turn is stored, reload the user's memories so the next
+            # turn sees what the backend made of it
+            memory, memory_cache = self.memory, self.memory_cache
+            self.writer.submit(
+                memory, self.translator, user_id, user_message, reply, lang,
+                on_written=lambda: memory_cache.prefetch(memory, user_id, force=True)
+            )
+            record = lambda: self.memory_cache.record_write(
+                self.memory,
+                user_id,
+                [{"role": "user", "content": user_message}]
+            )
+            if "memory" in result.skipped:
+                # The lookup this turn gave up on may still hold the user's
+                # cache entry; do not wait for it
+                run_in_background(record)
+            else:
+                record()
+        except Exception as e:
+            result.notices.append(("error", f"Error saving to memory: {str(e)}"))
+
+    # --- Conversation so far: rolling summary + latest turns ---
+    def conversation_history(self, conversation):
+        if conversation is None:
+            return "", []
+        summary, turns, _ = fit_history(*conversation.snapshot(), self.history_tokens)
+        return summary, turns
+
+    def record_turn(self, conversation, user_message, reply):
+        if conversation is not None and conversation.record(user_message, reply):
+            self.summarizer.submit(conversation, self.summarize)
+
+    # Runs on the summarizer thread when turns leave the verbatim window
+    def summarize(self, summary, turns, max_tokens):
+        transcript = history_text("", turns)
+        system_prompt = (
+            "You maintain a running summary of a chat between a user and Sutra, their AI friend. "
+            "Merge the new turns into the summary. Keep names, facts about the user, open questions "
+            f"and promises; drop small talk. Reply with the summary only, under {max_tokens * 3 // 4} words."
+        )
+        try:
+            # Background work queues behind users' turns like anyone else
+            ticket = self.admission.admit("summarizer") if self.admission is not None else None
+            try:
+                return fallback_request(
+                    self.http, self.api_key, self.model_id, system_prompt,
+                    f"Summary so far: {summary or '(none)'}\n\nNew turns:\n{transcript}",
+                    max_tokens=max_tokens
+                )
+            finally:
+                if ticket is not None:
+                    ticket.release()
+        except Exception:
+            return extractive_summary(summary, turns, max_tokens)
+
+    # --- Prompts, kept inside token_budget ---
+    # Persona first, then the user's message, then as much of the
+    # conversation so far as fits, then as many memories as still fit.
+    def fallback_prompt(self, lang, user_message, context, result, history=("", [])):
+        prompt_message, (summary, turns), context, result.prompt_usage = fit_prompt(
+            fallback_system_prompt(lang, ""), user_message, context, self.token_budget, history=history,
+            render_history=lambda summary, turns: summary_system_note(summary) + history_text("", turns)
+        )
+        return (fallback_system_prompt(lang, context) + summary_system_note(summary), prompt_message,
+                history_messages(turns))
+
+    def agent_prompt(self, lang, user_message, context, result, history=("", [])):
+        prompt_message, history, context, result.prompt_usage = fit_prompt(
+            "\n".join(SUTRA_INSTRUCTIONS) + agent_prompt(lang, "", ""), user_message, context, self.token_budget,
+            history=history
+        )
+        return agent_prompt(lang, context, prompt_message, history_text(*history))
+
+    def chat(self, user_id, user_message, lang="english", stream=None, conversation=None, on_queued=None,
+             deadline=None, on_tick=None):
+        # on_tick() is called on this thread about every 0.25 s while the turn
+        # waits, e.g. so a UI can notice it was asked to stop
+        if self.quota is not None:
+            retry_after = self.quota.check(user_id)
+            if retry_after:
+                result = TurnResult()
+                result.path = "rate_limited"
+                result.error = f"more than {self.quota.per_minute} messages a minute"
+                result.reply = (
+                    f"⚠️ You're sending messages very quickly. Please wait {retry_after} s and try again."
+                )
+                return result
+
+        if deadline is None:
+            deadline = Deadline(self.turn_budget)
+        try:
+            with self.telemetry.span("turn", lang):
+                result = self._chat(user_id, user_message, lang, stream, conversation, on_queued, deadline, on_tick)
+        except BaseException:
+            # Interrupted from outside (e.g. a Streamlit rerun inside a
+            # callback): make sure nothing keeps working on this turn
+            deadline.cancel()
+            raise
+        if result.ok:
+            self.record_turn(conversation, user_message, result.reply)
+        if "first_token_ms" in result.timings:
+            self.telemetry.record("first_token", lang, result.timings["first_token_ms"])
+        return result
+
+    # Cached replies are keyed on everything that shapes the answer besides
+    # the message: model, persona text and language
+    def persona_key(self, lang):
+        persona = "\n".join([self.model_id, *SUTRA_INSTRUCTIONS, fallback_system_prompt(lang, "")])
+        return hashlib.sha1(persona.encode("utf-8")).hexdigest()[:12]
+
+    def _chat(self, user_id, user_message, lang, stream, conversation, on_queued, deadline, on_tick):
+        result = TurnResult()
+        result.skipped = deadline.skipped
+        result.tools_used = deadline.tools_used
+        started = time.perf_counter()
+
+        cache = self.response_cache
+        cacheable = False
+        # Mid-conversation replies depend on what came before, so only a
+        # conversation's opening message is looked up or stored
+        if cache is not None and not (conversation is not None and len(conversation)):
+            with self.telemetry.span("response_cache", lang):
+                persona = self.persona_key(lang)
+                cacheable = cache.bypass_reason(user_message) is None
+                hit = cache.lookup(user_message, lang, persona, user_id) if cacheable else None
+            if not cacheable:
+                cache.record_bypass()
+            elif hit is not None:
+                return self._cached_turn(user_id, user_message, lang, stream, hit, started, result)
+
+        try:
+            context = self.memory_context(user_id, user_message, result, deadline, on_tick)
+            result.timings["memory_ms"] = (time.perf_counter() - started) * 1000
+            history = self.conversation_history(conversation)
+
+            ticket = None
+            if self.admission is not None:
+                queue_started = time.perf_counter()
+                try:
+                    ticket = self.admission.admit(
+                        user_id, on_queued, lang, timeout=deadline.timeout(reserve=self.model_reserve), cancel=deadline
+                    )
+                except AdmissionTimeout as e:
+                    deadline.check()
+                    result.path = "busy"
+                    result.error = str(e)
+                    result.reply = "⚠️ Sutra is very busy right now. Please try again in a minute."
+                    result.timings["total_ms"] = (time.perf_counter() - started) * 1000
+                    return result
+                result.timings["queue_ms"] = (time.perf_counter() - queue_started) * 1000
+
+            model_started = time.perf_counter()
+            try:
+                self._chat_model(user_id, user_message, lang, context, history, stream, result, deadline, on_tick)
+            finally:
+                if ticket is not None:
+                    ticket.release()
+        except (DeadlineExceeded, TurnCancelled) as e:
+            self._ended_early(e, stream, deadline, result)
+            result.timings["total_ms"] = (time.perf_counter() - started) * 1000
+            return result
+        finished = time.perf_counter()
+
+        result.timings["model_ms"] = (finished - model_started) * 1000
+        first_token_at = getattr(stream, "first_token_at", None)
+        if first_token_at is not None:
+            result.timings["first_token_ms"] = (first_token_at - started) * 1000
+        result.timings["total_ms"] = (finished - started) * 1000
+
+        if cacheable and result.ok and deadline.tools_used:
+            # The agent searched the web (or used another tool): the answer
+            # may be about something current, whatever words the message used
+            cache.record_bypass()
+        elif cacheable and result.ok:
+            # Replies built from this user's memories are only reused for them
+            personal = bool(result.prompt_usage and result.prompt_usage["memories_kept"])
+            cache.store(user_message, lang, persona, result.reply, result.timings["total_ms"],
+                        user_id=user_id if personal else None)
+        return result
+
+    def _cached_turn(self, user_id, user_message, lang, stream, hit, started, result):
+        result.reply = hit.reply
+        result.path = "cache"
+        if stream is not None:
+            stream.push(hit.reply)
+        # Still part of the conversation, so it is remembered like any other turn
+        self.save(user_id, user_message, hit.reply, lang, result)
+        finished = time.perf_counter()
+        first_token_at = getattr(stream, "first_token_at", None)
+        if first_token_at is not None:
+            result.timings["first_token_ms"] = (first_token_at - started) * 1000
+        result.timings["total_ms"] = (finished - started) * 1000
+        self.response_cache.record_saved(hit.cost_ms - result.timings["total_ms"])
+        return result
+
+    # Agent first (when there is one), racing the direct API once it is slower
+    # than hedge_after; with hedge_after=0 the direct API only runs if the
+    # agent fails
+    def _chat_model(self, user_id, user_message, lang, context, history, stream, result, deadline, on_tick):
+        system_prompt, prompt_message, messages = self.fallback_prompt(lang, user_message, context, result, history)
+        agent = self.agent
+        if agent:
+            prompt = self.agent_prompt(lang, user_message, context, result, history)
+
+        # Workers run on their own threads, so the language and the deadline
+        # are passed explicitly
+        def run_agent(emit, cancel):
+            with bind_deadline(deadline), self.telemetry.span("agent.run", lang):
+                return agent_request(agent, prompt, emit, AnySet(cancel, deadline))
+
+        def run_fallback(emit, cancel):
+            if agent and self.admission is not None:
+                # A second request for this turn: needs its own rate-limit token
+                self.admission.take_token(AnySet(cancel, deadline))
+                if cancel.is_set() or deadline.is_set():
+                    return ""
+            with self.telemetry.span("fallback.post", lang):
+                return fallback_request(
+                    self.http, self.api_key, self.model_id, system_prompt, prompt_message, emit,
+                    AnySet(cancel, deadline), history=messages, timeout=max(deadline.timeout(30), 1.0),
+                    deadline=deadline
+                )
+
+        if agent:
+            paths = ("agent", run_agent), ("fallback", run_fallback)
+        else:
+            paths = ("fallback", run_fallback), None
+        try:
+            hedged = run_hedged(
+                *paths,
+                self.hedge_after if self.hedge_after > 0 else None,
+                on_token=stream.push if stream is not None else None,
+                on_reset=stream.reset if stream is not None else None,
+                deadline=deadline,
+                on_tick=on_tick
+            )
+        except AllPathsFailed as e:
+            result.path = "failed"
+            result.error = str(e)
+            result.reply = fallback_error_message(e.errors.get("fallback", e))
+            return
+
+        if "agent" in hedged.errors:
+            result.notices.append(("warning", f"Agno agent failed: {str(hedged.errors['agent'])}. Using fallback API."))
+        result.path = hedged.winner + (" (hedged)" if hedged.hedged else "")
+        result.reply = hedged.value
+        self.save(user_id, user_message, hedged.value, lang, result)
+
+    # Out of time or stopped: keep whatever was already streamed, and do not
+    # remember the turn
+    def _ended_early(self, e, stream, deadline, result):
+        partial = stream.text if stream is not None else ""
+        result.error = str(e)
+        if isinstance(e, TurnCancelled):
+            result.path = "cancelled"
+            result.reply = partial + " …" if partial else "⏹️ Stopped."
+            return
+        result.path = "timeout"
+        if partial:
+            result.reply = partial + " …"
+            result.notices.append(("warning", "Sutra ran out of time, so this reply is cut short."))
+        else:
+            result.reply = f"⚠️ Sutra took too long to answer (over {deadline.budget:g} s). Please try again."
@@ -0,0 +1,76 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from static_assets import asset_url
+
+# --- CHAT MESSAGE RENDERING ---
+# Bubbles use the shared .chat-* CSS classes from the app stylesheet instead
+# of repeating inline styles (and an inline SVG avatar) in every message.
+# Rendered fragments are cached per message id + content hash, so a rerun only
+# builds HTML for messages it has not seen before.
+
+# Served locally (72px WebP for the 36px avatar) rather than from a CDN
+ASSISTANT_AVATAR_URL = asset_url("assistant_avatar")
+
+# Messages shown before the "load earlier" control appears
+HISTORY_PAGE_SIZE = 30
+
+
+def user_bubble_html(content):
+    return (
+        '<div class="chat-row"><div class="chat-avatar-user"></div>'
+        f'<div class="chat-bubble chat-bubble-user">{content}</div></div>'
+    )
+
+
+def assistant_bubble_html(content):
+    return (
+        f'<div class="chat-row"><img class="chat-avatar-bot" src="{ASSISTANT_AVATAR_URL}" width="36" height="36" />'
+        f'<div class="chat-bubble chat-bubble-bot">{content}</div></div>'
+    )
+
+
+def new_message(role, content):
+    return {"id": uuid.uuid4().hex, "role": role, "content": content}
+
+
+class FragmentCache:
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, msg, fallback_id=None):
+        # str hashes are memoised on the object, so this stays O(1) per rerun;
+        # they are per-process, which is all an in-memory cache needs
+        key = (msg.get("id", fallback_id), msg["role"], hash(msg["content"]))
+        with self._lock:
+            html = self._fragments.get(key)
+            if html is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        if msg["role"] == "user":
+            html = user_bubble_html(msg["content"])
+        else:
+            html = assistant_bubble_html(msg["content"])
+
+        with self._lock:
+            self._fragments[key] = html
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return html
+
+
+fragment_cache = FragmentCache()
+
+
+def visible_messages(history, window):
+    # Only the newest `window` messages are emitted; returns (start index, slice)
+    start = max(len(history) - window, 0)
+    return start, history[start:]
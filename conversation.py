@@ -0,0 +1,150 @@
+import atexit
+import queue
+import re
+import threading
+import time
+
+from prompt_builder import estimate_tokens, truncate_to_tokens
+from telemetry import telemetry
+
+# --- ROLLING CONVERSATION CONTEXT ---
+# The model used to see only the current message, so follow-ups ("and
+# tomorrow?") lost their thread; sending the whole chat instead would grow
+# every request with the conversation. A Conversation keeps the latest
+# `recent_turns` turns verbatim and folds older ones into a short summary.
+# Folding happens on a background thread, a chunk of `fold_every` turns at a
+# time, so the reply never waits for it and the summarizer is only called
+# when the window actually slides. Request size stays flat however long the
+# chat gets.
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?।])\s+")
+
+
+def first_sentence(text, max_tokens=40):
+    text = " ".join(str(text).split())
+    return truncate_to_tokens(_SENTENCE_RE.split(text, 1)[0], max_tokens)
+
+
+def extractive_summary(summary, turns, max_tokens):
+    # Offline fallback: one line per turn, oldest lines dropped to fit
+    lines = [line for line in summary.split("\n") if line] if summary else []
+    for user_message, reply in turns:
+        lines.append(f"User: {first_sentence(user_message)} / Sutra: {first_sentence(reply)}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+
+class Conversation:
+    def __init__(self, recent_turns=4, fold_every=4, summary_tokens=250):
+        self.recent_turns = recent_turns
+        self.fold_every = fold_every
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.turns = []
+        # Turns that left the window but are not in the summary yet
+        self.pending = []
+        self.summarized = 0
+        self.folds = 0
+        self._folding = False
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        # (summary, turns to send verbatim); turns still waiting to be folded
+        # are sent verbatim so nothing drops out in between
+        with self._lock:
+            return self.summary, list(self.pending) + list(self.turns)
+
+    def __len__(self):
+        with self._lock:
+            return self.summarized + len(self.pending) + len(self.turns)
+
+    def record(self, user_message, reply):
+        # Returns True when enough turns have left the window to fold
+        with self._lock:
+            self.turns.append((user_message, reply))
+            if len(self.turns) >= self.recent_turns + self.fold_every:
+                self.pending.extend(self.turns[:self.fold_every])
+                del self.turns[:self.fold_every]
+            if self.pending and not self._folding:
+                self._folding = True
+                return True
+            return False
+
+    def fold(self, summarize):
+        # Runs on the summarizer thread; summarize(summary, turns, max_tokens)
+        with self._lock:
+            summary, turns = self.summary, list(self.pending)
+        try:
+            if turns:
+                summary = truncate_to_tokens(summarize(summary, turns, self.summary_tokens), self.summary_tokens)
+        finally:
+            with self._lock:
+                if turns:
+                    self.summary = summary
+                    del self.pending[:len(turns)]
+                    self.summarized += len(turns)
+                    self.folds += 1
+                self._folding = False
+
+    def clear(self):
+        with self._lock:
+            self.summary = ""
+            self.turns = []
+            self.pending = []
+            self.summarized = 0
+
+
+class ConversationSummarizer:
+    # One worker thread folds turns for every conversation in the process
+    def __init__(self):
+        self.folded = 0
+        self.failed = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, conversation, summarize):
+        self._ensure_started()
+        self._queue.put((conversation, summarize))
+
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stats(self):
+        return {"pending": self.pending(), "folded": self.folded, "failed": self.failed, "last_error": self.last_error}
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="conversation-summarizer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            conversation, summarize = self._queue.get()
+            try:
+                with telemetry.span("conversation.summarize"):
+                    conversation.fold(summarize)
+                self.folded += 1
+            except Exception as e:
+                self.failed += 1
+                self.last_error = str(e)
+            finally:
+                self._queue.task_done()
+
+
+conversation_summarizer = ConversationSummarizer()
+# Give a pending fold a moment to finish on interpreter shutdown
+atexit.register(conversation_summarizer.flush, 5)
@@ -0,0 +1,158 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+# --- PER-TURN DEADLINES AND CANCELLATION ---
+# A turn can stack a memory fetch, an agent run with tool calls, a fallback
+# request and retries, so without a limit the worst case runs well past a
+# minute and the user can only wait. A Deadline is created per turn and
+# handed to every stage: each one waits at most deadline.timeout(...) and
+# the optional stages (memory context, web search) are skipped when too
+# little time is left. cancel() (the chat's Stop button) ends it early.
+#
+# It also quacks like the threading.Event the streaming loops already poll
+# (is_set), so an expired or cancelled turn stops reading tokens and closes
+# its connection.
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class TurnCancelled(Exception):
+    pass
+
+
+class StageTimeout(Exception):
+    pass
+
+
+class Deadline:
+    def __init__(self, budget=None):
+        # budget: seconds for the whole turn, None for no limit
+        self.budget = budget
+        self.started = time.monotonic()
+        self.expires_at = self.started + budget if budget else None
+        self._cancelled = threading.Event()
+        # Optional stages dropped to stay inside the budget, e.g. "memory"
+        self.skipped = []
+        # Tools the agent called during the turn, e.g. web search; a reply
+        # built from them is not reused for other messages
+        self.tools_used = []
+
+    def remaining(self):
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_set(self):
+        return self.cancelled or self.expired
+
+    def skip(self, stage):
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+
+    def record_tool(self, name):
+        if name not in self.tools_used:
+            self.tools_used.append(name)
+
+    def timeout(self, cap=None, reserve=0.0):
+        # Seconds a stage may take: at most cap, leaving `reserve` for later
+        # stages; None when neither limits it
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        left = max(remaining - reserve, 0.0)
+        return left if cap is None else min(cap, left)
+
+    def check(self):
+        if self.cancelled:
+            raise TurnCancelled("turn cancelled")
+        if self.expired:
+            raise DeadlineExceeded(f"turn took longer than {self.budget:g}s")
+
+
+class AnySet:
+    # is_set() of several events at once, e.g. a hedge path's own cancel
+    # event and the turn's deadline
+    def __init__(self, *events):
+        self.events = [e for e in events if e is not None]
+
+    def is_set(self):
+        return any(e.is_set() for e in self.events)
+
+    def wait(self, timeout=None):
+        end = None if timeout is None else time.monotonic() + timeout
+        while not self.is_set():
+            left = 0.05 if end is None else min(end - time.monotonic(), 0.05)
+            if left <= 0:
+                break
+            time.sleep(left)
+        return self.is_set()
+
+
+# The deadline of the turn running on this thread, for code the turn does
+# not call directly (e.g. Agno tool functions such as web search)
+_current = threading.local()
+
+
+def current_deadline():
+    return getattr(_current, "deadline", None)
+
+
+class bind_deadline:
+    def __init__(self, deadline):
+        self.deadline = deadline
+
+    def __enter__(self):
+        self.previous = current_deadline()
+        _current.deadline = self.deadline
+        return self.deadline
+
+    def __exit__(self, *exc):
+        _current.deadline = self.previous
+        return False
+
+
+# Sized for a burst of concurrent turns: a stalled stage keeps its worker
+# until it finishes, and healthy stages must not queue behind it
+_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="turn-stage")
+
+
+def run_in_background(fn):
+    return _pool.submit(fn)
+
+
+def run_stage(fn, timeout, deadline=None, on_tick=None, tick=0.25):
+    # Runs fn() on a worker and waits at most `timeout` seconds, calling
+    # on_tick() on this thread while it waits. Raises StageTimeout when the
+    # stage is too slow (fn keeps running in the background), TurnCancelled
+    # when the turn is cancelled.
+    future = _pool.submit(fn)
+    end = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = tick if end is None else min(tick, max(end - time.monotonic(), 0.0))
+        try:
+            return future.result(timeout=wait)
+        except FutureTimeout:
+            if deadline is not None and deadline.cancelled:
+                raise TurnCancelled("turn cancelled")
+            if end is not None and time.monotonic() >= end:
+                raise StageTimeout(f"stage took longer than {timeout:g}s")
+            if on_tick is not None:
+                on_tick()
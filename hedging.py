@@ -0,0 +1,151 @@
+import queue
+import threading
+import time
+
+# --- HEDGED EXECUTION: AGNO AGENT VS DIRECT API ---
+# The agent gets a head start of `hedge_after` seconds. If it has not answered
+# (or, when streaming, started answering) by then, the direct API call is
+# launched in parallel and whichever path delivers first wins. The loser is
+# told to stop through its cancel event; if it cannot stop (a blocking
+# agent.run) its result is simply discarded.
+#
+# Workers never touch Streamlit: they report tokens and results through a
+# queue, and the calling (script) thread does all rendering. Without hedging
+# (hedge_after=None) the same loop runs the agent, and the direct API only
+# if it fails, so the caller thread is never stuck inside a blocking call.
+
+
+class HedgeStats:
+    def __init__(self):
+        self.wins = {}
+        self.hedged = 0
+        self.turns = 0
+        self._lock = threading.Lock()
+
+    def record(self, winner, hedged):
+        with self._lock:
+            self.turns += 1
+            self.wins[winner] = self.wins.get(winner, 0) + 1
+            if hedged:
+                self.hedged += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"turns": self.turns, "hedged": self.hedged, "wins": dict(self.wins)}
+
+
+hedge_stats = HedgeStats()
+
+
+class HedgeResult:
+    def __init__(self, winner, value, hedged, errors, elapsed):
+        self.winner = winner
+        self.value = value
+        self.hedged = hedged
+        self.errors = errors
+        self.elapsed = elapsed
+
+
+class AllPathsFailed(Exception):
+    def __init__(self, errors):
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors.items()))
+        self.errors = errors
+
+
+def run_hedged(primary, secondary, hedge_after, on_token=None, on_reset=None, deadline=None, on_tick=None,
+               tick=0.25):
+    # primary / secondary are (name, fn) pairs; fn(emit, cancel_event) -> str.
+    # emit(text) streams a token; it is only called when on_token is given.
+    # hedge_after=None never hedges: the secondary (if any) only runs once the
+    # primary fails. With a deadline.Deadline the wait ends when it expires or
+    # is cancelled (raising DeadlineExceeded / TurnCancelled); on_tick() is
+    # called on this thread while nothing else happens.
+    events = queue.Queue()
+    cancels = {}
+    launched = []
+    errors = {}
+    start = time.monotonic()
+
+    def launch(name, fn):
+        cancel = threading.Event()
+        cancels[name] = cancel
+        launched.append(name)
+
+        def emit(text):
+            events.put(("token", name, text))
+
+        def worker():
+            try:
+                events.put(("done", name, fn(emit if on_token else None, cancel)))
+            except Exception as e:
+                events.put(("error", name, e))
+
+        threading.Thread(target=worker, name=f"hedge-{name}", daemon=True).start()
+
+    def cancel_others(winner):
+        for name, cancel in cancels.items():
+            if name != winner:
+                cancel.set()
+
+    def can_hedge():
+        # Not once the primary streams: it is answering, just not done yet
+        return secondary is not None and len(launched) == 1 and owner is None
+
+    launch(*primary)
+    owner = None
+    hedged = False
+    try:
+        while True:
+            timeout = None
+            hedge_in = None
+            if hedge_after is not None and can_hedge():
+                hedge_in = max(hedge_after - (time.monotonic() - start), 0)
+                timeout = hedge_in
+            if on_tick is not None or deadline is not None:
+                timeout = tick if timeout is None else min(timeout, tick)
+            try:
+                kind, name, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                if deadline is not None and deadline.is_set():
+                    deadline.check()
+                if hedge_in is not None and time.monotonic() - start >= hedge_after:
+                    # Primary is slow: hedge with the secondary path
+                    launch(*secondary)
+                    hedged = True
+                elif on_tick is not None:
+                    on_tick()
+                continue
+            if deadline is not None and deadline.is_set():
+                # A path stopped by the deadline reports what it had so far
+                deadline.check()
+
+            if kind == "token":
+                if owner is None:
+                    # First path to start streaming owns the reply area
+                    owner = name
+                    cancel_others(name)
+                if name == owner:
+                    on_token(payload)
+            elif kind == "done":
+                if owner in (None, name) and not cancels[name].is_set():
+                    cancel_others(name)
+                    if hedge_after is not None:
+                        hedge_stats.record(name, hedged)
+                    return HedgeResult(name, payload, hedged, errors, time.monotonic() - start)
+            elif kind == "error":
+                errors[name] = payload
+                if name == owner:
+                    owner = None
+                    if on_reset:
+                        on_reset()
+                if can_hedge():
+                    # Primary failed outright: no point waiting for the threshold
+                    launch(*secondary)
+                elif all(n in errors or cancels[n].is_set() for n in launched):
+                    raise AllPathsFailed(errors)
+    except BaseException:
+        # Out of time, cancelled, or the caller's callback raised (a Streamlit
+        # rerun interrupts the script inside on_token / on_tick): stop every
+        # path so none keeps streaming into a reply nobody reads
+        cancel_others(None)
+        raise
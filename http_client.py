@@ -0,0 +1,175 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- SHARED HTTP CLIENT FOR api.two.ai ---
+# One pooled requests.Session per process so turns reuse keep-alive
+# connections instead of paying a TCP+TLS handshake each time. Transient
+# failures (429/5xx, connection errors) are retried with jittered exponential
+# backoff, and a circuit breaker stops hammering the endpoint while it is down.
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        # In half-open state one probe request is let through; its outcome
+        # closes the breaker again or re-opens it for another reset_timeout
+        with self._lock:
+            state = self._state()
+            if state == "half-open":
+                self.opened_at = time.monotonic()
+                return True
+            return state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    self.trips += 1
+                self.opened_at = time.monotonic()
+
+
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class SutraHttpClient:
+    def __init__(self, pool_size=20, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 breaker=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.requests = 0
+        self.retries = 0
+        self.rejected = 0
+        # Counters are bumped from every session's worker threads
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, response=None):
+        delay = retry_after_seconds(response) if response is not None else None
+        if delay is None:
+            # Full jitter keeps concurrent sessions from retrying in lockstep
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return min(delay, self.backoff_max)
+
+    def post(self, url, cancel=None, deadline=None, **kwargs):
+        # cancel: the turn's stop/expiry event (is_set); deadline: its
+        # Deadline, so attempts and backoff sleeps never outlast the turn
+        if not self.breaker.allow():
+            with self._lock:
+                self.rejected += 1
+            raise CircuitOpenError("Sutra API is unavailable right now (circuit open), please try again shortly")
+
+        timeout = kwargs.get("timeout")
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None and timeout is not None:
+                kwargs["timeout"] = max(min(timeout, remaining), 0.1)
+            with self._lock:
+                self.requests += 1
+            try:
+                response = self.session.post(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.breaker.record_failure()
+                if attempt == self.max_retries or not self.breaker.allow():
+                    raise
+                if not self._wait_to_retry(self._backoff(attempt), cancel, deadline):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                continue
+
+            if response.status_code not in RETRY_STATUSES:
+                self.breaker.record_success()
+                return response
+
+            # 429 means the endpoint is up but throttling us: for the breaker
+            # that is a success (it also ends a half-open probe), and only
+            # 5xx counts towards opening it
+            if response.status_code == 429:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            if attempt == self.max_retries or not self.breaker.allow():
+                return response
+            if not self._wait_to_retry(self._backoff(attempt, response), cancel, deadline):
+                return response
+            with self._lock:
+                self.retries += 1
+            response.close()
+
+    def _wait_to_retry(self, delay, cancel, deadline):
+        # Sleeps out the backoff; False when the turn is over or would be
+        # before the retry could start
+        if deadline is not None and deadline.remaining() is not None and deadline.remaining() <= delay:
+            return False
+        end = time.monotonic() + delay
+        while True:
+            if cancel is not None and cancel.is_set():
+                return False
+            left = end - time.monotonic()
+            if left <= 0:
+                return True
+            time.sleep(min(left, 0.05) if cancel is not None else left)
+
+    def stats(self):
+        with self._lock:
+            counts = {"requests": self.requests, "retries": self.retries, "rejected": self.rejected}
+        return {
+            **counts,
+            "breaker": self.breaker.state,
+            "breaker_trips": self.breaker.trips,
+        }
+
+
+sutra_http = SutraHttpClient()
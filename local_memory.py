@@ -0,0 +1,179 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from memory_cache import MEMORY_WINDOW
+from users import SESSION_PREFIX
+
+# --- LOCAL SQLITE MEMORY BACKEND ---
+# Without a Mem0 key the bot used to have no memory at all, and with one
+# every read and write is a remote call. LocalMemory keeps memories in a
+# SQLite file instead, behind the same calls the app makes on a Mem0
+# MemoryClient (search / get_all / add), so ChatEngine, MemoryContextCache
+# and the memory writer work with either one unchanged.
+#
+#   - memories(user_id, created_at) is indexed, so search("*") reads only the
+#     user's last 30 days as a range query instead of everything ever stored
+#   - an FTS5 table over the memory text ranks matches for real queries (bm25)
+#   - WAL mode lets sessions read while the background writer commits
+#
+# Like Mem0, add() keeps what the user said; there is no LLM fact
+# extraction, so each user message is stored as "User said: ...".
+#
+# The file is pruned when it is opened and then at most every prune_every
+# seconds from add() (the memory writer thread): memories older than the
+# window go, and so does everything from an anonymous browser session that
+# has written nothing for session_ttl. Its id died with the tab, so those
+# rows could never be read again.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    memory TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS memories_user_time ON memories (user_id, created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5 (
+    memory, user_id, content='memories', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts (rowid, memory, user_id) VALUES (new.rowid, new.memory, new.user_id);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts (memories_fts, rowid, memory, user_id) VALUES ('delete', old.rowid, old.memory, old.user_id);
+END;
+"""
+
+_WORD_RE = re.compile(r"\w+")
+# Memories are stored in English; these match nearly every row and rank nothing
+STOPWORDS = {
+    "a", "an", "and", "are", "about", "at", "be", "but", "by", "can", "do", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "said", "so", "that", "the", "to", "user", "was", "we", "what",
+    "when", "with", "you", "your",
+}
+
+
+def fts_query(text, user_id):
+    # Any of the words, scoped to one user's rows inside the index. Each term
+    # is quoted so FTS5 operators in user text are inert.
+    words = [w for w in dict.fromkeys(_WORD_RE.findall(text.casefold())) if w not in STOPWORDS]
+    if not words:
+        return None
+    terms = " OR ".join('"{}"'.format(w) for w in words)
+    return 'user_id : "{}" AND memory : ({})'.format(str(user_id).replace('"', '""'), terms)
+
+
+def _row(row):
+    return {
+        "id": row[0],
+        "memory": row[1],
+        "created_at": datetime.fromtimestamp(row[2], timezone.utc).isoformat(),
+    }
+
+
+class LocalMemory:
+    def __init__(self, path="memory.db", window=MEMORY_WINDOW, session_ttl=timedelta(days=1), prune_every=3600):
+        self.path = path
+        # search("*") only returns memories newer than this (None = all)
+        self.window = window
+        # None keeps anonymous sessions' memories until they leave the window
+        self.session_ttl = session_ttl
+        self.prune_every = prune_every
+        self.pruned = 0
+        self._last_prune = None
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self.prune()
+
+    def _connect(self):
+        # sqlite3 connections stay on the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, messages, user_id=None, **kwargs):
+        now = time.time()
+        rows = [
+            (uuid.uuid4().hex, user_id, f"User said: {m['content']}", now)
+            for m in messages
+            if m.get("role") == "user" and m.get("content")
+        ]
+        if rows:
+            with self._connect() as conn:
+                conn.executemany("INSERT INTO memories (id, user_id, memory, created_at) VALUES (?, ?, ?, ?)", rows)
+        if self.prune_every and time.monotonic() - self._last_prune >= self.prune_every:
+            self.prune()
+        return {"results": [{"id": r[0], "memory": r[2], "event": "ADD"} for r in rows]}
+
+    def search(self, query, user_id=None, limit=None, since=None, **kwargs):
+        if since is None and self.window is not None:
+            since = time.time() - self.window.total_seconds()
+        since = since or 0.0
+        conn = self._connect()
+        match = fts_query(query or "", user_id)
+        if not match:
+            # "*": the user's whole window, newest first, straight off the index
+            rows = conn.execute(
+                "SELECT id, memory, created_at FROM memories WHERE user_id = ? AND created_at >= ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (user_id, since, limit or -1),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT m.id, m.memory, m.created_at FROM memories_fts f JOIN memories m ON m.rowid = f.rowid "
+                "WHERE memories_fts MATCH ? AND m.user_id = ? AND m.created_at >= ? "
+                "ORDER BY bm25(memories_fts, 1.0, 0.0) LIMIT ?",
+                (match, user_id, since, limit or 100),
+            ).fetchall()
+        return {"results": [_row(r) for r in rows]}
+
+    def get_all(self, user_id=None, **kwargs):
+        rows = self._connect().execute(
+            "SELECT id, memory, created_at FROM memories WHERE user_id = ? ORDER BY created_at DESC", (user_id,)
+        ).fetchall()
+        return {"results": [_row(r) for r in rows]}
+
+    def delete_all(self, user_id=None, **kwargs):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM memories WHERE user_id = ?", (user_id,))
+        return {"message": "Memories deleted successfully!"}
+
+    def prune(self, older_than=None):
+        # Drops memories that have left the window and those of dead
+        # anonymous sessions; returns how many
+        self._last_prune = time.monotonic()
+        now = time.time()
+        older_than = older_than or self.window
+        deleted = 0
+        with self._connect() as conn:
+            if older_than is not None:
+                deleted += conn.execute(
+                    "DELETE FROM memories WHERE created_at < ?", (now - older_than.total_seconds(),)
+                ).rowcount
+            if self.session_ttl is not None:
+                deleted += conn.execute(
+                    "DELETE FROM memories WHERE user_id IN (SELECT user_id FROM memories WHERE user_id LIKE ? "
+                    "GROUP BY user_id HAVING MAX(created_at) < ?)",
+                    (SESSION_PREFIX + "%", now - self.session_ttl.total_seconds()),
+                ).rowcount
+        self.pruned += deleted
+        return deleted
+
+
+def build_local_memory(path=None):
+    # Hours an anonymous session's memories outlive its last message (0 = until they leave the window)
+    session_ttl = float(os.getenv("LOCAL_MEMORY_SESSION_TTL_HOURS", "24"))
+    return LocalMemory(
+        path or os.getenv("LOCAL_MEMORY_PATH", "memory.db"),
+        session_ttl=timedelta(hours=session_ttl) if session_ttl > 0 else None
+    )
@@ -0,0 +1,264 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# --- PER-USER MEMORY CONTEXT CACHE ---
+# Memories only change when we write them ourselves, so instead of calling
+# memory.search("*") and re-parsing every timestamp on every turn we keep the
+# parsed list per user, append our own writes locally, and only go back to
+# Mem0 when the TTL expires. Each user's memories are also kept in a vector
+# index so only the ones relevant to the current message need to be sent.
+#
+# Fetches are kept off the turn as far as possible: prefetch() loads a
+# user's memories in the background (session start, API key entered, after
+# a memory write lands), and a turn served from an entry older than
+# refresh_ahead * ttl schedules the next refresh itself, so the TTL running
+# out is not something a turn has to wait for.
+
+MEMORY_WINDOW = timedelta(days=30)
+
+
+def parse_memory_time(mem_time_str):
+    # Handle different timestamp formats
+    if mem_time_str.endswith('Z'):
+        mem_time = datetime.fromisoformat(mem_time_str.replace("Z", "+00:00"))
+    else:
+        mem_time = datetime.fromisoformat(mem_time_str)
+    if mem_time.tzinfo is None:
+        # Naive timestamps are treated as local time
+        mem_time = mem_time.astimezone()
+    return mem_time
+
+
+def memory_results(memories):
+    # Mem0 returns either a plain list or {"results": [...]} depending on version
+    if isinstance(memories, dict):
+        return memories.get("results") or []
+    return memories or []
+
+
+class _UserMemories:
+    def __init__(self):
+        self.items = {}
+        self.fetched_at = None
+        self.context = None
+        self.context_valid_until = None
+        # Imported here so NumPy only loads once a user actually has memories
+        from memory_index import MemoryIndex
+        self.index = MemoryIndex()
+        self.lock = threading.Lock()
+
+
+class MemoryContextCache:
+    # max_users bounds how many users' memories stay parsed in this process
+    # (least recently used are dropped and refetched when they return);
+    # max_memories_per_user keeps only the newest memories of a heavy user.
+    def __init__(self, ttl=300, window=MEMORY_WINDOW, max_users=1000, max_memories_per_user=2000,
+                 refresh_ahead=0.8, local_grace=120, prefetch_workers=4):
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        # Our own writes survive a refetch this long, since Mem0 processes
+        # adds asynchronously and may not report them yet
+        self.local_grace = local_grace
+        self.window = window
+        self.max_users = max_users
+        self.max_memories_per_user = max_memories_per_user
+        self.hits = 0
+        self.refreshes = 0
+        self.parsed = 0
+        self.evictions = 0
+        self.prefetches = 0
+        self.prefetch_errors = 0
+        self._users = OrderedDict()
+        # (id(memory), user_id) -> Future of the prefetch in flight
+        self._prefetching = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="memory-prefetch")
+
+    def _entry(self, memory, user_id):
+        key = (id(memory), user_id)
+        with self._lock:
+            entry = self._users.get(key)
+            if entry is not None:
+                self._users.move_to_end(key)
+                return entry
+            entry = self._users[key] = _UserMemories()
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.evictions += 1
+            return entry
+
+    def get_context(self, memory, user_id):
+        entry = self._entry(memory, user_id)
+        self._join_prefetch(memory, user_id, entry)
+        with entry.lock:
+            refresh_soon = self._ensure_fresh(memory, user_id, entry)
+            context = self._context(entry)
+        if refresh_soon:
+            self.prefetch(memory, user_id)
+        return context
+
+    def get_relevant_context(self, memory, user_id, query, k):
+        # Top-k memories by similarity to the query instead of the full dump
+        entry = self._entry(memory, user_id)
+        self._join_prefetch(memory, user_id, entry)
+        with entry.lock:
+            refresh_soon = self._ensure_fresh(memory, user_id, entry)
+            since = (datetime.now(timezone.utc) - self.window).timestamp()
+            context = "\n".join(entry.index.search(query, k, since=since))
+        if refresh_soon:
+            self.prefetch(memory, user_id)
+        return context
+
+    def _ensure_fresh(self, memory, user_id, entry):
+        # Returns True when the entry is due for a background refresh
+        now = time.monotonic()
+        if entry.fetched_at is None or now - entry.fetched_at >= self.ttl:
+            self._refresh(memory, user_id, entry)
+            entry.fetched_at = now
+            self.refreshes += 1
+            return False
+        self.hits += 1
+        return now - entry.fetched_at >= self.ttl * self.refresh_ahead
+
+    def prefetch(self, memory, user_id, force=False):
+        # Loads (or reloads) a user's memories on a background thread unless
+        # they are fresh enough; returns the future, or None if nothing to do
+        if memory is None:
+            return None
+        key = (id(memory), user_id)
+        with self._lock:
+            entry = self._users.get(key)
+            fetched_at = entry.fetched_at if entry is not None else None
+            if key in self._prefetching:
+                return None
+            if not force and fetched_at is not None and time.monotonic() - fetched_at < self.ttl * self.refresh_ahead:
+                return None
+            future = self._prefetching[key] = Future()
+        self._pool.submit(self._prefetch, memory, user_id, key, future, force)
+        return future
+
+    def _join_prefetch(self, memory, user_id, entry):
+        # A turn that would have to fetch anyway waits for a prefetch that is
+        # already talking to Mem0 instead of starting a second fetch (one
+        # still queued for a worker is not worth waiting for)
+        if entry.fetched_at is not None and time.monotonic() - entry.fetched_at < self.ttl:
+            return
+        with self._lock:
+            future = self._prefetching.get((id(memory), user_id))
+        if future is not None and future.running():
+            try:
+                future.result()
+            except Exception:
+                pass
+
+    def _prefetch(self, memory, user_id, key, future, force):
+        future.set_running_or_notify_cancel()
+        try:
+            entry = self._entry(memory, user_id)
+            if not force and entry.fetched_at is not None and \
+                    time.monotonic() - entry.fetched_at < self.ttl * self.refresh_ahead:
+                # A turn loaded them while this waited for a worker
+                future.set_result(None)
+                return
+            started = time.monotonic()
+            # Fetched without the entry lock: a turn arriving meanwhile is
+            # served from what is cached instead of waiting for Mem0
+            results = memory_results(memory.search("*", user_id=user_id))
+            with entry.lock:
+                self._apply(entry, results)
+                entry.fetched_at = started
+            self.prefetches += 1
+            future.set_result(None)
+        except Exception as e:
+            self.prefetch_errors += 1
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._prefetching.pop(key, None)
+
+    def _refresh(self, memory, user_id, entry):
+        self._apply(entry, memory_results(memory.search("*", user_id=user_id)))
+
+    def _apply(self, entry, results):
+        fresh = {}
+        for m in results:
+            if not isinstance(m, dict):
+                continue
+            mem_time_str = m.get("timestamp") or m.get("created_at")
+            memory_text = m.get("memory", "")
+            if not mem_time_str or not memory_text:
+                continue
+            mem_id = m.get("id") or (mem_time_str, memory_text)
+            if mem_id in entry.items:
+                # Already parsed on an earlier fetch
+                fresh[mem_id] = entry.items[mem_id]
+                continue
+            try:
+                fresh[mem_id] = (parse_memory_time(mem_time_str), memory_text)
+                self.parsed += 1
+            except Exception:
+                continue
+
+        if len(fresh) > self.max_memories_per_user:
+            newest = sorted(fresh.items(), key=lambda item: item[1][0], reverse=True)
+            fresh = dict(newest[:self.max_memories_per_user])
+
+        # Locally appended turns are superseded by what Mem0 now reports,
+        # except very recent ones Mem0 may still be processing
+        grace_cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.local_grace)
+        reported = {memory_text for _, memory_text in fresh.values()}
+        for mem_id, item in entry.items.items():
+            if isinstance(mem_id, tuple) and mem_id[0] == "local" and item[0] > grace_cutoff \
+                    and item[1] not in reported:
+                fresh[mem_id] = item
+        entry.items = fresh
+        entry.context = None
+        entry.index.retain(fresh)
+        for mem_id, (mem_time, memory_text) in fresh.items():
+            entry.index.add(mem_id, memory_text, mem_time.timestamp())
+
+    def record_write(self, memory, user_id, messages):
+        # Append our own writes so the next turn sees them without a refetch
+        entry = self._entry(memory, user_id)
+        now = datetime.now(timezone.utc)
+        with entry.lock:
+            for i, message in enumerate(messages):
+                if message.get("role") == "user" and message.get("content"):
+                    key = ("local", now.isoformat(), i)
+                    entry.items[key] = (now, f"User said: {message['content']}")
+                    entry.index.add(key, entry.items[key][1], now.timestamp())
+            entry.context = None
+
+    def invalidate(self, memory, user_id):
+        with self._lock:
+            self._users.pop((id(memory), user_id), None)
+
+    def _context(self, entry):
+        now = datetime.now(timezone.utc)
+        if entry.context is not None and now < entry.context_valid_until:
+            return entry.context
+
+        cutoff = now - self.window
+        # Check if memory is within the retention window; oldest first, since
+        # the backend's order varies and fit_prompt keeps lines from the end
+        all_memories = sorted(item for item in entry.items.values() if item[0] > cutoff)
+        oldest = all_memories[0][0] if all_memories else None
+
+        entry.context = "\n".join(memory_text for _, memory_text in all_memories)
+        # The joined string stays valid until its oldest memory ages out
+        entry.context_valid_until = (oldest + self.window) if oldest else datetime.max.replace(tzinfo=timezone.utc)
+        return entry.context
+
+    def stats(self):
+        return {
+            "users": len(self._users),
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "prefetches": self.prefetches,
+            "prefetch_errors": self.prefetch_errors,
+            "parsed": self.parsed,
+        }
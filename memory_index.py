@@ -0,0 +1,105 @@
+import re
+import zlib
+
+import numpy as np
+
+# --- LOCAL MEMORY VECTOR INDEX ---
+# Memories are embedded once with a hashed bag-of-words (words plus character
+# trigrams, so inflected forms still overlap). It is CPU-only, needs no model
+# download and works offline. Each user's vectors live in one NumPy matrix, so
+# picking the top-k memories for a message is a single matrix-vector product.
+
+EMBEDDING_DIM = 1024
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _features(text):
+    for word in _TOKEN_RE.findall(text.lower()):
+        yield word
+        if len(word) > 3:
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3]
+
+
+def embed_text(text, dim=EMBEDDING_DIM):
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in _features(text):
+        # crc32 is stable across processes, unlike hash()
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class MemoryIndex:
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.keys = []
+        self.texts = []
+        self._positions = {}
+        self._times = np.zeros(0, dtype=np.float64)
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def add(self, key, text, timestamp):
+        if key in self._positions:
+            return
+        n = len(self.keys)
+        if n == self._matrix.shape[0]:
+            # Grow geometrically so appends stay amortised O(1)
+            capacity = max(16, n * 2)
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            matrix[:n] = self._matrix[:n]
+            times = np.zeros(capacity, dtype=np.float64)
+            times[:n] = self._times[:n]
+            self._matrix, self._times = matrix, times
+        self._matrix[n] = embed_text(text, self.dim)
+        self._times[n] = timestamp
+        self._positions[key] = n
+        self.keys.append(key)
+        self.texts.append(text)
+
+    def retain(self, keys):
+        # Drop rows whose key is gone, without re-embedding the survivors
+        keep = [self._positions[k] for k in self.keys if k in keys]
+        if len(keep) == len(self.keys):
+            return
+        self._matrix = self._matrix[keep].copy()
+        self._times = self._times[keep].copy()
+        self.keys = [self.keys[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        self._positions = {k: i for i, k in enumerate(self.keys)}
+
+    def search(self, query, k, since=None):
+        n = len(self.keys)
+        if not n or k <= 0:
+            return []
+        scores = self._matrix[:n] @ embed_text(query, self.dim)
+        if since is not None:
+            scores = np.where(self._times[:n] > since, scores, -np.inf)
+        candidates = int(np.count_nonzero(np.isfinite(scores)))
+        if not candidates:
+            return []
+        # Over-fetch a little so repeated memories don't crowd out distinct ones
+        pool = min(candidates, k * 4)
+        top = np.argpartition(-scores, pool - 1)[:pool]
+        chosen, seen = [], set()
+        for i in top[np.argsort(-scores[top], kind="stable")]:
+            if self.texts[i] in seen:
+                continue
+            seen.add(self.texts[i])
+            chosen.append(i)
+            if len(chosen) == k:
+                break
+        # Oldest first by timestamp (not insertion order, which follows the
+        # backend): the prompt reads naturally and fit_prompt keeps the newest
+        return [self.texts[i] for i in sorted(chosen, key=lambda i: (self._times[i], i))]
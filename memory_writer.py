@@ -0,0 +1,178 @@
+import atexit
+import queue
+import threading
+import time
+
+from script_detect import detect_script
+from telemetry import telemetry
+
+# --- BACKGROUND MEM0 WRITE PIPELINE ---
+# Translating a turn to English and calling memory.add() costs several network
+# round trips. Turns are queued here instead and written by a worker thread, so
+# the reply is shown as soon as the model returns.
+
+
+class MemoryWriteJob:
+    def __init__(self, memory, translator, user_id, user_input, response, lang, on_written=None):
+        self.memory = memory
+        self.translator = translator
+        self.user_id = user_id
+        self.user_input = user_input
+        self.response = response
+        self.lang = lang
+        # Called on the writer thread once the turn is stored
+        self.on_written = on_written
+
+
+_STOP = object()
+
+
+class MemoryWriter:
+    def __init__(self, max_batch=8, max_retries=3, retry_delay=1.0):
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, memory, translator, user_id, user_input, response, lang, on_written=None):
+        self._ensure_started()
+        self._queue.put(MemoryWriteJob(memory, translator, user_id, user_input, response, lang, on_written))
+
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout=None):
+        # Block until every queued turn has been written (or given up on)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout=10):
+        flushed = self.flush(timeout)
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_STOP)
+        return flushed
+
+    def stats(self):
+        return {
+            "pending": self.pending(),
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+            "batches": self.batches,
+            "last_error": self.last_error,
+        }
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="mem0-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                self._queue.task_done()
+                return
+
+            # Drain whatever else is already waiting so several turns can share
+            # one memory.add() call
+            batch = [job]
+            while len(batch) < self.max_batch:
+                try:
+                    extra = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is _STOP:
+                    self._queue.put(_STOP)
+                    self._queue.task_done()
+                    break
+                batch.append(extra)
+
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch):
+        groups = {}
+        for job in batch:
+            groups.setdefault((id(job.memory), job.user_id), []).append(job)
+
+        for jobs in groups.values():
+            messages = []
+            for job in jobs:
+                with telemetry.span("memory.translate", job.lang):
+                    user_english, response_english = translate_turn(job)
+                messages.append({"role": "user", "content": user_english})
+                messages.append({"role": "assistant", "content": response_english})
+
+            for attempt in range(self.max_retries + 1):
+                try:
+                    with telemetry.span("memory.add", jobs[0].lang):
+                        jobs[0].memory.add(messages=messages, user_id=jobs[0].user_id)
+                    self.written += len(jobs)
+                    self.batches += 1
+                    # One callback per user and batch is enough
+                    if jobs[-1].on_written is not None:
+                        try:
+                            jobs[-1].on_written()
+                        except Exception as e:
+                            self.last_error = str(e)
+                    break
+                except Exception as e:
+                    self.last_error = str(e)
+                    if attempt == self.max_retries:
+                        self.failed += len(jobs)
+                        break
+                    self.retries += 1
+                    time.sleep(self.retry_delay * (2 ** attempt))
+
+
+# Memories are stored in English for consistency across languages. Each text
+# is checked locally first, so English text in a non-English session (or vice
+# versa) only costs a translation round trip when it actually needs one.
+def translate_turn(job):
+    texts = [job.user_input, job.response]
+    if not job.translator:
+        return texts[0], texts[1]
+
+    groups = {}
+    for i, text in enumerate(texts):
+        detection = detect_script(text, job.lang)
+        if detection.needs_translation:
+            groups.setdefault(detection.source_lang, []).append(i)
+
+    for source_lang, positions in groups.items():
+        try:
+            originals = [texts[i] for i in positions]
+            if hasattr(job.translator, "translate_many"):
+                # One request per source language, served from cache when possible
+                translated = job.translator.translate_many(originals, dest="en", src=source_lang)
+            else:
+                translated = [job.translator.translate(t, dest="en", src=source_lang).text for t in originals]
+            for i, value in zip(positions, translated):
+                texts[i] = value
+        except Exception:
+            # Use original text if translation fails
+            pass
+
+    return texts[0], texts[1]
+
+
+memory_writer = MemoryWriter()
+atexit.register(memory_writer.stop)
@@ -0,0 +1,154 @@
+import math
+
+# --- SUTRA PERSONA ---
+SUTRA_INSTRUCTIONS = [
+    "You are Sutra, an AI friend and mentor who lives in Pune, India.",
+    "You enjoy helping people and chatting with them in a human-like, empathetic tone.",
+    "Respond kindly, supportively, and personally in the user's chosen language.",
+    "Avoid generic AI disclaimers like 'I'm just an AI'. Instead, say you're Sutra, their AI friend.",
+    "Respect emotional context. Give thoughtful, kind responses.",
+    "If needed, use web search to gather data"
+]
+
+
+def fallback_system_prompt(lang, context):
+    return f"""You are Sutra, an AI friend and mentor who lives in Pune, India.
+You enjoy helping people and chatting with them in a human-like, empathetic tone.
+Respond kindly, supportively, and personally in {lang}.
+Avoid generic AI disclaimers like 'I'm just an AI'. Instead, say you're Sutra, their AI friend.
+Respect emotional context. Give thoughtful, kind responses.
+
+Context from previous conversations: {context}"""
+
+
+def agent_prompt(lang, context, user_message, history=""):
+    history = f"\n{history}" if history else ""
+    return f"Language: {lang}\nContext: {context}{history}\n\nUser: {user_message}"
+
+
+# --- CONVERSATION SO FAR ---
+# Older turns as a rolling summary, the latest ones verbatim (conversation.py)
+def summary_system_note(summary):
+    return f"\n\nSummary of the conversation so far: {summary}" if summary else ""
+
+
+def history_text(summary, turns):
+    lines = [f"Summary of the conversation so far: {summary}"] if summary else []
+    if turns:
+        lines.append("Recent turns:")
+        for user_message, reply in turns:
+            lines.append(f"User: {user_message}")
+            lines.append(f"Sutra: {reply}")
+    return "\n".join(lines)
+
+
+def history_messages(turns):
+    messages = []
+    for user_message, reply in turns:
+        messages.append({"role": "user", "content": user_message})
+        messages.append({"role": "assistant", "content": reply})
+    return messages
+
+
+# --- TOKEN ESTIMATION ---
+# A fast local estimate, no tokenizer download: roughly 4 characters per token
+# for Latin text and 2 per token for Indic scripts, which split more finely.
+def estimate_tokens(text):
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+def truncate_to_tokens(text, max_tokens):
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Binary search for the longest prefix that fits
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+# --- TOKEN-BUDGETED PROMPT ASSEMBLY ---
+# Priority: persona instructions > current message > conversation history >
+# memories. The message is only cut when it alone does not fit, and never
+# below MIN_MESSAGE_TOKENS (or to nothing). History (already cut to its own
+# budget by the caller) is fitted again into what the message leaves, via
+# fit_history. Memories are one per line, oldest first, so the most recent
+# ones are kept first and whole memories are dropped (never cut mid-line)
+# once the budget runs out.
+MIN_MESSAGE_TOKENS = 64
+
+
+def fit_prompt(fixed_text, user_message, context, budget, history=("", []), render_history=history_text):
+    # render_history(summary, turns) -> the text the history adds to the prompt
+    persona_tokens = estimate_tokens(fixed_text)
+    remaining = max(budget - persona_tokens, 0)
+
+    message_tokens = estimate_tokens(user_message)
+    room = max(remaining, min(message_tokens, MIN_MESSAGE_TOKENS))
+    message_truncated = message_tokens > room
+    if message_truncated:
+        user_message = truncate_to_tokens(user_message, room)
+        message_tokens = estimate_tokens(user_message)
+    remaining = max(remaining - message_tokens, 0)
+
+    summary, turns = history
+    history_budget = remaining
+    while True:
+        summary, turns, _ = fit_history(*history, history_budget)
+        history_tokens = estimate_tokens(render_history(summary, turns))
+        if history_tokens <= remaining or history_budget <= 0:
+            break
+        # fit_history's per-turn estimate is a little under the rendered text
+        history_budget = max(history_budget - (history_tokens - remaining), 0)
+    remaining = max(remaining - history_tokens, 0)
+
+    memories = [line for line in context.split("\n") if line] if context else []
+    kept = []
+    memory_tokens = 0
+    for line in reversed(memories):
+        # +1 for the joining newline
+        cost = estimate_tokens(line) + 1
+        if cost > remaining:
+            break
+        kept.append(line)
+        remaining -= cost
+        memory_tokens += cost
+    kept.reverse()
+
+    usage = {
+        "budget": budget,
+        "persona": persona_tokens,
+        "history": history_tokens,
+        "message": message_tokens,
+        "memory": memory_tokens,
+        "used": persona_tokens + history_tokens + message_tokens + memory_tokens,
+        "memories_kept": len(kept),
+        "memories_dropped": len(memories) - len(kept),
+        "message_truncated": message_truncated,
+    }
+    return user_message, (summary, turns), "\n".join(kept), usage
+
+
+# Recent turns are kept newest first and whole; the summary is cut last.
+# Returns (summary, turns, tokens used).
+def fit_history(summary, turns, budget):
+    kept = []
+    used = 0
+    for user_message, reply in reversed(turns):
+        cost = estimate_tokens(user_message) + estimate_tokens(reply) + 4
+        if used + cost > budget:
+            break
+        kept.append((user_message, reply))
+        used += cost
+    kept.reverse()
+    summary = truncate_to_tokens(summary, budget - used) if summary else ""
+    return summary, kept, used + estimate_tokens(summary)
@@ -0,0 +1,103 @@
+import hashlib
+import threading
+import time
+
+# --- PROCESS-WIDE RESOURCE CACHE ---
+# Streamlit re-executes app.py on every rerun, but imported modules are only
+# loaded once per process. Clients stored here (Mem0, translator, Agno agent)
+# are therefore built once and shared by every rerun and every session.
+
+
+def key_fingerprint(secret):
+    # Never keep raw API keys in cache keys / stats output
+    if not secret:
+        return ""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12]
+
+
+class _Entry:
+    def __init__(self, value):
+        self.value = value
+        self.owners = set()
+        self.last_used = time.monotonic()
+
+
+class ResourceCache:
+    def __init__(self, idle_ttl=1800):
+        self.idle_ttl = idle_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = {}
+        self._build_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, factory, owner=None):
+        self.evict_idle()
+        built = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                build_lock = self._build_locks.setdefault(key, threading.Lock())
+        if entry is None:
+            # Build outside the global lock so a slow constructor does not block
+            # other lookups; the per-key lock stops two sessions building the
+            # same object at the same time.
+            with build_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is None:
+                    entry = _Entry(factory())
+                    built = True
+                    with self._lock:
+                        self._entries[key] = entry
+                        self._build_locks.pop(key, None)
+        with self._lock:
+            if built:
+                self.misses += 1
+            else:
+                self.hits += 1
+            entry.last_used = time.monotonic()
+            if owner is not None:
+                entry.owners.add(owner)
+        return entry.value
+
+    def release(self, key, owner):
+        # Drop a session's claim on a resource; evict it once nobody uses it
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.owners.discard(owner)
+            if not entry.owners:
+                del self._entries[key]
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.evictions += 1
+
+    def evict_idle(self):
+        if not self.idle_ttl:
+            return
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e.last_used < cutoff]
+            for k in stale:
+                del self._entries[k]
+            self.evictions += len(stale)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+resource_cache = ResourceCache()
@@ -0,0 +1,215 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# --- RESPONSE CACHE FOR REPEATED PROMPTS ---
+# Greetings and small talk ("hi", "how are you", "what can you do") make up a
+# large share of turns and each one used to pay a full Sutra completion.
+# Opt-in (RESPONSE_CACHE=1): replies are cached per normalized message +
+# language + persona, and with a similarity threshold, near-duplicates hit
+# too (local hashed embedding from memory_index.py, no model download).
+#
+# Replies are only shared between users when no memories went into the
+# prompt; a reply built from someone's memories is cached for that user
+# alone. Messages that talk about the user themselves, or about anything
+# time-sensitive (web search territory), always go to the model.
+
+_SPACE_RE = re.compile(r"\s+")
+_YEAR_RE = re.compile(r"\b(19|20)\d\d\b")
+
+PERSONAL_MARKERS = {
+    "i", "im", "ive", "id", "my", "me", "mine", "myself", "remember", "recall", "told", "said", "earlier",
+    "mera", "meri", "mere", "mujhe", "maine", "main", "yaad",
+    "मेरा", "मेरी", "मेरे", "मुझे", "मैंने", "मैं", "याद",
+}
+TIME_MARKERS = {
+    "today", "tonight", "tomorrow", "yesterday", "now", "current", "currently", "latest", "news", "weather",
+    "price", "prices", "score", "live", "trending", "aaj", "abhi", "kal", "khabar", "mausam",
+    "आज", "अभी", "कल", "खबर", "ख़बर", "मौसम", "समाचार",
+}
+
+
+def normalize_prompt(text):
+    # Case, width, punctuation and whitespace differences do not change the
+    # answer. Punctuation is removed by Unicode category so Indic vowel signs
+    # (which are not \w) survive.
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+class CachedReply:
+    def __init__(self, reply, cost_ms, expires_at, size, vector):
+        self.reply = reply
+        self.cost_ms = cost_ms
+        self.expires_at = expires_at
+        self.size = size
+        self.vector = vector
+
+
+class ResponseCache:
+    def __init__(self, max_entries=2000, max_bytes=2_000_000, ttl=3600, similarity=None, max_chars=120):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Cosine similarity for near-duplicate hits; None = exact matches only
+        self.similarity = similarity
+        self.max_chars = max_chars
+        self.lookups = 0
+        self.hits = 0
+        self.similar_hits = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_ms = 0.0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        # partition -> (keys, matrix) for the similarity scan, rebuilt when stale
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    def bypass_reason(self, message):
+        normalized = normalize_prompt(message)
+        if not normalized:
+            return "empty"
+        if len(normalized) > self.max_chars:
+            return "long"
+        words = set(normalized.split())
+        if words & PERSONAL_MARKERS:
+            return "personal"
+        if words & TIME_MARKERS or _YEAR_RE.search(normalized):
+            return "time_sensitive"
+        return None
+
+    def lookup(self, message, lang, persona, user_id=None):
+        # The user's own partition first (replies that used their memories),
+        # then the one shared by everyone
+        normalized = normalize_prompt(message)
+        partitions = [(lang, persona, user_id), (lang, persona, None)] if user_id else [(lang, persona, None)]
+        now = time.monotonic()
+        with self._lock:
+            self.lookups += 1
+            for partition in partitions:
+                entry = self._get(partition, normalized, now)
+                if entry is not None:
+                    self.hits += 1
+                    return entry
+
+        if not self.similarity:
+            return None
+        vector = self._embed(normalized)
+        with self._lock:
+            for partition in partitions:
+                entry = self._nearest(partition, vector, now)
+                if entry is not None:
+                    self.hits += 1
+                    self.similar_hits += 1
+                    return entry
+        return None
+
+    def store(self, message, lang, persona, reply, cost_ms, user_id=None):
+        normalized = normalize_prompt(message)
+        key = ((lang, persona, user_id), normalized)
+        size = len(reply.encode("utf-8")) + len(normalized.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        vector = self._embed(normalized) if self.similarity else None
+        entry = CachedReply(reply, cost_ms, time.monotonic() + self.ttl, size, vector)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self._entries[key] = entry
+            self.bytes += size
+            self.stores += 1
+            self._matrices.pop(key[0], None)
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._evict_oldest()
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def record_saved(self, ms):
+        with self._lock:
+            self.saved_ms += max(ms, 0.0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "bypassed": self.bypassed,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "saved_ms": self.saved_ms,
+            }
+
+    def _get(self, partition, normalized, now):
+        key = (partition, normalized)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, partition, vector, now):
+        keys, matrix = self._partition_matrix(partition)
+        if not keys:
+            return None
+        scores = matrix @ vector
+        best = int(scores.argmax())
+        if scores[best] < self.similarity:
+            return None
+        return self._get(partition, keys[best][1], now)
+
+    def _partition_matrix(self, partition):
+        cached = self._matrices.get(partition)
+        if cached is None:
+            import numpy as np
+            keys = [key for key, entry in self._entries.items() if key[0] == partition and entry.vector is not None]
+            matrix = np.stack([self._entries[key].vector for key in keys]) if keys else None
+            cached = self._matrices[partition] = (keys, matrix)
+        return cached
+
+    def _evict_oldest(self):
+        key, entry = self._entries.popitem(last=False)
+        self.bytes -= entry.size
+        self.evictions += 1
+        self._matrices.pop(key[0], None)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        self._matrices.pop(key[0], None)
+
+    def _embed(self, normalized):
+        # NumPy and the embedding only load once similarity matching is on
+        from memory_index import embed_text
+        return embed_text(normalized)
+
+
+def response_cache_from_env():
+    if os.getenv("RESPONSE_CACHE", "0") != "1":
+        return None
+    similarity = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.9")) or None
+    return ResponseCache(
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000")),
+        max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", "2000000")),
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        similarity=similarity,
+    )
+
+
+# None unless RESPONSE_CACHE=1
+response_cache = response_cache_from_env()
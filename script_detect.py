@@ -0,0 +1,70 @@
+import re
+from collections import namedtuple
+
+# --- OFFLINE SCRIPT / LANGUAGE DETECTION ---
+# Decides per message whether it needs translating to English at all, from the
+# Unicode blocks it is written in. Each Indic script used by the app occupies
+# its own 128-codepoint block, so one shift per character classifies it.
+
+Detection = namedtuple("Detection", ["script", "source_lang", "needs_translation"])
+
+# Unicode block (codepoint >> 7) -> (script name, googletrans source code)
+INDIC_BLOCKS = {
+    0x0900 >> 7: ("devanagari", "hi"),
+    0x0A00 >> 7: ("gurmukhi", "pa"),
+    0x0A80 >> 7: ("gujarati", "gu"),
+    0x0B80 >> 7: ("tamil", "ta"),
+    0x0C00 >> 7: ("telugu", "te"),
+    0x0C80 >> 7: ("kannada", "kn"),
+}
+
+# Devanagari is shared by several of the app's languages
+DEVANAGARI_LANGS = {"marathi": "mr", "hindi": "hi", "bihari": "hi"}
+
+# Frequent romanised Hindi words that almost never appear in English text
+HINGLISH_MARKERS = frozenset("""
+hai hain nahi nahin kya kyu kyun kaise kaisa kaisi mera meri mere tera teri tere
+tum tumhara aap aapka hum humko mujhe mujhko tujhe yaar bhai accha acha theek thik
+kuch bahut bohot abhi bhi aur lekin matlab kab kahan kaha kyunki chahiye raha rahi
+rahe gaya gayi hoga hogi karna karo kar diya liya samajh pata batao bolo haan
+""".split())
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+# Only the head of long messages is inspected; the script is clear by then
+MAX_CHARS = 400
+
+
+def detect_script(text, lang_hint=None):
+    counts = {}
+    latin = 0
+    for ch in text[:MAX_CHARS]:
+        code = ord(ch)
+        if code < 0x250:
+            if ch.isalpha():
+                latin += 1
+            continue
+        block = code >> 7
+        if block in INDIC_BLOCKS:
+            counts[block] = counts.get(block, 0) + 1
+
+    if counts:
+        block = max(counts, key=counts.get)
+        indic = counts[block]
+        # A few Indic characters inside mostly-English text still count
+        if indic >= latin * 0.2:
+            script, source_lang = INDIC_BLOCKS[block]
+            if script == "devanagari":
+                source_lang = DEVANAGARI_LANGS.get(lang_hint, "hi")
+            return Detection(script, source_lang, True)
+
+    if not latin:
+        # Digits, emoji, punctuation only: nothing to translate
+        return Detection("other", None, False)
+
+    words = _WORD_RE.findall(text[:MAX_CHARS].lower())
+    markers = sum(1 for w in words if w in HINGLISH_MARKERS)
+    if markers >= 2 or (words and markers / len(words) >= 0.25):
+        # Romanised Hindi: let Google detect the exact source language
+        return Detection("latin", "auto", True)
+    return Detection("latin", "en", False)
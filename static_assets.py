@@ -0,0 +1,116 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+
+# --- STATIC ASSETS ---
+# Images and the stylesheet are served by Streamlit itself from ./static
+# (server.enableStaticServing, see .streamlit/config.toml) at app/static/...,
+# resized to the size they are displayed at (2x for high-density screens)
+# and re-encoded as WebP. File names carry a content hash, so a cache in
+# front of the app can keep them forever and a rebuilt asset gets a new URL.
+#
+# The built files and manifest are committed; rerun this module after
+# changing a source asset:
+#     python static_assets.py
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+MANIFEST_PATH = os.path.join(STATIC_DIR, "manifest.json")
+STATIC_URL = "app/static"
+
+# name -> (source file, output size in px, background used for padding)
+IMAGES = {
+    "sidebar_logo": ("sutra_logo.png", (420, 160), (0, 0, 0)),
+    "header_logo": ("logo_bg.png", (400, 400), (0, 0, 0)),
+    "assistant_avatar": ("logo_bg.png", (72, 72), (0, 0, 0)),
+}
+STYLESHEETS = {
+    "style": "assets/style.css",
+}
+WEBP_QUALITY = 82
+
+_manifest = None
+
+
+def load_manifest():
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH, encoding="utf-8") as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+def asset_url(name):
+    filename = load_manifest().get(name)
+    if filename is None:
+        raise KeyError(f"static asset '{name}' is not built; run python static_assets.py")
+    return f"{STATIC_URL}/{filename}"
+
+
+def stylesheet_html(name="style"):
+    return f'<link rel="stylesheet" href="{asset_url(name)}">'
+
+
+# --- BUILD ---
+
+def _hashed_name(name, data, ext):
+    return f"{name}.{hashlib.sha1(data).hexdigest()[:10]}{ext}"
+
+
+def render_image(source, size, background):
+    from PIL import Image, ImageOps
+
+    with Image.open(os.path.join(ROOT_DIR, source)) as im:
+        im = im.convert("RGBA")
+        flat = Image.new("RGBA", im.size, background + (255,))
+        flat.alpha_composite(im)
+        # pad rather than crop so the logo never loses its edges
+        out = ImageOps.pad(flat.convert("RGB"), size, method=Image.LANCZOS, color=background)
+    buf = io.BytesIO()
+    out.save(buf, "WEBP", quality=WEBP_QUALITY, method=6)
+    return buf.getvalue()
+
+
+def build():
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    manifest = {}
+    outputs = {}
+    for name, (source, size, background) in IMAGES.items():
+        data = render_image(source, size, background)
+        outputs[name] = (_hashed_name(name, data, ".webp"), data)
+    for name, source in STYLESHEETS.items():
+        with open(os.path.join(ROOT_DIR, source), "rb") as f:
+            data = f.read()
+        outputs[name] = (_hashed_name(name, data, ".css"), data)
+
+    for name, (filename, data) in outputs.items():
+        with open(os.path.join(STATIC_DIR, filename), "wb") as f:
+            f.write(data)
+        manifest[name] = filename
+
+    # drop files from earlier builds
+    keep = set(manifest.values()) | {"manifest.json"}
+    for filename in os.listdir(STATIC_DIR):
+        if filename not in keep:
+            os.remove(os.path.join(STATIC_DIR, filename))
+
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return {name: (filename, len(data)) for name, (filename, data) in outputs.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build resized, content-hashed static assets into ./static")
+    parser.parse_args()
+    for name, (filename, size) in build().items():
+        print(f"{name:>18}: {filename} ({size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+
+# --- SUTRA DIRECT API HELPERS ---
+# Overridable so the app can be pointed at benchmarks/stub_sutra_server.py
+SUTRA_BASE_URL = os.getenv("SUTRA_BASE_URL", "https://api.two.ai/v2")
+SUTRA_CHAT_URL = f"{SUTRA_BASE_URL}/chat/completions"
+
+
+# Parse an OpenAI-style server-sent-event stream and yield the text deltas
+def iter_sse_deltas(response):
+    # SSE responses usually come without a charset; default to UTF-8 so
+    # Devanagari and other Indic scripts are not decoded as latin-1
+    if not response.encoding or response.encoding.lower() == "iso-8859-1":
+        response.encoding = "utf-8"
+
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            continue
+        choices = chunk.get("choices") or []
+        if not choices:
+            continue
+        delta = choices[0].get("delta") or {}
+        text = delta.get("content")
+        if text:
+            yield text
+
+
+# Pull the text out of an Agno streaming run, skipping tool-call events
+def iter_agent_deltas(run_stream):
+    for chunk in run_stream:
+        # ToolCallStarted / ToolCallCompleted carry a status line, not reply text
+        if str(getattr(chunk, "event", "")).startswith("ToolCall"):
+            continue
+        text = getattr(chunk, "content", None)
+        if isinstance(text, str) and text:
+            yield text
+
+
+class SutraAPIError(Exception):
+    def __init__(self, status_code, text):
+        super().__init__(f"{status_code} - {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+# --- REQUESTS THAT CAN RUN OFF THE STREAMLIT SCRIPT THREAD ---
+# Neither function touches st.*; tokens go to emit() and a set cancel event
+# stops streaming early and releases the connection.
+
+def fallback_request(http, api_key, model_id, system_prompt, user_message, emit=None, cancel=None, history=None,
+                     max_tokens=500, timeout=30, deadline=None):
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    data = {
+        "model": model_id,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            # earlier turns of this conversation, oldest first
+            *(history or []),
+            {"role": "user", "content": user_message}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": 0.7
+    }
+    if emit is not None:
+        data["stream"] = True
+
+    # Only the turn's own calls pass cancel/deadline, so background callers
+    # (e.g. the summarizer) keep working with any requests-style client
+    limits = {"cancel": cancel, "deadline": deadline} if cancel is not None or deadline is not None else {}
+    response = http.post(
+        SUTRA_CHAT_URL,
+        headers=headers,
+        json=data,
+        timeout=timeout,
+        stream=emit is not None,
+        **limits
+    )
+
+    if response.status_code != 200:
+        raise SutraAPIError(response.status_code, response.text)
+
+    if emit is None:
+        result = response.json()
+        return result["choices"][0]["message"]["content"]
+
+    parts = []
+    with response:
+        for text in iter_sse_deltas(response):
+            if cancel is not None and cancel.is_set():
+                break
+            parts.append(text)
+            emit(text)
+    return "".join(parts)
+
+
+# Agno keeps every run (prompt with memory context, reply) on the agent
+# instance under one session; pooled agents serve every user, so the history
+# is dropped after each run instead of piling up.
+def forget_runs(agent):
+    memory = getattr(agent, "memory", None)
+    if memory is None:
+        return
+    if getattr(memory, "runs", None):
+        memory.runs = type(memory.runs)()
+    if getattr(memory, "messages", None):
+        memory.messages = []
+    agent.run_response = None
+    agent.session_metrics = None
+
+
+# Agno keeps per-run state on an Agent, so one instance cannot serve two runs
+# at once. The pool gives each run its own: up to `size` agents are built on
+# demand (by factory(), which shares one model client and tool list between
+# them) and reused; a run beyond that waits for one to come back.
+class AgentPool:
+    def __init__(self, factory, size=8):
+        self.factory = factory
+        self.size = max(size, 1)
+        self.built = 0
+        self.runs = 0
+        self.waited = 0
+        self._idle = []
+        self._cond = threading.Condition()
+
+    def acquire(self, cancel=None):
+        # An agent, or None if cancel was set while waiting for one
+        with self._cond:
+            if not self._idle and self.built >= self.size:
+                self.waited += 1
+            while not self._idle and self.built >= self.size:
+                if cancel is not None and cancel.is_set():
+                    return None
+                self._cond.wait(0.05 if cancel is not None else None)
+            self.runs += 1
+            if self._idle:
+                return self._idle.pop()
+            self.built += 1
+        try:
+            return self.factory()
+        except BaseException:
+            with self._cond:
+                self.built -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, agent):
+        forget_runs(agent)
+        with self._cond:
+            self._idle.append(agent)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {"size": self.size, "built": self.built, "idle": len(self._idle), "runs": self.runs,
+                    "waited": self.waited}
+
+
+def agent_request(agents, prompt, emit=None, cancel=None):
+    # agents: an AgentPool. A turn that was answered or stopped while it
+    # waited for a free agent never starts its run.
+    agent = agents.acquire(cancel)
+    if agent is None:
+        return ""
+    try:
+        if cancel is not None and cancel.is_set():
+            return ""
+        if emit is None:
+            # Explicit: Agno remembers the last stream= value on the instance
+            reply = agent.run(prompt, stream=False)
+            # Handle different response types
+            if hasattr(reply, 'content'):
+                return reply.content
+            elif hasattr(reply, 'text'):
+                return reply.text
+            return str(reply)
+
+        parts = []
+        run_stream = agent.run(prompt, stream=True)
+        try:
+            for text in iter_agent_deltas(run_stream):
+                if cancel is not None and cancel.is_set():
+                    break
+                parts.append(text)
+                emit(text)
+        finally:
+            close = getattr(run_stream, "close", None)
+            if close:
+                close()
+        return "".join(parts)
+    finally:
+        agents.release(agent)
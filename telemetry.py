@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from deadline import current_deadline
+
+# --- PER-TURN STAGE TIMING ---
+# Spans time each stage of a turn (memory search, agent run, tool calls,
+# fallback POST, translation, memory write) and feed one histogram per
+# (stage, language). Results show up in the sidebar and can be exported as
+# Prometheus text or JSON lines.
+#
+# Disabled (TURN_TELEMETRY=0), span() hands back a shared no-op object, so the
+# instrumented code pays one attribute check per stage.
+#
+# Spans run on whatever thread does the work (hedging workers, the memory
+# writer); a span's language is inherited by spans nested in it on the same
+# thread, e.g. a tool call inside agent.run.
+
+# Upper bounds in ms; Prometheus export converts them to seconds
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        # one extra slot for +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+    def observe(self, ms, ok=True):
+        i = 0
+        while i < len(self.buckets) and ms > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += ms
+        if not ok:
+            self.errors += 1
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return float(self.buckets[-1])
+
+
+class _Span:
+    __slots__ = ("telemetry", "stage", "lang", "started", "previous_lang")
+
+    def __init__(self, telemetry, stage, lang):
+        self.telemetry = telemetry
+        self.stage = stage
+        self.lang = lang
+
+    def __enter__(self):
+        local = self.telemetry._local
+        self.previous_lang = getattr(local, "lang", None)
+        if self.lang is None:
+            self.lang = self.previous_lang or "unknown"
+        local.lang = self.lang
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self.started) * 1000
+        self.telemetry._local.lang = self.previous_lang
+        self.telemetry.record(self.stage, self.lang, ms, ok=exc_type is None)
+        return False
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Telemetry:
+    def __init__(self, enabled=True, recent=2000, jsonl_path=None, prometheus_path=None):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.started_at = time.time()
+        self._histograms = {}
+        self._recent = deque(maxlen=recent)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+
+    def span(self, stage, lang=None):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, stage, lang)
+
+    def record(self, stage, lang, ms, ok=True):
+        if not self.enabled:
+            return
+        event = {"ts": round(time.time(), 3), "stage": stage, "lang": lang, "ms": round(ms, 2), "ok": ok}
+        with self._lock:
+            histogram = self._histograms.get((stage, lang))
+            if histogram is None:
+                histogram = self._histograms[(stage, lang)] = Histogram()
+            histogram.observe(ms, ok)
+            self._recent.append(event)
+
+        if self.jsonl_path:
+            self._append_jsonl(event)
+        if self.prometheus_path and stage == "turn":
+            self.write_prometheus(self.prometheus_path)
+
+    # Agno tool hook: times every tool call the agent makes (e.g. web search)
+    def tool_hook(self, function_name, function_call, arguments):
+        # Also noted on the turn (the agent runs with its deadline bound)
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.record_tool(function_name)
+        with self.span(f"tool.{function_name}"):
+            return function_call(**arguments)
+
+    def summary(self):
+        # [(stage, lang, count, p50 ms, p95 ms, mean ms, errors)] sorted by stage
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return [
+                (stage, lang, h.count, h.quantile(0.5), h.quantile(0.95), h.sum / h.count, h.errors)
+                for (stage, lang), h in items if h.count
+            ]
+
+    def jsonl(self):
+        with self._lock:
+            events = list(self._recent)
+        return "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP sutra_turn_stage_seconds Time spent in each stage of a chat turn.",
+            "# TYPE sutra_turn_stage_seconds histogram",
+        ]
+        errors = []
+        with self._lock:
+            items = sorted(self._histograms.items())
+            for (stage, lang), h in items:
+                labels = f'stage="{stage}",lang="{lang}"'
+                cumulative = 0
+                for bound, n in zip(list(h.buckets) + ["+Inf"], h.counts):
+                    cumulative += n
+                    le = bound if bound == "+Inf" else f"{bound / 1000:g}"
+                    lines.append(f'sutra_turn_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"sutra_turn_stage_seconds_sum{{{labels}}} {h.sum / 1000:.6f}")
+                lines.append(f"sutra_turn_stage_seconds_count{{{labels}}} {h.count}")
+                errors.append(f"sutra_turn_stage_errors_total{{{labels}}} {h.errors}")
+        lines.append("# HELP sutra_turn_stage_errors_total Stages that ended with an exception.")
+        lines.append("# TYPE sutra_turn_stage_errors_total counter")
+        lines.extend(errors)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Atomic replace, for node_exporter's textfile collector or similar
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _append_jsonl(self, event):
+        try:
+            with self._file_lock, open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._recent.clear()
+
+
+telemetry = Telemetry(
+    enabled=os.getenv("TURN_TELEMETRY", "1") != "0",
+    jsonl_path=os.getenv("TELEMETRY_JSONL_PATH") or None,
+    prometheus_path=os.getenv("TELEMETRY_PROM_PATH") or None,
+)
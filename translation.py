@@ -0,0 +1,145 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- CACHED, BATCHED TRANSLATION ---
+# Wraps the googletrans Translator. Identical phrases (greetings, repeated
+# questions) are served from a bounded LRU, and the texts of one turn are sent
+# to Google in a single request instead of one round trip each.
+
+# Chosen to survive translation unchanged; if it does not, we fall back to
+# translating the texts one by one
+BATCH_SEPARATOR = "\n\n⁂\n\n"
+
+
+def cache_key(text, src, dest):
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return f"{digest}|{src}|{dest}"
+
+
+class CachedTranslator:
+    # factory() builds the wrapped translator on the first cache miss instead,
+    # so googletrans is not imported until something needs translating
+    def __init__(self, translator=None, max_entries=5000, path=None, factory=None):
+        self._translator = translator
+        self._factory = factory
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+        self.total_ms = 0.0
+        self.last_call = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    @property
+    def translator(self):
+        if self._translator is None:
+            with self._lock:
+                if self._translator is None:
+                    self._translator = self._factory()
+        return self._translator
+
+    def translate(self, text, dest="en", src="auto"):
+        return self.translate_many([text], dest=dest, src=src)[0]
+
+    def translate_many(self, texts, dest="en", src="auto"):
+        start = time.perf_counter()
+        results = [None] * len(texts)
+        missing = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                if not text or not text.strip():
+                    results[i] = text
+                    continue
+                key = cache_key(text, src, dest)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[i] = self._cache[key]
+                    self.hits += 1
+                else:
+                    missing.setdefault(text, []).append(i)
+                    self.misses += 1
+
+        if missing:
+            unique = list(missing)
+            translated = self._translate_batch(unique, dest, src)
+            with self._lock:
+                for text, value in zip(unique, translated):
+                    for i in missing[text]:
+                        results[i] = value
+                    self._cache[cache_key(text, src, dest)] = value
+                    self._cache.move_to_end(cache_key(text, src, dest))
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+                self._dirty = True
+
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.total_ms += elapsed
+            self.last_call = {
+                "texts": len(texts),
+                "hits": len(texts) - sum(len(v) for v in missing.values()),
+                "ms": elapsed,
+            }
+        return results
+
+    def _translate_batch(self, texts, dest, src):
+        if len(texts) > 1:
+            self.requests += 1
+            joined = self.translator.translate(BATCH_SEPARATOR.join(texts), dest=dest, src=src).text
+            parts = [p.strip() for p in joined.split(BATCH_SEPARATOR.strip())]
+            if len(parts) == len(texts):
+                return parts
+        # Single text, or the separator got mangled
+        out = []
+        for text in texts:
+            self.requests += 1
+            out.append(self.translator.translate(text, dest=dest, src=src).text)
+        return out
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "requests": self.requests,
+                "total_ms": self.total_ms,
+                "last_call": self.last_call,
+            }
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for key, value in list(data.items())[-self.max_entries:]:
+                self._cache[key] = value
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            data = dict(self._cache)
+            self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
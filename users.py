@@ -0,0 +1,67 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# --- PER-USER IDENTITY AND QUOTAS ---
+# Every session used to read and write the same Mem0 namespace. Each user now
+# gets their own id: the signed-in account when Streamlit auth is configured
+# (hashed, so no e-mail address is sent to Mem0), otherwise the browser
+# session. SUTRA_USER_ID pins one id for single-user installs.
+
+
+# Anonymous ids live as long as the browser session that made them
+SESSION_PREFIX = "session-"
+
+
+def resolve_user_id(email=None, session_id=None, fixed=None):
+    if fixed:
+        return fixed
+    if email:
+        return "user-" + hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:24]
+    return f"{SESSION_PREFIX}{session_id}"
+
+
+class TurnQuota:
+    # Sliding window: at most per_minute turns per user in any 60 seconds.
+    # Only the most recently active max_users users are tracked.
+    def __init__(self, per_minute=20, window=60.0, max_users=10000):
+        self.per_minute = per_minute
+        self.window = window
+        self.max_users = max_users
+        self.allowed = 0
+        self.rejected = 0
+        self._turns = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, user_id):
+        # Records the turn and returns 0 if it may run, else seconds to wait
+        if self.per_minute <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            turns = self._turns.get(user_id)
+            if turns is None:
+                turns = self._turns[user_id] = deque()
+                while len(self._turns) > self.max_users:
+                    self._turns.popitem(last=False)
+            else:
+                self._turns.move_to_end(user_id)
+            while turns and now - turns[0] >= self.window:
+                turns.popleft()
+            if len(turns) >= self.per_minute:
+                self.rejected += 1
+                return math.ceil(self.window - (now - turns[0]))
+            turns.append(now)
+            self.allowed += 1
+            return 0
+
+    def stats(self):
+        with self._lock:
+            return {"users": len(self._turns), "allowed": self.allowed, "rejected": self.rejected}
+
+
+# 0 disables the limit
+turn_quota = TurnQuota(per_minute=int(os.getenv("USER_TURNS_PER_MINUTE", "20")))
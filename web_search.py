@@ -0,0 +1,185 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from deadline import current_deadline
+
+# --- CACHED, DEDUPLICATED WEB SEARCH FOR THE MENTOR AGENT ---
+# The agent may search the web on any turn, and trending topics get searched
+# over and over, each time a slow DuckDuckGo round trip inside agent.run.
+# CachedWebSearch sits in front of DuckDuckGoTools and is shared by every
+# session in the process:
+#   - results are cached per normalized query for `ttl` seconds (news for
+#     `news_ttl`, since it goes stale faster)
+#   - concurrent identical queries share one fetch instead of each issuing
+#     their own
+#   - a turn waits at most `timeout` seconds for a search; the model then
+#     gets a "timed out" result and answers without it, while the fetch
+#     finishes in the background and still fills the cache
+#   - inside a turn with a deadline (deadline.py) the wait is also capped so
+#     `answer_reserve` seconds remain for the reply; with less time than
+#     `min_search` left, uncached searches are skipped altogether
+#
+# Its duckduckgo_search / duckduckgo_news methods keep DuckDuckGoTools'
+# names and signatures, so the model sees the same tools and telemetry still
+# times them as tool.duckduckgo_search / tool.duckduckgo_news.
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    return _SPACE_RE.sub(" ", str(query)).strip().casefold()
+
+
+class CachedWebSearch:
+    def __init__(self, backend=None, ttl=900, news_ttl=300, timeout=8.0, max_entries=500, workers=4,
+                 answer_reserve=5.0, min_search=1.0):
+        # backend: DuckDuckGoTools-style object, created on first use if None
+        self._backend = backend
+        self.ttl = ttl
+        self.news_ttl = news_ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.answer_reserve = answer_reserve
+        self.min_search = min_search
+        self.calls = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.fetched = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.skipped = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="web-search")
+
+    def duckduckgo_search(self, query: str, max_results: int = 5) -> str:
+        """Use this function to search DuckDuckGo for a query.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The result from DuckDuckGo.
+        """
+        return self._search("search", query, max_results)
+
+    def duckduckgo_news(self, query: str, max_results: int = 5) -> str:
+        """Use this function to get the latest news from DuckDuckGo.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The latest news from DuckDuckGo.
+        """
+        return self._search("news", query, max_results)
+
+    def tools(self):
+        return [self.duckduckgo_search, self.duckduckgo_news]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "fetched": self.fetched,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "skipped": self.skipped,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _search(self, kind, query, max_results):
+        key = (kind, normalize_query(query), int(max_results or 5))
+        now = time.monotonic()
+        deadline = current_deadline()
+        timeout = self.timeout
+        if deadline is not None:
+            deadline.record_tool(f"web_search.{kind}")
+            timeout = deadline.timeout(self.timeout, reserve=self.answer_reserve)
+        with self._lock:
+            self.calls += 1
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            if deadline is not None and future is None and timeout < self.min_search:
+                self.skipped += 1
+                deadline.skip("web search")
+                return json.dumps({"error": "No time left for a web search on this turn; answer without it."})
+            if future is not None:
+                self.coalesced += 1
+            else:
+                self.fetched += 1
+                future = self._inflight[key] = self._pool.submit(self._fetch, key, query, max_results)
+
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            return json.dumps({"error": f"Web search timed out after {timeout:g}s; answer without it."})
+        except Exception as e:
+            return json.dumps({"error": f"Web search failed: {e}"})
+
+    def _fetch(self, key, query, max_results):
+        kind = key[0]
+        try:
+            backend = self._get_backend()
+            if kind == "news":
+                result = backend.duckduckgo_news(query, max_results=max_results)
+            else:
+                result = backend.duckduckgo_search(query, max_results=max_results)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+                self._inflight.pop(key, None)
+            raise
+
+        ttl = self.news_ttl if kind == "news" else self.ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        return result
+
+    def _get_backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    from agno.tools.duckduckgo import DuckDuckGoTools
+                    self._backend = DuckDuckGoTools()
+        return self._backend
+
+
+def web_search_from_env():
+    return CachedWebSearch(
+        ttl=float(os.getenv("WEB_SEARCH_CACHE_TTL", "900")),
+        news_ttl=float(os.getenv("WEB_SEARCH_NEWS_TTL", "300")),
+        timeout=float(os.getenv("WEB_SEARCH_TIMEOUT", "8")),
+        max_entries=int(os.getenv("WEB_SEARCH_CACHE_SIZE", "500")),
+        answer_reserve=float(os.getenv("WEB_SEARCH_ANSWER_RESERVE", "5")),
+    )
+
+
+# Shared by every session; DuckDuckGoTools is only imported on the first search
+web_search = web_search_from_env()